@@ -1,9 +1,12 @@
 from .manager import manager, Counter  # NOQA
 from .job import job  # NOQA
-from .status import FalconryStatus  # NOQA
+from .job_array import job_array  # NOQA
+from .barrier import barrier  # NOQA
+from .status import FalconryStatus, StatusIndex  # NOQA
 from . import cli  # NOQA
 from .schedd_wrapper import ScheddWrapper, kerberos_auth  # NOQA
 from .__main__ import config  # NOQA
 from .quick_job import quick_job  # NOQA
 from .mychdir import chdir  # NOQA
-from .utils import run_command_local, prepend, clean_dir, tail_file  # NOQA
+from .utils import run_command_local, prepend, clean_dir, tail_file, tail_files  # NOQA
+from .runtimes import RuntimeDB  # NOQA
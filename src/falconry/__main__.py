@@ -2,11 +2,15 @@
 import logging
 from .manager import manager
 from .job import job
+from .barrier import barrier
+from .holds import HoldPolicy
 from .quick_job import quick_job
+from .utils import make_dirs
 from .schedd_wrapper import kerberos_auth
 import os
 import argparse
 import re
+from typing import Iterator, Optional
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s (%(name)s): %(message)s")
 log = logging.getLogger('falconry')
@@ -68,9 +72,51 @@ def config() -> argparse.ArgumentParser:
         default=1,
         help='Number of cpus to request. Default is 1',
     )
+    parser.add_argument(
+        '--compress-save',
+        action='store_true',
+        help='Save the state of jobs compressed, useful for very large number of jobs',
+    )
+    parser.add_argument(
+        '--runtime-db',
+        default=None,
+        help='Record timing and resources of finished jobs in this database, '
+        'can be shared by many runs (e.g. ~/.falconry/runtimes.db)',
+    )
+    parser.add_argument(
+        '--auto-size',
+        action='store_true',
+        help='Set memory, disk and time requests from previous runs in the runtime '
+        'database and raise requests of jobs held for exceeding them',
+    )
+    parser.add_argument(
+        '--hold-policy',
+        action='store_true',
+        help='Handle held jobs: raise exceeded requests, release jobs held for '
+        'transient problems with backoff and give up on the rest',
+    )
+    parser.add_argument(
+        '--speculative-copies',
+        type=int,
+        default=0,
+        help='Submit copies of jobs running much longer than their siblings, '
+        'at most this many at the same time. Default is 0 (disabled)',
+    )
+    parser.add_argument(
+        '--shards',
+        type=int,
+        default=0,
+        help='Levels of hashed prefix directories for job directories and logs, '
+        'useful for very large number of jobs. Default is 0 (flat layout)',
+    )
     return parser
 
 
+# symbols replaced by `_` in names of the jobs
+_nameTable = str.maketrans({c: '_' for c in ' ./-`()$"\'\\'})
+_jobPattern = re.compile(r'^\[([^$$]+)\]\s*(.*)$')
+
+
 def get_name(command: str) -> str:
     """Get name from command by replacing various symbols with `_`.
 
@@ -79,9 +125,7 @@ def get_name(command: str) -> str:
     Returns:
         str: name of the job for given command
     """
-    strings_to_replace = ['--', ' ', '.', '/', '-', '`', '(', ')', '$', '"', "'", "\\"]
-    for string in strings_to_replace:
-        command = command.replace(string, '_')
+    command = command.translate(_nameTable)
 
     # remove multiple _
     return '_'.join([x for x in command.split('_') if x != ''])
@@ -98,8 +142,7 @@ def parse_job(line: str) -> tuple[str, str]:
     Returns:
         tuple[str | None, str]: (name, command)
     """
-    pattern = r'^\[([^$$]+)\]\s*(.*)$'
-    match = re.match(pattern, line.strip())
+    match = _jobPattern.match(line.strip())
 
     if match:
         command = match.group(2)
@@ -114,21 +157,33 @@ def parse_job(line: str) -> tuple[str, str]:
 class Block:
     """Holds a block of commands and handles adding them to the manager.
 
-    This is important to handle dependencies between blocks
+    This is important to handle dependencies between blocks. Commands
+    depend on a single barrier of the previous block, which depends on
+    all commands of that block (N+M dependencies instead of N×M).
+
+    Arguments:
+        index (int, optional): index of the block, used to name
+            its barrier. Defaults to 0.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, index: int = 0) -> None:
+        self.index = index
         self.commands: dict[str, job] = {}
         self._lock: bool = False  # No more commands can be added
         self.dependencies: list[job] = []
+        self._barrier: Optional[barrier] = None
 
-    def add_command(self, command: str, mgr: manager, time: int, ncpu: int = 1) -> None:
+    def add_command(
+        self, command: str, mgr: manager, time: int, ncpu: int = 1, shards: int = 0
+    ) -> None:
         """Add command to block and manager.
 
         Args:
             command (str): command to add
             mgr (manager): HTCondor manager
             time (int): expected runtime
+            ncpu (int): number of cpus
+            shards (int): levels of prefix directories
         Raises:
             AttributeError: if block is locked
             AttributeError: if command is not valid
@@ -141,25 +196,58 @@ class Block:
         if name in self.commands:
             log.error(f'Block {name} already has command {self.commands[name]}')
             raise AttributeError
+        # jobs are added to the manager and their directories created
+        # at once when the block is locked
         self.commands[name] = quick_job(
-            name, command, mgr.schedd, mgr.dir + '/log', time, ncpu
+            name,
+            command,
+            mgr.schedd,
+            mgr.dir + '/log',
+            time,
+            ncpu,
+            shards,
+            makeDirs=False,
         )
-        mgr.add_job(self.commands[name])
-        log.info(f'Added command `{command}` to falconry under name `{name}`')
+        log.debug(f'Added command `{command}` to falconry under name `{name}`')
 
-    def lock(self) -> None:
-        """Lock block, no more commands can be added"""
+    def lock(self, mgr: manager) -> None:
+        """Lock block, no more commands can be added.
+        Adds all commands to the manager.
+
+        Args:
+            mgr (manager): HTCondor manager
+        """
         self._lock = True
+        make_dirs(d for j in self.commands.values() for d in j.dirs())
         for j in self.commands.values():
             j.add_job_dependency(*self.dependencies)
+        mgr.add_jobs(self.commands.values())
+
+    def get_barrier(self, mgr: manager) -> barrier:
+        """Returns barrier which is done once all commands
+        of the block are done, adds it to the manager when first called.
+
+        Args:
+            mgr (manager): HTCondor manager
+
+        Returns:
+            barrier: barrier of the block
+        """
+        if self._barrier is None:
+            self._barrier = barrier(f'<block {self.index}>', mgr.schedd)
+            self._barrier.add_job_dependency(*self.commands.values())
+            mgr.add_job(self._barrier)
+        return self._barrier
 
-    def add_dependency(self, dependency: 'Block') -> None:
-        """Add dependency between blocks, also locks current block.
+    def add_dependency(self, dependency: 'Block', mgr: manager) -> None:
+        """Add dependency between blocks, through the barrier
+        of the other block.
 
         Args:
             dependency (Block): block to add as dependency
+            mgr (manager): HTCondor manager
         """
-        self.dependencies.extend(dependency.commands.values())
+        self.dependencies.append(dependency.get_barrier(mgr))
 
     @property
     def empty(self) -> bool:
@@ -167,22 +255,38 @@ class Block:
         return len(self.commands) == 0
 
 
-def process_commands(commands: str, mgr: manager, time: int, ncpu: int = 1) -> None:
-    """Process commands and add them to the manager"""
+def _read_lines(commands: str) -> Iterator[str]:
+    """Yields lines of the command file, or commands of the command string
+
+    Arguments:
+        commands (str): path to the file or the commands
 
+    Yields:
+        str: line
+    """
     # First check if we are dealing with file
     if os.path.isfile(commands):
         log.info(f'Processing commands from file {commands}')
         with open(commands) as f:
-            lines = f.readlines()
+            yield from f
     else:
         log.info(f'Processing commands string `{commands}`')
-        lines = commands.split(';')
-    log.debug(lines)
+        yield from commands.split(';')
+
+
+def process_commands(
+    commands: str, mgr: manager, time: int, ncpu: int = 1, shards: int = 0
+) -> None:
+    """Process commands and add them to the manager.
+
+    The command file is read line by line, jobs are added to the manager
+    block by block.
+    """
 
     previous_block = None
     current_block = Block()
-    for line in lines:
+    nCommands = 0
+    for line in _read_lines(commands):
         line = line.strip()
         if line.startswith('#'):
             continue
@@ -190,28 +294,35 @@ def process_commands(commands: str, mgr: manager, time: int, ncpu: int = 1) -> N
             if current_block.empty:
                 continue
             previous_block = current_block
-            previous_block.lock()
-            current_block = Block()
+            previous_block.lock(mgr)
+            current_block = Block(previous_block.index + 1)
             # Automatically depends on the previous block
-            current_block.add_dependency(previous_block)
+            current_block.add_dependency(previous_block, mgr)
             continue
-        command = line.strip()
         # remove extra spaces
-        command = ' '.join(command.split())
+        command = ' '.join(line.split())
 
-        current_block.add_command(command, mgr, time, ncpu)
-    current_block.lock()
+        current_block.add_command(command, mgr, time, ncpu, shards)
+        nCommands += 1
+    current_block.lock(mgr)
+    log.info(f'Added {nCommands} commands in {current_block.index + 1} blocks')
 
 
 def main() -> None:
     """Main function for `falconry`"""
 
+    # parse arguments first so that e.g. `--help` does not touch the credd
+    cfg = config().parse_args()
     kerberos_auth()
     log.info('Setting up `falconry` to run your commands')
-    cfg = config().parse_args()
     condor_dir = os.path.join(cfg.dir, cfg.subdir)
     mgr = manager(
-        condor_dir
+        condor_dir,
+        compressSave=cfg.compress_save,
+        runtimeDB=cfg.runtime_db,
+        autoSize=cfg.auto_size,
+        holdPolicy=HoldPolicy() if cfg.hold_policy else None,
+        speculativeCopies=cfg.speculative_copies,
     )  # the argument specifies where the job is saved
 
     if cfg.verbose:
@@ -235,7 +346,7 @@ def main() -> None:
     if load:
         mgr.load(cfg.retry_failed)
     else:
-        process_commands(cfg.commands, mgr, cfg.set_time, cfg.ncpu)
+        process_commands(cfg.commands, mgr, cfg.set_time, cfg.ncpu, cfg.shards)
     if cfg.dry:
         return
     # start the manager
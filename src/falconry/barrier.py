@@ -0,0 +1,60 @@
+import logging
+from typing import Any, Dict
+
+from .job import job
+from .status import FalconryStatus
+
+log = logging.getLogger('falconry')
+
+
+class barrier(job):
+    """Group node which is never submitted to HTCondor, it is done once
+    all its dependencies are done (and skipped if any of them failed).
+
+    Jobs depending on all jobs of a group can depend on the barrier
+    instead, so that the number of dependencies is N+M instead of N×M:
+
+    .. code-block:: python
+
+        from falconry import barrier
+        b = barrier("stage1", schedd)
+        b.add_job_dependency(*stage1Jobs)
+        mgr.add_job(b)
+        for j in stage2Jobs:
+            j.add_job_dependency(b)
+
+    Arguments:
+        name (str): name of the barrier
+        schedd (ScheddWrapper): HTCondor schedd wrapper, not used
+    """
+
+    @property
+    def size(self) -> int:
+        """Barrier does not represent any condor job"""
+        return 0
+
+    def save(self) -> Dict[str, Any]:
+        """Returns a dictionary containing all relevant information
+        about the barrier to be saved to a file.
+
+        Returns:
+            Dict[str, Any]: dictionary containing barrier information
+        """
+        jobDict = super().save()
+        jobDict["type"] = "barrier"
+        return jobDict
+
+    def submit(self, force: bool = False, doNotSubmit: bool = False) -> None:
+        """Marks the barrier as done, nothing is submitted.
+        Should be only called once all dependencies are done.
+
+        Arguments:
+            force (bool, optional): ignored. Defaults to False.
+            doNotSubmit (bool, optional): does nothing if set. Defaults to False.
+        """
+        if doNotSubmit:
+            return
+        log.debug("Barrier %s passed", self.name)
+        self.submitted = True
+        self.done = True
+        self.lastStatus = FalconryStatus.COMPLETE
@@ -0,0 +1,66 @@
+from typing import Dict, Iterable, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .job import job
+
+
+def expected_runtime(j: "job") -> float:
+    """Returns expected runtime of the job in seconds, from `+MaxRuntime`
+    (or `+RequestRuntime`) of its configuration. Jobs without it count
+    as 1 s, barriers as 0 s.
+
+    Arguments:
+        j (job): job
+
+    Returns:
+        float: expected runtime
+    """
+    if j.size == 0:
+        return 0.0
+    runtime = j.config.get("+MaxRuntime", j.config.get("+RequestRuntime"))
+    try:
+        return float(runtime) if runtime is not None else 1.0
+    except ValueError:  # e.g. a condor expression
+        return 1.0
+
+
+def critical_path(jobs: Iterable["job"]) -> Dict[str, float]:
+    """Returns length of the critical path of each job, i.e. expected
+    runtime of the job and of the longest chain of jobs which depend on it.
+
+    Without runtimes in the configuration, this is the number of jobs
+    in the longest chain starting with the job.
+
+    Arguments:
+        jobs (Iterable[job]): all jobs
+
+    Returns:
+        Dict[str, float]: job name to the length of its critical path
+    """
+    jobs = list(jobs)
+    dependents: Dict[str, List["job"]] = {}
+    for j in jobs:
+        for dep in j.dependencies:
+            dependents.setdefault(dep.name, []).append(j)
+
+    length: Dict[str, float] = {}
+    # iterative depth-first search, dependency chains can be long
+    visiting: set[str] = set()
+    for root in jobs:
+        stack: List[Tuple["job", bool]] = [(root, False)]
+        while len(stack) > 0:
+            j, expanded = stack.pop()
+            if j.name in length:
+                continue
+            children = dependents.get(j.name, [])
+            if expanded:
+                length[j.name] = expected_runtime(j) + max(
+                    (length.get(c.name, 0.0) for c in children), default=0.0
+                )
+                continue
+            if j.name in visiting:  # dependency cycle
+                continue
+            visiting.add(j.name)
+            stack.append((j, True))
+            stack.extend((c, False) for c in children if c.name not in length)
+    return length
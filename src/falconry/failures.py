@@ -0,0 +1,91 @@
+import re
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from .pack import LogPacker
+from .status import FalconryStatus
+from .utils import tail_files
+
+if TYPE_CHECKING:
+    from .job import job
+
+# Variable tokens replaced when computing signature, order matters
+# (e.g. numbers in paths are part of the path)
+_patterns = [
+    (re.compile(r'(?:[\w.\-+@~]*/[\w.\-+@~]+)+/?'), '<path>'),
+    (re.compile(r'\b(?:[a-zA-Z0-9-]+\.){2,}[a-zA-Z]{2,}\b'), '<host>'),
+    (re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b'), '<ip>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<hex>'),
+    (re.compile(r'\b[0-9a-fA-F]{8,}\b'), '<hex>'),
+    (re.compile(r'\d+'), '<n>'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def normalise(text: str) -> str:
+    """Replaces variable tokens (paths, hostnames, numbers, ...)
+    so that the same error from different jobs gives the same text.
+
+    Arguments:
+        text (str): text to normalise
+
+    Returns:
+        str: normalised text
+    """
+    for pattern, replacement in _patterns:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def signature(
+    exitCode: Optional[int], tail: str, status: Optional[FalconryStatus] = None
+) -> str:
+    """Returns failure signature from the exit code (or the status of the job
+    if it did not terminate, e.g. removed or given up on while held)
+    and the last non-empty line of the error file.
+
+    Arguments:
+        exitCode (Optional[int]): exit code of the job, `None` if unknown
+        tail (str): last lines of the error file
+        status (Optional[FalconryStatus], optional): status of the job.
+            Defaults to None (unknown).
+
+    Returns:
+        str: signature
+    """
+    lines = [line for line in tail.splitlines() if line.strip() != '']
+    last = normalise(lines[-1]) if len(lines) > 0 else '<empty>'
+    if exitCode is not None:
+        code = f'exit {exitCode}'
+    elif status is not None:
+        code = status.name.lower().replace('_', ' ')
+    else:
+        code = 'unknown'
+    return f'{code}: {last}'
+
+
+def cluster_failures(
+    jobs: List["job"],
+    lines: int = 10,
+    packer: Optional[LogPacker] = None,
+    workers: int = 16,
+) -> Dict[str, List["job"]]:
+    """Groups jobs by their failure signature. Error files are read
+    concurrently.
+
+    Arguments:
+        jobs (List[job]): failed jobs
+        lines (int, optional): number of lines of the error file to read.
+            Defaults to 10.
+        packer (Optional[LogPacker], optional): packer to read the error files
+            from if they were already packed. Defaults to None.
+        workers (int, optional): number of reading threads. Defaults to 16.
+
+    Returns:
+        Dict[str, List[job]]: signature to jobs, largest groups first
+    """
+    tails = tail_files([j.errFile for j in jobs], lines, packer, workers)
+    groups: Dict[str, List["job"]] = {}
+    for j in jobs:
+        key = signature(j.exitCode, tails[j.errFile], j.lastStatus)
+        groups.setdefault(key, []).append(j)
+    return dict(sorted(groups.items(), key=lambda item: -len(item[1])))
@@ -0,0 +1,158 @@
+import re
+import logging
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+
+from .sizing import exceeded_resource
+
+log = logging.getLogger('falconry')
+
+# HoldReasonCode of holds which are never touched: held by the user,
+# submitted on hold and spooling of the input files
+IGNORED_CODES = frozenset([1, 15, 16])
+# HoldReasonCode of holds which are usually transient (failed to create
+# the process, to open input/output, to transfer files, missing iwd)
+TRANSIENT_CODES = frozenset([6, 7, 8, 9, 10, 12, 13, 14])
+
+
+class HoldAction(Enum):
+    RELEASE = "release"  # release the job as it is
+    BUMP = "bump"  # raise the exceeded request and release
+    RESUBMIT = "resubmit"  # remove the job and submit it again
+    GIVE_UP = "give up"  # remove the job, it is failed
+
+
+class HoldRule:
+    """Rule of the hold policy, matching held jobs by their HoldReasonCode
+    and HoldReason.
+
+    Arguments:
+        action (HoldAction): action applied to the matching jobs
+        codes (Optional[Iterable[int]], optional): matching HoldReasonCode,
+            defaults to None (any code)
+        reason (Optional[str], optional): regular expression searched
+            in HoldReason (case insensitive), defaults to None (any reason)
+        maxAttempts (int, optional): the rule does not match jobs which were
+            already acted upon this many times (see `job.holdAttempts`).
+            Defaults to 3, -1 for no limit.
+        backoff (float, optional): time in seconds the job has to be held
+            before the action, doubled with each attempt. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        action: HoldAction,
+        codes: Optional[Iterable[int]] = None,
+        reason: Optional[str] = None,
+        maxAttempts: int = 3,
+        backoff: float = 0,
+    ) -> None:
+        self.action = action
+        self.codes = frozenset(codes) if codes is not None else None
+        self.reason = re.compile(reason, re.IGNORECASE) if reason is not None else None
+        self.maxAttempts = maxAttempts
+        self.backoff = backoff
+
+    def matches(self, code: int, reason: str, attempts: int) -> bool:
+        """Returns True if the rule applies to the held job
+
+        Arguments:
+            code (int): HoldReasonCode of the job
+            reason (str): HoldReason of the job
+            attempts (int): number of actions already applied to the job
+
+        Returns:
+            bool: True if the rule applies
+        """
+        if self.maxAttempts != -1 and attempts >= self.maxAttempts:
+            return False
+        if self.codes is not None and code not in self.codes:
+            return False
+        if self.reason is not None and self.reason.search(reason) is None:
+            return False
+        # only jobs which exceeded a request can get a larger one
+        if self.action is HoldAction.BUMP:
+            return exceeded_resource(code, reason) is not None
+        return True
+
+    def delay(self, attempts: int) -> float:
+        """Returns time the job has to be held before the action
+
+        Arguments:
+            attempts (int): number of actions already applied to the job
+
+        Returns:
+            float: time in seconds
+        """
+        return self.backoff * 2**attempts
+
+
+class HoldPolicy:
+    """Decides what happens to held jobs, the first matching rule
+    (see `HoldRule`) is applied. Jobs which match no rule stay held.
+    Jobs held by the user (or submitted on hold) are never touched.
+
+    The default rules raise the exceeded request of jobs held for
+    exceeding their memory, disk or runtime, release jobs held
+    for transient problems (e.g. failed file transfer) after 5 minutes
+    (10, 20 minutes for the next attempts) and give up the rest:
+
+    .. code-block:: python
+
+        from falconry.holds import HoldPolicy, HoldRule, HoldAction
+        policy = HoldPolicy(
+            [HoldRule(HoldAction.RESUBMIT, reason="cvmfs")] + HoldPolicy.default_rules()
+        )
+        mgr = manager(mgrDir, holdPolicy=policy)
+
+    Arguments:
+        rules (Optional[List[HoldRule]], optional): rules in the order
+            of precedence. Defaults to `default_rules`.
+    """
+
+    def __init__(self, rules: Optional[List[HoldRule]] = None) -> None:
+        self.rules = rules if rules is not None else HoldPolicy.default_rules()
+
+    @staticmethod
+    def default_rules() -> List[HoldRule]:
+        """Returns the default rules"""
+        return [
+            HoldRule(HoldAction.BUMP),
+            HoldRule(HoldAction.RELEASE, codes=TRANSIENT_CODES, backoff=300),
+            HoldRule(HoldAction.GIVE_UP, maxAttempts=-1),
+        ]
+
+    def decide(
+        self,
+        ad: Dict[str, Any],
+        attempts: int,
+        now: float,
+        exclude: Iterable[HoldAction] = (),
+    ) -> Optional[HoldAction]:
+        """Returns action for the held job, `None` if the job
+        should stay held (no rule matches or the backoff did not pass)
+
+        Arguments:
+            ad (Dict[str, Any]): queue ad of the job with `HoldReasonCode`,
+                `HoldReason` and `EnteredCurrentStatus`
+            attempts (int): number of actions already applied to the job
+            now (float): current time
+            exclude (Iterable[HoldAction], optional): actions whose rules
+                are skipped, e.g. bump which failed. Defaults to none.
+
+        Returns:
+            Optional[HoldAction]: action
+        """
+        code = ad.get("HoldReasonCode") or 0
+        reason = ad.get("HoldReason") or ""
+        if code in IGNORED_CODES:
+            return None
+        for rule in self.rules:
+            if rule.action in exclude or not rule.matches(code, reason, attempts):
+                continue
+            heldSince = ad.get("EnteredCurrentStatus") or 0
+            if now - heldSince < rule.delay(attempts):
+                log.debug(f"Waiting before {rule.action.value} of a held job")
+                return None
+            return rule.action
+        return None
@@ -1,17 +1,209 @@
-import htcondor2 as htcondor
 import os
 import logging
-import glob
-from copy import copy
+import re
 import time
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
-from .status import FalconryStatus
+from .status import FalconryStatus, StatusIndex
 from .schedd_wrapper import ScheddWrapper
+from .utils import make_dirs, read_submit_time, shard_prefix
 
 log = logging.getLogger('falconry')
 
+_idPattern = re.compile(r'^[0-9]+\.[0-9]+$')
+# code of an event in the condor log, e.g. `001 (123.000.000) ...`
+_eventCode = re.compile(rb'^([0-9]{3}) \(', re.MULTILINE)
+# each event in the condor log ends with a line with `...`
+_eventEnd = b"\n...\n"
+
+
+def id_key(jobID: str) -> Tuple[int, ...]:
+    """Returns key to sort job IDs numerically (`"9.0"` before `"10.0"`)
+
+    Arguments:
+        jobID (str): job ID
+
+    Returns:
+        Tuple[int, ...]: cluster and proc ID
+    """
+    return tuple(int(x) for x in jobID.split("."))
+
+
+def scan_ids(directory: str) -> set[str]:
+    """Returns IDs of all jobs with a file (`$(JobId).log/out/err`)
+    in the directory, using a single directory scan.
+
+    Arguments:
+        directory (str): directory to scan
+
+    Returns:
+        set[str]: job IDs, empty if the directory does not exist
+    """
+    ids = set()
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                stem, ext = os.path.splitext(entry.name)
+                if ext in (".log", ".out", ".err") and _idPattern.match(stem):
+                    ids.add(stem)
+    except FileNotFoundError:
+        pass
+    return ids
+
+
+def parse_log(search: str) -> Tuple[int, Optional[int]]:
+    """Evaluates content of a condor log file of a single job
+
+    Arguments:
+        search (str): content of the log file
+
+    Returns:
+        Tuple[int, Optional[int]]: status (value of `FalconryStatus`,
+            0 if unknown, negative exit code if the job failed)
+            and exit code of the job if it terminated
+    """
+    # User abortion is special case
+    if "Job was aborted by the user" in search:
+        # I think this is the same as 3 but need to check
+        return 12, None
+
+    # Sometimes `removed` is not properly saved
+    # (probably when continuing after long time?)
+    # so here alternative way
+    if "SYSTEM_PERIODIC_REMOVE" in search or "Job was aborted" in search:
+        return 3, None
+
+    # Otherwise check `"Job terminated"`. If the log does not contain it
+    # its unknown state
+    if "Job terminated" not in search:
+        return 0, None
+
+    # Evaluate `"Job terminated"`
+    for line in search.split("\n"):
+        if "Normal termination (return value" in line:
+            line = line.rstrip()  # remove '\n' at end of line
+            status = int(line.split("value")[1].strip()[:-1])
+            if status == 0:
+                return 4, status  # success
+            # Positive  values reserved for falconry states,
+            # so return as negative
+            return -status, status
+    return 11, None  # no "Normal termination for Job terminated"
+
+
+def read_log_state(
+    logFile: str, state: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Evaluates a condor log file of a single job incrementally.
+    Condor only appends to the log, so only the part after the last
+    complete event parsed before is read, and nothing at all
+    if the size and modification time of the file did not change
+    or if the job already terminated.
+
+    Arguments:
+        logFile (str): path to the log file
+        state (Optional[Dict[str, Any]], optional): state returned
+            by the previous call for the same file. Defaults to None,
+            in which case the whole file is read.
+
+    Returns:
+        Optional[Dict[str, Any]]: `status` (see `parse_log`), code of the
+            last `event`, `offset` of the end of the last complete event
+            and `size` and `mtime` (ns) of the file, `None` if the file
+            does not exist
+    """
+    # parsed only from complete events, nothing follows termination
+    # or abortion of the job, so the file may not even exist anymore
+    # (e.g. packed, see `pack.LogPacker`)
+    if state is not None and state["status"] != 0:
+        return state
+    try:
+        stat = os.stat(logFile)
+    except FileNotFoundError:
+        return None
+    size, mtime = stat.st_size, stat.st_mtime_ns
+    if state is not None and state["size"] == size and state["mtime"] == mtime:
+        return state
+    # smaller file than already parsed was written anew
+    if state is None or size < state["offset"]:
+        state = {"offset": 0, "event": None, "status": 0}
+
+    try:
+        with open(logFile, "rb") as fl:
+            fl.seek(state["offset"])
+            chunk = fl.read()
+    except FileNotFoundError:
+        return None
+    # incomplete event at the end is not parsed and is read again next time,
+    # e.g. termination without the return value written yet
+    end = chunk.rfind(_eventEnd)
+    complete = chunk[: end + len(_eventEnd)] if end >= 0 else b""
+    status, _ = parse_log(complete.decode(errors="replace"))
+    events = _eventCode.findall(complete)
+    return {
+        "offset": state["offset"] + len(complete),
+        "event": events[-1].decode() if len(events) > 0 else state["event"],
+        "status": status,
+        "size": size,
+        "mtime": mtime,
+    }
+
+
+def id_constraint(ids: Iterable[str]) -> str:
+    """Returns HTCondor constraint selecting jobs with given IDs
+
+    Arguments:
+        ids (Iterable[str]): job IDs
+
+    Returns:
+        str: constraint
+    """
+    idList = ", ".join(f'"{jid}"' for jid in ids)
+    return f'member(strcat(ClusterId, ".", ProcId), {{{idList}}})'
+
+
+def query_status_bulk(schedd: ScheddWrapper, ids: Iterable[str]) -> Dict[str, int]:
+    """Returns condor `JobStatus` of all given job IDs, using a single
+    query and a single history query bounded by the number of jobs
+    not found in the queue.
+
+    Arguments:
+        schedd (ScheddWrapper): HTCondor schedd wrapper
+        ids (Iterable[str]): job IDs to query
+
+    Returns:
+        Dict[str, int]: job ID to condor status, missing if unknown
+    """
+
+    projection = ["ClusterId", "ProcId", "JobStatus"]
+    idSet = set(ids)
+    result: Dict[str, int] = {}
+    if len(idSet) == 0:
+        return result
+
+    for ad in schedd.query(
+        constraint=id_constraint(sorted(idSet)), projection=projection
+    ):
+        jid = f"{ad['ClusterId']}.{ad['ProcId']}"
+        if jid in idSet:
+            result[jid] = ad["JobStatus"]
+
+    missing = idSet - result.keys()
+    if len(missing) == 0:
+        return result
+
+    log.debug("Querying history for %i jobs", len(missing))
+    for ad in schedd.history(
+        constraint=id_constraint(sorted(missing)),
+        projection=projection,
+        match=len(missing),
+    ):
+        jid = f"{ad['ClusterId']}.{ad['ProcId']}"
+        if jid in missing:
+            result[jid] = ad["JobStatus"]
+    return result
+
 
 class job:
     """Submits and holds a single job and all relevant information
@@ -36,6 +228,11 @@ class job:
         schedd (ScheddWrapper): HTCondor schedd wrapper
     """
 
+    # Create `$(JobId).log` symlinks to the log files in the job directory.
+    # Can be disabled (`job.logSymlinks = False`) to save filesystem
+    # operations for large number of jobs.
+    logSymlinks = True
+
     def __init__(self, name: str, schedd: ScheddWrapper) -> None:
 
         # first, define HTCondor schedd wrapper
@@ -48,6 +245,8 @@ class job:
         self.jobIDs: List[str] = []
         self.jobID: Optional[str] = None
         self.jobDir: Optional[str] = None
+        # levels of prefix directories of the job directory (see `set_simple`)
+        self.shards = 0
         # For sanity check that new ID is indeed newer
         # (in case we are deducing new ID from log files for example,
         #  and the jobIDs got reset for some reason)
@@ -59,23 +258,75 @@ class job:
         # configuration of the jobs
         self.config: Dict[str, str] = {}
 
+        # IDs of other copies of the job still in the queue, submitted
+        # by the speculative execution of stragglers (see `switch_to`)
+        self.racing: List[str] = []
+
+        # number of times the hold policy acted upon the job, kept
+        # for the whole lifetime of the job (see `holds.HoldPolicy`)
+        self.holdAttempts = 0
+
+        # parsed part of the log file of the current ID (see `read_log_state`),
+        # cleared by `reset` as each ID has its own log file
+        self.logState: Optional[Dict[str, Any]] = None
+
         # to setup initial state (done/submitted and so on)
         self.reset()
 
+        # index of the manager, updated when the status changes
+        self.statusIndex: Optional[StatusIndex] = None
+
         # keep track of last status to avoid calling get_status too often
-        self.lastStatus: FalconryStatus = FalconryStatus.UNKNOWN
+        self.lastStatus = FalconryStatus.UNKNOWN
+
+    @property
+    def lastStatus(self) -> FalconryStatus:
+        """Last known status of the job"""
+        return self._lastStatus
+
+    @lastStatus.setter
+    def lastStatus(self, status: FalconryStatus) -> None:
+        self._lastStatus = status
+        if self.statusIndex is not None:
+            self.statusIndex.update(self.name, status)
+            # valid until the end of the check cycle of the manager
+            if self.statusIndex.cycle is not None:
+                self._statusCycle = self.statusIndex.cycle
+
+    @property
+    def size(self) -> int:
+        """Number of condor jobs represented by the job (see `job_array`)"""
+        return 1
 
-    def set_simple(self, exe: str, logPath: str) -> None:
+    def set_simple(
+        self, exe: str, logPath: str, shards: int = 0, makeDirs: bool = True
+    ) -> None:
         """Sets up a simple job with only executable and a path to log files
 
+        By default, all job directories and all condor log files are
+        in a single directory. For large number of jobs, `shards` levels
+        of hashed prefix directories can be used instead
+        (`<logPath>/3f/a1/<name>`).
+
+        Condor logs are split only into 16 buckets (`<logPath>/logs/3/`).
+        Jobs with different log paths cannot be submitted in one cluster,
+        so each bucket means a separate submission in each cycle. Finer
+        buckets would mean up to 256 submissions per cycle.
+
         Arguments:
             exe (str): path to the executable
             logPath (str): path to the log files
+            shards (int, optional): levels of prefix directories. Defaults to 0.
+            makeDirs (bool, optional): create the directories. Can be disabled
+                to create directories of many jobs at once (see `dirs`
+                and `utils.make_dirs`). Defaults to True.
         """
         # Extend the log path
         logPathBase = os.path.abspath(logPath)
-        logDir = os.path.join(logPathBase, "logs")
-        self.jobDir = os.path.join(logPathBase, self.name)
+        prefix = shard_prefix(self.name, shards)
+        logDir = os.path.join(logPathBase, "logs", *[p[0] for p in prefix[:1]])
+        self.jobDir = os.path.join(logPathBase, *prefix, self.name)
+        self.shards = shards
 
         # htcondor defines job as a dict
         cfg = {
@@ -83,19 +334,30 @@ class job:
             "log": os.path.join(logDir, "$(JobId).log"),
             "output": os.path.join(self.jobDir, "$(JobId).out"),
             "error": os.path.join(self.jobDir, "$(JobId).err"),
+            # name in the submit event of the log, to match logs to jobs
+            "submit_event_notes": self.name,
         }
         self.config = cfg
 
         # create the directory for the log
-        if not os.path.exists(logDir):
-            os.makedirs(logDir, exist_ok=True)
-
-        if not os.path.exists(self.jobDir):
-            os.makedirs(self.jobDir, exist_ok=True)
+        if makeDirs:
+            make_dirs(self.dirs())
 
         # setup flags:
         self.reset()
 
+    def dirs(self) -> List[str]:
+        """Returns directories which have to exist before submission
+        (condor log directory and the job directory)
+
+        Returns:
+            List[str]: list of directories
+        """
+        dirs = [os.path.dirname(self.config["log"])] if "log" in self.config else []
+        if self.jobDir is not None:
+            dirs.append(self.jobDir)
+        return dirs
+
     def save(self) -> Dict[str, Any]:
         """Returns a dictionary containing all relevant job information
         to be saved to a file.
@@ -105,12 +367,14 @@ class job:
         """
         # first rewrite dependencies using names
         depNames = [j.name for j in self.dependencies]
+        # copies, so that the result can be written in the background
         jobDict = {
-            "jobIDs": self.jobIDs,
+            "jobIDs": list(self.jobIDs),
             "jobDir": self.jobDir,
             "jobTimeStamp": self.jobTimeStamp,
-            "config": self.config,
+            "config": dict(self.config),
             "depNames": depNames,
+            "shards": self.shards,
             "done": "false",
         }
         # to test if job is done takes long time
@@ -118,6 +382,16 @@ class job:
         # so its best to save this status
         if self.done:
             jobDict["done"] = "true"
+        # only saved if set, most jobs are never held
+        if self.holdAttempts > 0:
+            jobDict["holdAttempts"] = self.holdAttempts
+        if self.gaveUp:
+            jobDict["gaveUp"] = True
+        if len(self.racing) > 0:
+            jobDict["racing"] = list(self.racing)
+        # so that the log does not have to be read again after loading
+        if self.logState is not None:
+            jobDict["logState"] = dict(self.logState)
         return jobDict
 
     def load(self, jobDict: Dict[str, Any]) -> None:
@@ -146,6 +420,12 @@ class job:
         self.jobIDs = jobDict["jobIDs"]
         self.jobDir = jobDict["jobDir"]
         self.jobTimeStamp = jobDict["jobTimeStamp"]
+        # layout is saved with the paths, so nothing needs to be scanned
+        self.shards = jobDict.get("shards", 0)
+        self.holdAttempts = jobDict.get("holdAttempts", 0)
+        self.gaveUp = jobDict.get("gaveUp", False)
+        self.racing = jobDict.get("racing", [])
+        self.logState = jobDict.get("logState")
 
         # if not empty, the job has been already submitted at least once
         if len(self.jobIDs) > 0:
@@ -160,6 +440,17 @@ class job:
         self.skipped = False
         self.failed = False
         self.done = False
+        # exit code of the job from the log file, if terminated
+        self.exitCode: Optional[int] = None
+        # removed by the hold policy, which gave up on the job
+        self.gaveUp = False
+        self.logState = None
+        self.invalidate_status()
+
+    def invalidate_status(self) -> None:
+        """Makes the next `get_status` evaluate the status again,
+        e.g. after the job was (re)submitted or its flags changed"""
+        self._statusCycle = -1
 
     def add_job_dependency(self, *args: "job") -> None:
         """Add dependencies to the job.
@@ -199,6 +490,8 @@ class job:
                 log.info("The job is %s, not submitting", status.name)
                 return
 
+        import htcondor2 as htcondor
+
         # the htcondor version of the configuration
         htjob = htcondor.Submit(self.config)  # type: ignore
 
@@ -209,50 +502,65 @@ class job:
         submit_result = self.schedd.submit(htjob)
         self.submit_done(f"{submit_result.cluster()}.0")
 
-    def find_id(self) -> None:
+    def find_id(
+        self,
+        candidates: Optional[Iterable[str]] = None,
+        timeStamps: Optional[Dict[str, Optional[int]]] = None,
+    ) -> None:
         """Finds the job ID based on the log file names
         and updates the job accordingly.
 
         Only used with remote mode to synchronize jobs
-        between the local and remote client.
+        between the local and remote client. For many jobs, use
+        `manager.find_ids` which scans the log directory only once.
+
+        Arguments:
+            candidates (Optional[Iterable[str]], optional): candidate IDs,
+                e.g. from a directory index. Defaults to None, in which case
+                the job directory is scanned.
+            timeStamps (Optional[Dict[str, Optional[int]]], optional):
+                submission times of the candidates, if already known.
+                Read from the log files otherwise. Defaults to None.
         """
-        # Find all log files
         if self.jobDir is None:
             raise RuntimeError(f'Job directory is not set for job {self.name}')
-        logFiles = glob.glob(os.path.join(self.jobDir, "*.log"))
-        logFiles.sort(reverse=True)
-        if len(logFiles) == 0:
-            return
-        for logFile in logFiles:
-            jobid = os.path.basename(logFile).strip(".log")
-            if jobid not in self.jobIDs:
-                # If job id is smaller then the last one,
-                # it can mean that the numbers got reset,
-                # best to check timestamp
-                if len(self.jobIDs) > 0 and jobid < self.jobIDs[-1]:
-                    tmp_copy = copy(self)
-                    tmp_copy.jobID = jobid
-                    # This can be quite slow if job is old
-                    # (history is much slower than query)
-                    # TODO: take from log files?
-                    timestamp = int(tmp_copy.get_info()["QDate"])
-                    if self.jobTimeStamp is not None and (
-                        timestamp == -999 or timestamp < self.jobTimeStamp
-                    ):
-                        continue
-                self.submit_done(jobid)
-
-    def submit_done(self, jobID: str) -> None:
+        if candidates is None:
+            candidates = scan_ids(self.jobDir)
+
+        # oldest first, so that the last ID is the latest one
+        for jobid in sorted(candidates, key=id_key):
+            if jobid in self.jobIDs:
+                continue
+            # If job id is smaller then the last one,
+            # it can mean that the numbers got reset,
+            # best to check timestamp. This is taken from
+            # the submit event in the log, not from (slow) history.
+            if timeStamps is not None and jobid in timeStamps:
+                timestamp = timeStamps[jobid]
+            else:
+                timestamp = read_submit_time(
+                    self.config["log"].replace("$(JobId)", jobid)
+                )
+            if len(self.jobIDs) > 0 and id_key(jobid) < id_key(self.jobIDs[-1]):
+                if self.jobTimeStamp is not None and (
+                    timestamp is None or timestamp < self.jobTimeStamp
+                ):
+                    continue
+            self.submit_done(jobid, timestamp)
+
+    def submit_done(self, jobID: str, timeStamp: Optional[int] = None) -> None:
         """Sets the job as submitted and updates job ID
 
         Arguments:
             jobID (str): job ID
+            timeStamp (Optional[int], optional): submission time, if known
+                (e.g. from the log file). Defaults to current time.
         """
         if jobID in self.jobIDs:
             log.debug(f'Job {self.name} has already been submitted with id {jobID}')
             return
         self.jobID = jobID
-        self.jobTimeStamp = int(time.time())
+        self.jobTimeStamp = int(time.time()) if timeStamp is None else timeStamp
         # Following would be more precise but it can get really slow
         # for old jobs - can this create issues?
         # int(self.get_info()["QDate"])
@@ -260,31 +568,59 @@ class job:
         log.info(f"Job {self.name}: found id {self.jobID}")
         log.debug(self.config)
         self.expand_files()
+        if job.logSymlinks:
+            self.link_log()
         # reset job properties
         self.reset()
         self.submitted = True
 
     def expand_files(self) -> None:
-        """Expands job files with cluster and job IDs"""
-
-        def update_symlink(source: str, dest: str) -> None:
-            if os.path.islink(dest):
-                os.remove(dest)
-            os.symlink(source, dest)
+        """Expands job files with cluster and job IDs.
 
+        Only computes the paths, the filesystem is not touched.
+        """
         if self.jobDir is None:
             raise RuntimeError('Job directory is not set for job %s' % self.name)
         if self.jobID is None:
             raise RuntimeError('Job ID is not set for job %s' % self.name)
 
-        self.logFile = os.path.join(self.jobDir, f"{self.jobID}.log")
-        logFile = self.config["log"].replace("$(JobId)", self.jobID)
-        update_symlink(logFile, self.logFile)
+        # the actual log file written by condor
+        self.logFile = self.config["log"].replace("$(JobId)", self.jobID)
 
         self.outFile = self.config["output"].replace("$(JobId)", self.jobID)
 
         self.errFile = self.config["error"].replace("$(JobId)", self.jobID)
 
+    def all_files(self) -> List[str]:
+        """Returns paths of all files of all submissions of the job
+        (log, output, error and the log symlink)
+
+        Returns:
+            List[str]: list of paths
+        """
+        files = []
+        for jobID in self.jobIDs:
+            for key in ["log", "output", "error"]:
+                files.append(self.config[key].replace("$(JobId)", jobID))
+            if self.jobDir is not None:
+                files.append(os.path.join(self.jobDir, f"{jobID}.log"))
+        return files
+
+    def link_log(self) -> None:
+        """Creates a symlink `$(JobId).log` in the job directory pointing
+        to the log file, so that all files of the job are in one place.
+
+        Only done once per job ID (in `submit_done`), not when loading.
+        """
+        if self.jobDir is None or self.jobID is None:
+            return
+        link = os.path.join(self.jobDir, f"{self.jobID}.log")
+        try:
+            os.symlink(self.logFile, link)
+        except FileExistsError:
+            os.remove(link)
+            os.symlink(self.logFile, link)
+
     @property
     def clusterId(self) -> str:
         """Returns cluster ID"""
@@ -304,6 +640,8 @@ class job:
 
     def release(self) -> bool:
         """Releases held job"""
+        import htcondor2 as htcondor
+
         if self.jobID is None:
             return False
         self.schedd.act(
@@ -314,12 +652,51 @@ class job:
 
     def remove(self) -> bool:
         """Removes the job from HTCondor"""
+        import htcondor2 as htcondor
+
         if self.jobID is None:
             return False
         self.schedd.act(htcondor.JobAction.Remove, self.act_constraints)  # type: ignore
         log.info("Removing job %s with id %s", self.name, self.jobID)
         return True
 
+    def held_ids(self) -> List[str]:
+        """Returns IDs of the condor jobs of the job which are held,
+        as last evaluated
+
+        Returns:
+            List[str]: job IDs
+        """
+        if self.jobID is None or self.lastStatus is not FalconryStatus.HELD:
+            return []
+        return [self.jobID]
+
+    def switch_to(self, jobID: str) -> None:
+        """Makes another copy of the job (see `racing`) the current one,
+        e.g. because it finished first. The ID is moved to the end
+        of `jobIDs`, so that it stays the current one after loading.
+
+        Arguments:
+            jobID (str): ID of the copy
+        """
+        self.racing.remove(jobID)
+        self.jobIDs.remove(jobID)
+        self.jobIDs.append(jobID)
+        self.jobID = jobID
+        self.expand_files()
+        self.reset()
+        self.submitted = True
+
+    def removed_held(self, jobIDs: List[str], giveUp: bool) -> None:
+        """Updates the job after its held condor jobs were removed
+        by the hold policy (see `manager._handle_held`).
+
+        Arguments:
+            jobIDs (List[str]): IDs of the removed condor jobs
+            giveUp (bool): the job is not resubmitted and is failed
+        """
+        self.gaveUp = giveUp
+
     def get_info(self) -> Dict[str, Any]:
         """Returns information about the job
 
@@ -367,9 +744,19 @@ class job:
         """Updates status of the job and returns it.
         Status is defined in status.py
 
+        Within a single check cycle of the manager (see
+        `StatusIndex.check_cycle`), the status is evaluated only once,
+        unless invalidated (see `invalidate_status`).
+
         Returns:
             int: status of the job
         """
+        if (
+            self.statusIndex is not None
+            and self.statusIndex.cycle is not None
+            and self._statusCycle == self.statusIndex.cycle
+        ):
+            return self.lastStatus
         self.lastStatus = self._get_status()
         return self.lastStatus
 
@@ -379,6 +766,27 @@ class job:
         Returns:
             int: status of the job
         """
+        status = self._get_status_local()
+        if status is not None:
+            return status
+
+        return self._status_from_condor(self._get_status_condor())
+
+    def _get_status_local(
+        self, logExists: Optional[bool] = None
+    ) -> Optional[FalconryStatus]:
+        """Returns status of the job which can be determined without
+        asking condor, i.e. from the job flags and the log file.
+
+        Arguments:
+            logExists (Optional[bool], optional): whether the log file exists,
+                if already known (e.g. from a directory scan). Defaults to None,
+                in which case it is checked on the filesystem.
+
+        Returns:
+            Optional[FalconryStatus]: status of the job,
+                `None` if condor has to be asked
+        """
 
         # First check if the job is skipped or not even submitted
         if self.skipped:
@@ -387,8 +795,13 @@ class job:
             return FalconryStatus.COMPLETE
         elif self.jobID is None:  # job was not even submitted
             return FalconryStatus.NOT_SUBMITTED
-        # Using exists here is crucial, it returns false for broken symlinks
-        elif not os.path.exists(self.logFile):
+        elif self.gaveUp:
+            self.failed = True
+            return FalconryStatus.FAILED
+
+        # If not known, missing log is found when reading it,
+        # log of a terminated job is not needed (see `read_log_state`)
+        if logExists is False and (self.logState is None or self.logState["status"] == 0):
             return FalconryStatus.LOG_FILE_MISSING
 
         status_log = self._get_status_log()
@@ -397,7 +810,18 @@ class job:
                 return FalconryStatus.FAILED
             return FalconryStatus(status_log)
 
-        cndr_status = self._get_status_condor()
+        return None
+
+    def _status_from_condor(self, cndr_status: int) -> FalconryStatus:
+        """Converts condor `JobStatus` to status of the job,
+        for jobs whose status could not be determined from the log file.
+
+        Arguments:
+            cndr_status (int): condor job status, -999 if unknown
+
+        Returns:
+            FalconryStatus: status of the job
+        """
         # If job is incomplete, simply return the status:
         if cndr_status != 4 and cndr_status != -999:
             return FalconryStatus(cndr_status)
@@ -414,48 +838,27 @@ class job:
         return self.get_info()["JobStatus"]
 
     def _get_status_log(self) -> int:
-        """Gets status from the log file
+        """Gets status from the log file, reading only its part
+        which was not parsed yet (see `read_log_state`)
 
         Returns:
             int: status of the job
         """
         # Check log file to determine if job finished with an error
-        with open(self.logFile, 'r') as fl:
-            search = fl.read()
-
-        # User abortion is special case
-        if "Job was aborted by the user" in search:
-            # I think this is the same as 3 but need to check
-            return 12
-
-        # Sometimes `removed` is not properly saved
-        # (probably when continuing after long time?)
-        # so here alternative way
-        if "SYSTEM_PERIODIC_REMOVE" in search or "Job was aborted" in search:
-            return 3
-
-        # Otherwise check `"Job terminated"`. If the log does not contain it
-        # its unknown state
-        if "Job terminated" not in search:
-            return 0
-
-        # Evaluate `"Job terminated"`
-        searchSplit = search.split("\n")
-        for line in searchSplit:
-            if "Normal termination (return value" in line:
-                line = line.rstrip()  # remove '\n' at end of line
-                status = int(line.split("value")[1].strip()[:-1])
-
-                if status == 0:
-                    self.done = True
-                    return 4  # success
-
-                log.debug(f"Job failed {status}")
-                self.failed = True
-                # Positive  values reserved for falconry states,
-                # so return as negative
-                return -status
-        return 11  # no "Normal termination for Job terminated"
+        state = read_log_state(self.logFile, self.logState)
+        if state is None:
+            return 10  # log file missing
+        self.logState = state
+
+        status = state["status"]
+        if status == FalconryStatus.COMPLETE.value:
+            self.exitCode = 0
+            self.done = True
+        elif status < 0:  # negative exit code, see `parse_log`
+            self.exitCode = -status
+            log.debug(f"Job failed {self.exitCode}")
+            self.failed = True
+        return status
 
     def set_custom(self, config: Dict[str, str]) -> None:
         """Sets custom configuration for the job from a dictionary
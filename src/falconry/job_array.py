@@ -0,0 +1,327 @@
+import logging
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+from .job import job, id_constraint, parse_log, query_status_bulk
+from .schedd_wrapper import ScheddWrapper
+from .status import FalconryStatus
+
+log = logging.getLogger('falconry')
+
+# Item statuses which do not change until the item is resubmitted
+_settled = frozenset(
+    s.value
+    for s in [
+        FalconryStatus.COMPLETE,
+        FalconryStatus.FAILED,
+        FalconryStatus.REMOVED,
+        FalconryStatus.ABORTED_BY_USER,
+    ]
+)
+
+# Item statuses which are submitted again when the array is (re)submitted
+_toSubmit = frozenset(
+    s.value
+    for s in [
+        FalconryStatus.NOT_SUBMITTED,
+        FalconryStatus.LOG_FILE_MISSING,
+        FalconryStatus.FAILED,
+        FalconryStatus.REMOVED,
+        FalconryStatus.ABORTED_BY_USER,
+    ]
+)
+
+# Item statuses of items which are still in the queue
+_active = frozenset(
+    [
+        FalconryStatus.RUNNING,
+        FalconryStatus.IDLE,
+        FalconryStatus.HELD,
+        FalconryStatus.TRANSPORTING,
+        FalconryStatus.SUSPENDED,
+    ]
+)
+
+# Status of the whole array is the first status present among its items
+_aggregateOrder = [
+    FalconryStatus.RUNNING,
+    FalconryStatus.IDLE,
+    FalconryStatus.HELD,
+    FalconryStatus.TRANSPORTING,
+    FalconryStatus.SUSPENDED,
+    FalconryStatus.UNKNOWN,
+    FalconryStatus.ABNORMAL_TERMINATION,
+    FalconryStatus.FAILED,
+    FalconryStatus.REMOVED,
+    FalconryStatus.ABORTED_BY_USER,
+    FalconryStatus.LOG_FILE_MISSING,
+    FalconryStatus.NOT_SUBMITTED,
+]
+
+
+class job_array(job):
+    """Holds many jobs sharing a single template configuration,
+    submitted as a single cluster with one proc per item.
+
+    Each item is a dictionary of submit variables which can be used
+    in the template as `$(variable)`:
+
+    .. code-block:: python
+
+        from falconry import job_array
+        arr = job_array("scan", schedd, ({"mass": str(m)} for m in masses))
+        arr.set_simple("run.sh", "log")
+        arr.set_arguments("--mass $(mass)")
+        mgr.add_job(arr)
+
+    The array is a single job for the manager (dependencies, save file),
+    it is done once all items are complete. Status of the items is kept
+    in compact arrays, only failed items are resubmitted (as a new cluster).
+    Finding IDs from log files (`manager.find_ids`) is not supported.
+
+    Arguments:
+        name (str): name of the array for easy identification
+        schedd (ScheddWrapper): HTCondor schedd wrapper
+        items (Iterable[Dict[str, str]], optional): submit variables of each
+            item, can be a generator. Defaults to no items.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        schedd: ScheddWrapper,
+        items: Iterable[Dict[str, str]] = (),
+    ) -> None:
+        super().__init__(name, schedd)
+        self.items: List[Dict[str, str]] = list(items)
+        n = len(self.items)
+        # status of each item (value of `FalconryStatus`)
+        self.itemStatus = array('b', [FalconryStatus.NOT_SUBMITTED.value] * n)
+        # index in `jobIDs` of the cluster of each item, -1 if not submitted
+        self.itemCluster = array('i', [-1] * n)
+        # proc ID of each item within its cluster
+        self.itemProc = array('i', [-1] * n)
+
+    @property
+    def size(self) -> int:
+        """Number of items of the array"""
+        return len(self.items)
+
+    def item_id(self, i: int) -> Optional[str]:
+        """Returns condor job ID of the i-th item, `None` if not submitted
+
+        Arguments:
+            i (int): index of the item
+
+        Returns:
+            Optional[str]: job ID
+        """
+        if self.itemCluster[i] < 0:
+            return None
+        cluster = self.jobIDs[self.itemCluster[i]].split(".")[0]
+        return f"{cluster}.{self.itemProc[i]}"
+
+    def status_counts(self) -> Dict[FalconryStatus, int]:
+        """Returns number of items with each status, as last evaluated
+
+        Returns:
+            Dict[FalconryStatus, int]: status to number of items
+        """
+        if self.skipped:
+            return {FalconryStatus.SKIPPED: self.size}
+        counts: Dict[FalconryStatus, int] = {}
+        for value in self.itemStatus:
+            status = FalconryStatus(value)
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def save(self) -> Dict[str, Any]:
+        """Returns a dictionary containing all relevant information
+        about the array to be saved to a file.
+
+        Returns:
+            Dict[str, Any]: dictionary containing array information
+        """
+        jobDict = super().save()
+        jobDict["type"] = "array"
+        jobDict["items"] = list(self.items)
+        jobDict["itemStatus"] = self.itemStatus.tolist()
+        jobDict["itemCluster"] = self.itemCluster.tolist()
+        jobDict["itemProc"] = self.itemProc.tolist()
+        return jobDict
+
+    def load(self, jobDict: Dict[str, Any]) -> None:
+        """Loads the array from a dictionary created using the save function.
+
+        Arguments:
+            jobDict (Dict[str, Any]): dictionary containing array information
+        """
+        super().load(jobDict)
+        self.items = list(jobDict["items"])
+        self.itemStatus = array('b', jobDict["itemStatus"])
+        self.itemCluster = array('i', jobDict["itemCluster"])
+        self.itemProc = array('i', jobDict["itemProc"])
+
+    def submit(self, force: bool = False, doNotSubmit: bool = False) -> None:
+        """Submits all items which are not submitted yet or which failed,
+        as a single cluster.
+
+        Arguments:
+            force (bool, optional): force submission. Defaults to False.
+            doNotSubmit (bool, optional): does not submit, just checks
+                the configuration. Defaults to False.
+        """
+        if not force and self.jobIDs != []:
+            status = self.get_status()
+            if status not in [
+                FalconryStatus.ABORTED_BY_USER,
+                FalconryStatus.FAILED,
+                FalconryStatus.LOG_FILE_MISSING,
+            ]:
+                log.info("The array is %s, not submitting", status.name)
+                return
+            log.info("Array %s failed and will be resubmitted.", self.name)
+
+        import htcondor2 as htcondor
+
+        htjob = htcondor.Submit(self.config)  # type: ignore
+
+        if doNotSubmit:
+            return
+
+        pending = [i for i, s in enumerate(self.itemStatus) if s in _toSubmit]
+        if len(pending) == 0:
+            log.info("Array %s has no items to submit", self.name)
+            return
+
+        result = self.schedd.submit(
+            htjob, itemdata=iter([self.items[i] for i in pending])
+        )
+        self.submit_done(f"{result.cluster()}.0")
+        cluster = len(self.jobIDs) - 1
+        for proc, i in enumerate(pending):
+            self.itemCluster[i] = cluster
+            self.itemProc[i] = proc
+            self.itemStatus[i] = FalconryStatus.IDLE.value
+        log.info(f"Array {self.name}: submitted {len(pending)} items")
+
+    def link_log(self) -> None:
+        """Log symlinks are not created for arrays, there would be one per item"""
+
+    def all_files(self) -> List[str]:
+        """Returns paths of the files (log, output, error)
+        of the latest submission of all items
+
+        Returns:
+            List[str]: list of paths
+        """
+        files = []
+        for i in range(self.size):
+            jobID = self.item_id(i)
+            if jobID is None:
+                continue
+            for key in ["log", "output", "error"]:
+                files.append(self.config[key].replace("$(JobId)", jobID))
+        return files
+
+    def held_ids(self) -> List[str]:
+        """Returns IDs of the items which are held, as last evaluated
+
+        Returns:
+            List[str]: job IDs
+        """
+        return [
+            jobID
+            for i, s in enumerate(self.itemStatus)
+            if s == FalconryStatus.HELD.value and (jobID := self.item_id(i)) is not None
+        ]
+
+    def removed_held(self, jobIDs: List[str], giveUp: bool) -> None:
+        """Marks the items removed by the hold policy, so that they are
+        submitted again with the array. If the policy gave up, the whole
+        array is failed once the other items settle.
+
+        Arguments:
+            jobIDs (List[str]): IDs of the removed items
+            giveUp (bool): the items are not resubmitted
+        """
+        removed = set(jobIDs)
+        for i in range(self.size):
+            if self.item_id(i) in removed:
+                self.itemStatus[i] = FalconryStatus.REMOVED.value
+        self.gaveUp = giveUp
+
+    @property
+    def act_constraints(self) -> str:
+        """Returns HTCondor constraints for all items still in the queue"""
+        return id_constraint(
+            jobID
+            for i, s in enumerate(self.itemStatus)
+            if s not in _settled and (jobID := self.item_id(i)) is not None
+        )
+
+    def _get_status_local(
+        self, logExists: Optional[bool] = None
+    ) -> Optional[FalconryStatus]:
+        """Returns status of the array, evaluating all items which are not
+        settled yet from their log files and the rest with a single bulk
+        query. Never returns `None`.
+
+        Arguments:
+            logExists (Optional[bool], optional): ignored, each item
+                has its own log file.
+
+        Returns:
+            Optional[FalconryStatus]: status of the array
+        """
+        if self.skipped:
+            return FalconryStatus.SKIPPED
+        elif self.done:
+            return FalconryStatus.COMPLETE
+        elif self.jobID is None:
+            return FalconryStatus.NOT_SUBMITTED
+
+        self._update_items()
+        counts = self.status_counts()
+        if counts.get(FalconryStatus.COMPLETE, 0) == self.size:
+            self.done = True
+            return FalconryStatus.COMPLETE
+        for status in _aggregateOrder:
+            if status in counts:
+                break
+        # the hold policy gave up on some items, failed once the rest settles
+        if self.gaveUp and status not in _active:
+            status = FalconryStatus.FAILED
+        if status is FalconryStatus.FAILED:
+            self.failed = True
+        return status
+
+    def _update_items(self) -> None:
+        """Evaluates status of all items which are not settled yet"""
+        unknown: Dict[str, int] = {}
+        for i, value in enumerate(self.itemStatus):
+            jobID = self.item_id(i)
+            if value in _settled or jobID is None:
+                continue
+            try:
+                with open(self.config["log"].replace("$(JobId)", jobID)) as fl:
+                    search = fl.read()
+            except FileNotFoundError:
+                self.itemStatus[i] = FalconryStatus.LOG_FILE_MISSING.value
+                continue
+            status, _ = parse_log(search)
+            if status == 0:
+                unknown[jobID] = i
+            elif status < 0:
+                self.itemStatus[i] = FalconryStatus.FAILED.value
+            else:
+                self.itemStatus[i] = status
+
+        if len(unknown) == 0:
+            return
+        cndrStatuses = query_status_bulk(self.schedd, unknown.keys())
+        for jobID, i in unknown.items():
+            cndrStatus = cndrStatuses.get(jobID, -999)
+            if cndrStatus == 4 or cndrStatus == -999:
+                cndrStatus = FalconryStatus.UNKNOWN.value
+            self.itemStatus[i] = cndrStatus
@@ -1,29 +1,147 @@
-from typing import Any, TypeVar, Callable, cast
+from typing import Any, Dict, List, Optional, TypeVar, Callable, cast
+import errno
+import fcntl
+import functools
 import os
+import socket
 import logging
 
 
 log = logging.getLogger('falconry')
 
+# flock not supported by the file system (e.g. Lustre mounted without
+# flock, AFS, EOS), the lock falls back to the content of the file
+_NO_FLOCK = frozenset([errno.ENOLCK, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP])
+
 
 class LockFile:
+    """Advisory lock (`fcntl.flock`) of a file, the PID and host of the
+    holder are written to the file.
+
+    The kernel releases the lock when the holding process dies, so a lock
+    file left behind (e.g. after `kill -9`) is stale and is taken over.
+    Locks of the same file within one process are shared and released
+    only once all of them are released.
+
+    Can be used as a context manager, or acquired once and held
+    (e.g. for the lifetime of the manager).
+
+    On file systems without flock, the lock is held while the file
+    contains the PID and host of a holder, which is only recognized
+    as stale if it ran on this host.
+
+    Arguments:
+        path (str): path to the lock file
+    """
+
+    # real path -> [file descriptor, number of holders, flock used]
+    # within this process
+    _held: Dict[str, List[int]] = {}
+
     def __init__(self, path: str) -> None:
         self.path = path
-        if os.path.exists(self.path):
-            log.error("Manager instance is already running.")
-            log.debug(
-                f"Delete {self.path} to start a new instance if you think this is a mistake"
-            )
-            raise LockFileException
+        self.locked = False
+
+    def holder(self) -> Optional[str]:
+        """Returns PID and host of the last holder of the lock,
+        `None` if the lock file is empty or does not exist"""
+        try:
+            with open(self.path) as f:
+                content = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return content if content != "" else None
+
+    def acquire(self) -> None:
+        """Acquires the lock, does nothing if already acquired.
+
+        Raises:
+            LockFileException: if the lock is held by another process
+        """
+        if self.locked:
+            return
+        key = os.path.realpath(self.path)
+        entry = LockFile._held.get(key)
+        if entry is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            flocked = True
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                if e.errno not in _NO_FLOCK:
+                    os.close(fd)
+                    if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        raise
+                    log.error(
+                        f"Manager instance is already running (pid, host: {self.holder()})."
+                    )
+                    log.debug(f"Lock {self.path} is held by another process")
+                    raise LockFileException
+                flocked = False
+                self._check_holder(fd)
+            stale = self.holder()
+            if stale is not None:
+                log.warning(f"Taking over stale lock {self.path} (pid, host: {stale})")
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, f"{os.getpid()} {socket.gethostname()}\n".encode(), 0)
+            log.debug(f"Locking {self.path}")
+            entry = [fd, 0, flocked]
+            LockFile._held[key] = entry
+        entry[1] += 1
+        self.locked = True
+
+    def release(self) -> None:
+        """Releases the lock, the file is kept (removing it would allow
+        another process to lock a new file while the old one is locked)."""
+        if not self.locked:
+            return
+        self.locked = False
+        key = os.path.realpath(self.path)
+        entry = LockFile._held[key]
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        log.debug(f"Unlocking {self.path}")
+        fd = entry[0]
+        os.ftruncate(fd, 0)
+        if entry[2]:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+        del LockFile._held[key]
+
+    def _check_holder(self, fd: int) -> None:
+        """Checks the holder written in the lock file, used if the file
+        system does not support flock. Only holders on this host
+        which are not running anymore are stale.
+
+        Arguments:
+            fd (int): file descriptor of the lock file, closed on failure
+
+        Raises:
+            LockFileException: if the lock may be held by another process
+        """
+        log.warning(f"File system does not support flock, locking {self.path} by its content")
+        holder = self.holder()
+        if holder is None:
+            return
+        pid, _, host = holder.partition(" ")
+        if host == socket.gethostname() and pid.isdigit():
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return
+            except PermissionError:
+                pass
+        os.close(fd)
+        log.error(f"Manager instance may be already running (pid, host: {holder}).")
+        log.error(f"Delete {self.path} to start a new instance if it is not.")
+        raise LockFileException
 
     def __enter__(self) -> None:
-        log.debug(f"Locking {self.path}")
-        with open(self.path, "w") as f:
-            f.write("")
+        self.acquire()
 
     def __exit__(self, *excinfo: Any) -> None:
-        log.debug(f"Unlocking {self.path}")
-        os.remove(self.path)
+        self.release()
 
 
 class LockFileException(Exception):
@@ -34,9 +152,17 @@ FuncT = TypeVar("FuncT", bound=Callable[..., Any])
 
 
 def lock(func: FuncT) -> FuncT:
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        args[0]._check_lock()
-        with LockFile(args[0].lockFile):
-            return func(*args, **kwargs)
+    """Makes sure the object holds the lock of its `lockFile` before
+    calling the method. The lock is acquired on the first call and then
+    kept, so subsequent calls only check an attribute."""
+
+    @functools.wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        fileLock = self.__dict__.get("_fileLock")
+        if fileLock is None or not fileLock.locked:
+            fileLock = LockFile(self.lockFile)
+            fileLock.acquire()
+            self._fileLock = fileLock
+        return func(self, *args, **kwargs)
 
     return cast(FuncT, wrapper)
@@ -1,27 +1,109 @@
 import logging
+import gzip
 import json
-import ijson
+import re
 import os
 import shutil
 import sys
 import traceback
 import datetime
+import gc
 import select
+import time
+import weakref
 from time import sleep
-import htcondor2 as htcondor
 import copy
-from glob import glob
-from typing import Dict, Any, Tuple, Optional
-
-from .lock import lock, LockFileException
-from .job import job
-from .status import FalconryStatus
+from glob import glob, escape as glob_escape
+from typing import Dict, Any, BinaryIO, Iterable, Iterator, List, Tuple, Optional
+
+from .lock import lock, LockFile, LockFileException
+from .job import job, id_constraint, parse_log, scan_ids, query_status_bulk
+from .job_array import job_array
+from .barrier import barrier
+from .status import FalconryStatus, StatusIndex
 from . import cli
 from .schedd_wrapper import ScheddWrapper
-from .utils import prepend, clean_dir, tail_file
+from .utils import prepend, clean_dir, tail_files, read_submit_event
+from .pack import LogPacker
+from .failures import cluster_failures
+from .saver import BackgroundSaver
+from .critical_path import critical_path
+from .runtimes import RuntimeDB, parse_events
+from .holds import HoldAction, HoldPolicy, HoldRule
+from .speculation import SiblingRuntimes
+from .sizing import (
+    REQUESTS,
+    bumped_request,
+    config_key,
+    estimate_requests,
+    exceeded_resource,
+)
 
 log = logging.getLogger('falconry')
 
+# suffix of the time-stamped copies of the save file
+_snapshotPattern = re.compile(r"\.[0-9]{8}_[0-9]{4}_[0-9]{2}$")
+# final states of jobs whose files are packed, see `manager._pack_finished`
+_packedStatuses = frozenset(
+    [
+        FalconryStatus.COMPLETE,
+        FalconryStatus.FAILED,
+        FalconryStatus.REMOVED,
+        FalconryStatus.ABORTED_BY_USER,
+    ]
+)
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Hardlinks the file, copies it if the filesystem does not
+    support hardlinks.
+
+    Arguments:
+        src (str): source file
+        dst (str): destination
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _read_save(f: BinaryIO) -> Iterator[Tuple[str, Any]]:
+    """Yields the saved manager info and jobs from the save file,
+    either compressed json lines or a json dictionary (detected
+    from the content of the file).
+
+    Arguments:
+        f (BinaryIO): save file opened in binary mode
+
+    Yields:
+        Tuple[str, Any]: name and the saved information
+    """
+    magic = f.read(2)
+    f.seek(0)
+    if magic == b"\x1f\x8b":  # gzip
+        with gzip.open(f, "rt") as fz:
+            for line in fz:
+                if line.strip() != "":
+                    name, value = json.loads(line)
+                    yield name, value
+        return
+
+    # ijson is only needed here, import lazily to keep startup fast
+    import ijson
+
+    if ijson.backend == "python":
+        # The pure python backend is more than 10 times slower than
+        # the C parser of the standard library, so parse the file at once
+        log.debug("C backend of ijson not available, parsing with json")
+        yield from json.load(f).items()
+        return
+    yield from ijson.kvitems(f, "")
+
+
+# job classes by the `type` in the save file, plain jobs have no type
+_jobTypes: Dict[str, type[job]] = {"array": job_array, "barrier": barrier}
+
 
 class Counter:
     # just holds few variables used in status print
@@ -68,6 +150,34 @@ class manager:
         maxJobIdle (int): maximum number of idle jobs
         schedd (ScheddWrapper): htcondor schedd wrapper
         keepSaveFiles (int): number of save files to keep, defaults to 2
+        packLogs (int): pack files of finished jobs in batches of this size
+            into archives in `mgrDir/packs` (see `pack.LogPacker`),
+            defaults to 0 (disabled)
+        compressSave (bool): save as gzip compressed json lines, one line
+            per job, defaults to False. Detected automatically on load.
+        criticalPathPriority (bool): set HTCondor `priority` of the jobs
+            from their critical path (0-100), defaults to False. Ready jobs
+            are always submitted in the order of their critical path.
+        runtimeDB (Optional[str]): path to the database of finished jobs
+            (see `runtimes.RuntimeDB`), can be shared by many managers,
+            defaults to None (disabled)
+        autoSize (bool): set memory, disk, cpu and time requests of jobs
+            from their previous runs in the runtime database and raise
+            the requests of jobs held for exceeding them (see `sizing`),
+            defaults to False
+        sizeHeadroom (float): fraction added to the observed usage
+            by `autoSize`, defaults to 0.2
+        holdPolicy (Optional[HoldPolicy]): what to do with held jobs
+            (see `holds.HoldPolicy`), defaults to None (held jobs are left
+            alone), with `autoSize` a policy which only raises exceeded
+            requests
+        speculativeCopies (int): maximal number of stragglers running with
+            a speculative copy at the same time, defaults to 0 (disabled).
+            A running job is a straggler if it runs longer than
+            `stragglerPercentile` of the runtimes of its completed siblings
+            (see `speculation.sibling_group`). Whichever copy finishes
+            first is kept and the other is removed.
+        stragglerPercentile (float): see `speculativeCopies`, defaults to 95
     """
 
     reservedNames = ["Message", "Command", "remote"]
@@ -79,6 +189,15 @@ class manager:
         maxJobIdle: int = -1,
         schedd: Optional[ScheddWrapper] = None,
         keepSaveFiles: int = 2,
+        packLogs: int = 0,
+        compressSave: bool = False,
+        criticalPathPriority: bool = False,
+        runtimeDB: Optional[str] = None,
+        autoSize: bool = False,
+        sizeHeadroom: float = 0.2,
+        holdPolicy: Optional[HoldPolicy] = None,
+        speculativeCopies: int = 0,
+        stragglerPercentile: float = 95,
     ):
         log.info("MONITOR: INIT")
 
@@ -90,6 +209,8 @@ class manager:
 
         # job collection
         self.jobs: Dict[str, job] = {}
+        # names of jobs by their last status
+        self.statusIndex = StatusIndex()
         self.sub_queue: list[job] = []
 
         # now create a directory where the info about jobs will be save
@@ -114,24 +235,71 @@ class manager:
         self.maxJobIdle = maxJobIdle
         self.curJobIdle = 0
         self.keepSaveFiles = keepSaveFiles
+        self.compressSave = compressSave
+
+        # length of the critical path of each job, computed when needed
+        self.criticalPathPriority = criticalPathPriority
+        self._criticalPath: Optional[Dict[str, float]] = None
+
+        # timing and resources of finished jobs
+        self.runtimeDB = RuntimeDB(runtimeDB) if runtimeDB is not None else None
+        self.autoSize = autoSize
+        self.sizeHeadroom = sizeHeadroom
+        if holdPolicy is None and autoSize:
+            holdPolicy = HoldPolicy([HoldRule(HoldAction.BUMP)])
+        self.holdPolicy = holdPolicy
+
+        # speculative execution of stragglers
+        self.speculativeCopies = speculativeCopies
+        self._siblings = SiblingRuntimes(stragglerPercentile)
+        if autoSize and runtimeDB is None:
+            log.warning(
+                "Runtime database not set, jobs held for exceeding their requests"
+                " are bumped but requests are not learned from previous runs"
+            )
+
+        # packing of files of finished jobs
+        self.packLogs = packLogs
+        self.packer = LogPacker(os.path.join(self.dir, 'packs'))
+        # IDs of the last submission of jobs whose files are packed
+        self._packed: set[str] = set()
+
+        # time-stamped copies of save files, see `_snapshots`
+        self._snapshotFiles: Dict[str, list[str]] = {}
+
+        # saving in the background during the monitoring loop
+        self._saver = BackgroundSaver(
+            lambda output, quiet: self._write_save(output.items(), quiet)
+        )
 
     def _check_lock(self) -> None:
-        """Raises an exception if the lock file already exists.
+        """Acquires the lock of the manager directory, which is then held
+        for the lifetime of the manager (see `lock.LockFile`).
 
-        This indicates that the manager is already running.
+        Raises `LockFileException` if another manager instance
+        is already running in the directory.
         """
-        if os.path.exists(self.lockFile):
-            log.error(f"Manager instance is already running in {self.dir}")
-            log.debug(
-                f"Delete {self.lockFile} to start a new instance if you think this is a mistake"
-            )
-            raise LockFileException
+        self._fileLock = LockFile(self.lockFile)
+        self._fileLock.acquire()
+        # release once the manager is garbage collected,
+        # otherwise the lock is released when the process ends
+        weakref.finalize(self, self._fileLock.release)
+
+    def close(self) -> None:
+        """Releases the lock of the manager directory, so that another
+        manager instance can use it. Acquired again by any locked call."""
+        self._fileLock.release()
+        if self.runtimeDB is not None:
+            self.runtimeDB.close()
+            self.runtimeDB = None
 
     def _delete(self) -> None:
         """Deletes the contents of the manager directory,
         excluding the log files and the lock file.
         Also kills the remote manager if it is running."""
         log.info("Deleting old manager directory %s" % self.dir)
+        self.packer.clear()
+        self._snapshotFiles.clear()
         try:
             clean_dir(
                 self.dir,
@@ -214,6 +382,45 @@ class manager:
         """
         self._add_job(j, update)
 
+    @lock
+    def add_jobs(self, jobs: Iterable[job], update: bool = False) -> int:
+        """Adds many jobs to the manager at once. The jobs can be given
+        by a generator. Names are validated for all jobs before any of
+        them is added, so either all jobs are added or none.
+
+        Arguments:
+            jobs (Iterable[job]): jobs to be added
+            update (bool, optional): whether to update the jobs which
+            already exist. Defaults to False.
+
+        Returns:
+            int: number of added jobs
+        """
+        newJobs = list(jobs)
+        nameSet: set[str] = set()
+        duplicates: set[str] = set()
+        for j in newJobs:
+            if j.name in nameSet:
+                duplicates.add(j.name)
+            nameSet.add(j.name)
+
+        # some reserved names, to simplify saving later
+        reserved = nameSet.intersection(manager.reservedNames)
+        if len(reserved) > 0:
+            log.error("Names %s are reserved! Exiting ...", sorted(reserved))
+            raise SystemExit
+        if len(duplicates) > 0:
+            log.error("Jobs %s are defined twice! Exiting ...", sorted(duplicates))
+            raise SystemExit
+        existing = nameSet.intersection(self.jobs.keys())
+        if len(existing) > 0 and not update:
+            log.error("Jobs %s already exist! Exiting ...", sorted(existing))
+            raise SystemExit
+
+        for j in newJobs:
+            self._add_job(j, update)
+        return len(newJobs)
+
     def _add_job(self, j: job, update: bool = False) -> None:
         """Adds a job to the manager. If the job already exists and `update` is
         `True`, it will be updated.
@@ -238,8 +445,14 @@ class manager:
                 raise SystemExit
             else:
                 log.info(f"Updating job {j.name}.")
+                # the new job gets into its status now
+                self.jobs[j.name].statusIndex = None
+                self.statusIndex.remove(j.name)
 
         self.jobs[j.name] = j
+        self._criticalPath = None
+        j.statusIndex = self.statusIndex
+        self.statusIndex.update(j.name, j.lastStatus)
 
     @lock
     def save(self, quiet: bool = False, prefix: str = "") -> None:
@@ -259,18 +472,66 @@ class manager:
         If `quiet` is `True`, it will not print any messages and
         will not make a time-stamped copy of the save file.
 
+        Waits for saving in the background (see `_save_async`) to finish,
+        so the save file is up-to-date when this returns.
+
         Arguments:
             quiet (bool, optional): whether to print messages. Defaults to False.
         """
+        self._saver.flush()
         if not quiet:
             log.info("Saving current status of jobs")
-        output: Dict[str, Any] = {
-            "Message": self.mgrMsg,
-            "Command": self.command,
-        }
+        # jobs are serialised one by one while writing
+        self._write_save(self._state(), quiet, prefix)
+
+    def _save_async(self, quiet: bool = True) -> None:
+        """Saves the current status of the jobs in the background.
+        Only the snapshot of the state is taken here, serialisation and
+        writing is done by the background thread (see `saver.BackgroundSaver`).
+
+        Arguments:
+            quiet (bool, optional): whether to print messages. Defaults to True.
+        """
+        self._saver.request(self._snapshot(), quiet)
+
+    def _state(self) -> Iterator[Tuple[str, Any]]:
+        """Yields the manager info and the status of each job to be saved.
+
+        Yields:
+            Tuple[str, Any]: name and the saved information
+        """
+        yield "Message", list(self.mgrMsg)
+        yield "Command", list(self.command)
         for name, j in self.jobs.items():
-            output[name] = j.save()
+            yield name, j.save()
 
+    def _snapshot(self) -> Dict[str, Any]:
+        """Returns the current status of the jobs to be saved.
+
+        Returns:
+            Dict[str, Any]: dictionary with the manager info and all jobs
+        """
+        return dict(self._state())
+
+    def _write_save(
+        self,
+        state: Iterable[Tuple[str, Any]],
+        quiet: bool = False,
+        prefix: str = "",
+    ) -> None:
+        """Writes the status of the jobs to the save file,
+        creates time-stamped copy (if not `quiet`) and removes old copies.
+
+        With `compressSave`, the file is gzip compressed with one json
+        line per job, written as the state is iterated. Otherwise it is
+        a single (indented) json dictionary.
+
+        Arguments:
+            state (Iterable[Tuple[str, Any]]): status of the jobs,
+                see `_state`
+            quiet (bool, optional): whether to print messages. Defaults to False.
+            prefix (str, optional): prefix of the save file. Defaults to "".
+        """
         if prefix != "":
             tmp_list = self.saveFileName.split("/")
             tmp_list[-1] = f"{prefix}{tmp_list[-1]}"
@@ -286,40 +547,68 @@ class manager:
         is_first = not os.path.exists(fileLatest)
         fileFirst = f"{saveFileName}.first"
 
-        with open(fileLatest, "w") as f:
-            json.dump(output, f, indent=2)
+        # Always write a new file, so that the snapshots can be hardlinks
+        # of it instead of copies. Replacing `.latest` is then also atomic.
+        fileTmp = f"{fileLatest}.tmp"
+        if self.compressSave:
+            with gzip.open(fileTmp, "wt", compresslevel=3) as f:
+                for item in state:
+                    f.write(json.dumps(item, separators=(",", ":")))
+                    f.write("\n")
+        else:
+            with open(fileTmp, "w") as f:
+                json.dump(dict(state), f, indent=2)
+        snapshots = self._snapshots(saveFileName)
         if not quiet:
             log.info("Success! Making copy with time-stamp.")
             log.debug(f"Time-stamped file: {fileSuf}")
             if not os.path.exists(fileSuf):
-                shutil.copyfile(fileLatest, fileSuf)
+                _link_or_copy(fileTmp, fileSuf)
+                snapshots.append(fileSuf)
             else:
-                raise FileExistsError(
-                    f"Destination file {fileSuf} already exists. "
-                    "This should not be possible."
-                )
+                # two saves within a second (e.g. background and final save)
+                log.debug(f"Time-stamped file {fileSuf} already exists")
         if is_first:
-            shutil.copyfile(fileLatest, fileFirst)
+            _link_or_copy(fileTmp, fileFirst)
+        os.replace(fileTmp, fileLatest)
 
         # not necessary to remove, but maybe better to be sure its not broken
-        if os.path.exists(saveFileName):
-            os.remove(saveFileName)
-        os.symlink(fileLatest.split("/")[-1], saveFileName)
+        if not (
+            os.path.islink(saveFileName)
+            and os.readlink(saveFileName) == os.path.basename(fileLatest)
+        ):
+            if os.path.lexists(saveFileName):
+                os.remove(saveFileName)
+            os.symlink(os.path.basename(fileLatest), saveFileName)
 
         # clean up old save files
-        files = glob(f"{saveFileName}.*")
-        # remove first/latest
-        # in principle the conditions are not necessary...
-        if fileFirst in files:
-            files.remove(fileFirst)
-        if fileLatest in files:
-            files.remove(fileLatest)
-        # sort based on time-stamp
-        files.sort()
-        files = files[: -self.keepSaveFiles]
-        for fl in files:
+        while self.keepSaveFiles > 0 and len(snapshots) > self.keepSaveFiles:
+            fl = snapshots.pop(0)
             log.debug(f"Removing old save file {fl}")
-            os.remove(fl)
+            try:
+                os.remove(fl)
+            except FileNotFoundError:
+                pass
+
+    def _snapshots(self, saveFileName: str) -> list[str]:
+        """Returns time-stamped copies of the save file, oldest first.
+
+        The directory is scanned only once, afterwards
+        the list is kept up-to-date by `_write_save`.
+
+        Arguments:
+            saveFileName (str): path to the save file
+
+        Returns:
+            list[str]: paths to the time-stamped copies
+        """
+        if saveFileName not in self._snapshotFiles:
+            self._snapshotFiles[saveFileName] = sorted(
+                fl
+                for fl in glob(f"{glob_escape(saveFileName)}.*")
+                if _snapshotPattern.search(fl)
+            )
+        return self._snapshotFiles[saveFileName]
 
     @lock
     def load(self, retryFailed: bool = False) -> None:
@@ -331,10 +620,42 @@ class manager:
             Defaults to False.
         """
         log.info("Loading past status of jobs")
+        # Loading creates many objects which all survive, garbage
+        # collection passes would only slow it down
+        gcEnabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._load()
+        finally:
+            if gcEnabled:
+                gc.enable()
+
+        # Retry failed jobs
+        # Since this changes the status and submits
+        # jobs, add safequard in case of crash
+        # to save up-to-date state
+        if retryFailed:
+            try:
+                self._reconcile(retryFailed=True)
+            except KeyboardInterrupt:
+                log.error("Manager interrupted with keyboard!")
+                log.error("Saving and exitting ...")
+                self._save()
+                self.print_failed()
+                sys.exit(0)
+            except Exception:
+                log.error("Error ocurred when running manager!")
+                traceback.print_exc(file=sys.stdout)
+                self._save()
+                self.print_failed()
+                sys.exit(1)
+
+    def _load(self) -> None:
+        """Reads the save file and recreates the jobs and their dependencies"""
         with open(self.saveFileName, "rb") as f:
             depNames = {}
 
-            for name, jobDict in ijson.kvitems(f, ""):
+            for name, jobDict in _read_save(f):
                 if name in manager.reservedNames:
                     if name == "Message":
                         self.mgrMsg = prepend(jobDict, self.mgrMsg)
@@ -343,8 +664,8 @@ class manager:
                     continue
                 log.debug("Loading job %s", name)
 
-                # create a job
-                j = job(name, self.schedd)
+                # create a job of the saved type
+                j = _jobTypes.get(jobDict.get("type", ""), job)(name, self.schedd)
                 j.load(jobDict)
 
                 # add it to the manager
@@ -358,27 +679,75 @@ class manager:
         for j in self.jobs.values():
             dependencies = [self.jobs[name] for name in depNames[j.name]]
             j.add_job_dependency(*dependencies)
+            if j.jobID is not None and self.packer.is_packed(j.logFile):
+                self._packed.add(j.jobID)
 
-        # Retry failed jobs
-        # Since this changes the status and submits
-        # jobs, add safequard in case of crash
-        # to save up-to-date state
-        if retryFailed:
-            try:
-                for j in self.jobs.values():
-                    self._check_resubmit(j, True)
-            except KeyboardInterrupt:
-                log.error("Manager interrupted with keyboard!")
-                log.error("Saving and exitting ...")
-                self._save()
-                self.print_failed()
-                sys.exit(0)
-            except Exception:
-                log.error("Error ocurred when running manager!")
-                traceback.print_exc(file=sys.stdout)
-                self._save()
-                self.print_failed()
-                sys.exit(1)
+    @lock
+    def find_ids(self) -> None:
+        """Finds new job IDs of all jobs from the log files, e.g. when jobs
+        were submitted by another client (remote mode).
+
+        Each condor log directory is scanned only once and only logs of
+        unknown IDs are read. Those are matched to jobs using the job name
+        stored in the submit event (`submit_event_notes`, set by
+        `job.set_simple`), which also provides the submission time.
+        """
+        known = set(jid for j in self.jobs.values() for jid in j.jobIDs)
+        logDirs = set(
+            os.path.dirname(j.config["log"])
+            for j in self.jobs.values()
+            if "log" in j.config
+        )
+
+        # name -> {ID: submission time}
+        index: Dict[str, Dict[str, Optional[int]]] = {}
+        unmatched = 0
+        for logDir in logDirs:
+            for jid in scan_ids(logDir) - known:
+                timestamp, name = read_submit_event(
+                    os.path.join(logDir, f"{jid}.log")
+                )
+                if name is None or name not in self.jobs:
+                    unmatched += 1
+                    continue
+                index.setdefault(name, {})[jid] = timestamp
+
+        if unmatched > 0:
+            log.warning(
+                f"Found {unmatched} logs which could not be matched to any job, "
+                "use `job.find_id` to scan the job directories instead"
+            )
+        for name, timeStamps in index.items():
+            j = self.jobs[name]
+            # items of arrays have the same name, arrays are not supported
+            if not j.done and not isinstance(j, job_array):
+                j.find_id(timeStamps.keys(), timeStamps)
+
+    def jobs_with_status(
+        self, *statuses: FalconryStatus, olderThan: float = 0
+    ) -> list[job]:
+        """Returns jobs whose last known status is one of `statuses`,
+        without checking all jobs (see `StatusIndex`).
+
+        For example, jobs idle for more than 6 hours:
+
+        .. code-block:: python
+
+            mgr.jobs_with_status(FalconryStatus.IDLE, olderThan=6 * 3600)
+
+        Arguments:
+            *statuses (FalconryStatus): statuses to select
+            olderThan (float, optional): only jobs which are in the status
+                for at least this many seconds. Defaults to 0.
+
+        Returns:
+            list[job]: list of jobs
+        """
+        return [
+            self.jobs[name]
+            for status in statuses
+            for name in self.statusIndex.names(status, olderThan)
+        ]
 
     def print_running(self, printLogs: bool = False) -> None:
         """Prints names of all running jobs.
@@ -388,13 +757,12 @@ class manager:
                 Defaults to False.
         """
         log.info("Printing running jobs:")
-        for name, j in self.jobs.items():
-            if j.lastStatus == FalconryStatus.RUNNING:
-                log.info(f"{name} (id {j.jobID})")
-                if printLogs:
-                    log.info(f"log: {j.logFile}")
-                    log.info(f"out: {j.outFile}")
-                    log.info(f"err: {j.errFile}")
+        for j in self.jobs_with_status(FalconryStatus.RUNNING):
+            log.info(f"{j.name} (id {j.jobID})")
+            if printLogs:
+                log.info(f"log: {j.logFile}")
+                log.info(f"out: {j.outFile}")
+                log.info(f"err: {j.errFile}")
 
     def print_failed(self, printLogs: bool = False) -> None:
         """Prints names of all failed jobs.
@@ -403,34 +771,96 @@ class manager:
             printLogs (bool, optional): whether to print paths to logs.
                 Defaults to False.
         """
+        failed = self.jobs_with_status(FalconryStatus.FAILED)
+        removed = self.jobs_with_status(FalconryStatus.REMOVED)
+        # read all error files at once, concurrently
+        tails = {}
+        if printLogs:
+            tails = tail_files([j.errFile for j in failed + removed], 10, self.packer)
+
         log.info("Printing failed jobs:")
-        for name, j in self.jobs.items():
-            if j.lastStatus == FalconryStatus.FAILED:
-                log.info(f"{name} (id {j.jobID})")
-                if printLogs:
-                    log.info(f"log: {j.logFile}")
-                    log.info(f"out: {j.outFile}")
-                    log.info(f"err: {j.errFile}")
-                    log.info("Last 10 lines of error file:")
-                    print(tail_file(j.errFile, 10))
+        for j in failed:
+            log.info(f"{j.name} (id {j.jobID})")
+            if printLogs:
+                log.info(f"log: {j.logFile}")
+                log.info(f"out: {j.outFile}")
+                log.info(f"err: {j.errFile}")
+                log.info("Last 10 lines of error file:")
+                print(tails[j.errFile])
         # TODO: maybe separate failed and removed?
         log.info("Printing removed jobs:")
-        for name, j in self.jobs.items():
-            if j.lastStatus == FalconryStatus.REMOVED:
-                log.info(f"{name} (id {j.jobID})")
-                if printLogs:
-                    log.info(f"log: {j.logFile}")
-                    log.info(f"out: {j.outFile}")
-                    log.info(f"err: {j.errFile}")
-                    log.info("Last 10 lines of error file:")
-                    print(tail_file(j.errFile, 10))
+        for j in removed:
+            log.info(f"{j.name} (id {j.jobID})")
+            if printLogs:
+                log.info(f"log: {j.logFile}")
+                log.info(f"out: {j.outFile}")
+                log.info(f"err: {j.errFile}")
+                log.info("Last 10 lines of error file:")
+                print(tails[j.errFile])
+
+    def failure_signatures(self, lines: int = 10) -> Dict[str, list[job]]:
+        """Groups failed and removed jobs by the signature of the failure,
+        i.e. exit code and the last line of the error file with variable
+        tokens (paths, numbers, hostnames) normalised.
+
+        Arguments:
+            lines (int, optional): number of lines of the error file to read.
+                Defaults to 10.
+
+        Returns:
+            Dict[str, list[job]]: signature to jobs, largest groups first
+        """
+        jobs = self.jobs_with_status(FalconryStatus.FAILED, FalconryStatus.REMOVED)
+        return cluster_failures(jobs, lines, self.packer)
+
+    def print_failure_signatures(self) -> None:
+        """Prints groups of failed jobs with the same failure signature,
+        with number of jobs and an example job for each group."""
+        log.info("Printing failure signatures:")
+        for i, (sig, jobs) in enumerate(self.failure_signatures().items()):
+            log.info(f"[{i}] {len(jobs)} jobs: {sig}")
+            log.info(f"    e.g. {jobs[0].name} (err: {jobs[0].errFile})")
+
+    def retry_signature(self, sig: str) -> int:
+        """Resubmits only the failed jobs with given failure signature.
+
+        Arguments:
+            sig (str): signature as returned by `failure_signatures`
+
+        Returns:
+            int: number of resubmitted jobs
+        """
+        jobs = self.failure_signatures().get(sig, [])
+        for j in jobs:
+            self._queue_resubmit(j, j.lastStatus, retryFailed=True)
+        return len(jobs)
+
+    def critical_path(self) -> Dict[str, float]:
+        """Returns length of the critical path of each job, i.e. expected
+        runtime (`+MaxRuntime`) of the job and the longest chain of jobs
+        depending on it (see `critical_path.critical_path`).
+
+        Computed when needed, recomputed when jobs are added
+        or the manager is started.
+
+        Returns:
+            Dict[str, float]: job name to the length of its critical path
+        """
+        if self._criticalPath is None:
+            self._criticalPath = critical_path(self.jobs.values())
+        return self._criticalPath
 
     def _check_dependence(self) -> None:
         """Checks status of all jobs and their dependencies to determine
         if job is skipped. This is purely for printing purposes,
         in the backend, jobs are
+
+        Jobs which are ready are queued for submission starting with
+        the longest critical path (see `_queue_ready`), so that long chains
+        of jobs start first when the number of idle jobs is limited.
         """
 
+        ready: List[job] = []
         # TODO: consider if not submitted jobs in a special list
         for name, j in self.jobs.items():
             # only check jobs which are neither submitted nor skipped
@@ -451,6 +881,7 @@ class manager:
                         f"Job {name} depends on job {tarJob.name} which either failed or was skipped! Skipping ..."
                     )
                     j.skipped = True
+                    j.invalidate_status()
 
                 status = tarJob.get_status()
                 if status == FalconryStatus.REMOVED:
@@ -458,16 +889,43 @@ class manager:
                         f"Job {name} depends on job {tarJob.name} which is {FalconryStatus.REMOVED}! Skipping ..."
                     )
                     j.skipped = True
+                    j.invalidate_status()
 
                 break
 
             if isReady:
-                # Check if we did not reach maximum number of submitted jobs
-                if self.maxJobIdle != -1 and self.curJobIdle > self.maxJobIdle:
-                    break  # break because it does not make sense to check any other jobs now
-                j.submit(doNotSubmit=True)
-                self.sub_queue.append(j)
-                self.curJobIdle += 1  # Add the jobs as a idle for now
+                # barriers are not submitted, so they do not count as idle
+                if isinstance(j, barrier):
+                    j.submit()
+                    continue
+                ready.append(j)
+
+        self._queue_ready(ready)
+
+    def _queue_ready(self, ready: List[job]) -> None:
+        """Queues jobs which are ready for submission, starting with
+        the longest critical path, until the maximum number of idle
+        jobs is reached.
+
+        Arguments:
+            ready (List[job]): jobs with all dependencies done
+        """
+        if len(ready) == 0:
+            return
+        criticalPath = self.critical_path()
+        longest = max(criticalPath.values())
+        ready.sort(key=lambda j: criticalPath[j.name], reverse=True)
+        for j in ready:
+            # Check if we did not reach maximum number of submitted jobs
+            if self.maxJobIdle != -1 and self.curJobIdle > self.maxJobIdle:
+                break  # break because it does not make sense to check any other jobs now
+            if self.criticalPathPriority:
+                # all paths can be empty, e.g. instant jobs
+                priority = 100 * criticalPath[j.name] / longest if longest > 0 else 0
+                j.config["priority"] = str(round(priority))
+            j.submit(doNotSubmit=True)
+            self.sub_queue.append(j)
+            self.curJobIdle += j.size  # Add the jobs as a idle for now
 
     def _check_resubmit(self, j: job, retryFailed: bool = False) -> FalconryStatus:
         """Checks if a job should be resubmitted due to some known problems.
@@ -481,6 +939,27 @@ class manager:
             FalconryStatus: latest status of the job
         """
         status = j.get_status()
+        # If job did not change, return original status,
+        # otherwise return new status (evaluated again only if invalidated)
+        if not self._queue_resubmit(j, status, retryFailed):
+            return status
+        return j.get_status()
+
+    def _queue_resubmit(
+        self, j: job, status: FalconryStatus, retryFailed: bool = False
+    ) -> bool:
+        """Adds a job to the submission queue if it should be resubmitted
+        given its (already evaluated) status.
+
+        Arguments:
+            j (job): job to check
+            status (FalconryStatus): current status of the job
+            retryFailed (bool, optional): whether to also retry failed jobs.
+                Defaults to False.
+
+        Returns:
+            bool: True if the job was changed, False otherwise
+        """
         log.debug("Job %s has status %s", j.name, status.name)
         if status is FalconryStatus.ABORTED_BY_USER:
             log.warning(
@@ -518,11 +997,118 @@ class manager:
                 f"Error! Job {j.name} was skipped and will be retried, rerunning"
             )
             j.skipped = False
-        # If job did not change, return original status,
-        # otherwise return new status
+            j.invalidate_status()
         else:
-            return status
-        return j.get_status()
+            return False
+        return True
+
+    def _reconcile(self, retryFailed: bool = False) -> None:
+        """Evaluates status of all jobs in a single pass and queues
+        the jobs which should be resubmitted.
+
+        Unlike calling `_check_resubmit` for each job, each log directory
+        is scanned only once and jobs which cannot be classified from their
+        log files are resolved with a single bulk query (and a single
+        history query for those which already left the queue).
+
+        Arguments:
+            retryFailed (bool, optional): whether to also retry failed jobs.
+                Defaults to False.
+        """
+        log.info("Reconciling status of %i jobs", len(self.jobs))
+
+        # scan each log directory only once instead of checking each log file
+        logDirs: Dict[str, set[str]] = {}
+        for j in self.jobs.values():
+            if j.jobID is None or j.done or j.skipped:
+                continue
+            logDir = os.path.dirname(j.logFile)
+            if logDir not in logDirs:
+                try:
+                    with os.scandir(logDir) as it:
+                        logDirs[logDir] = set(entry.name for entry in it)
+                except FileNotFoundError:
+                    logDirs[logDir] = set()
+
+        statuses: Dict[str, FalconryStatus] = {}
+        unresolved: list[job] = []
+        for name, j in self.jobs.items():
+            logExists = None
+            wasFinished = j.done or j.failed
+            if j.jobID is not None and not j.done and not j.skipped:
+                logDir, logName = os.path.split(j.logFile)
+                logExists = logName in logDirs[logDir]
+            status = j._get_status_local(logExists)
+            self._check_finished(j, wasFinished)
+            if status is None:
+                unresolved.append(j)
+            else:
+                statuses[name] = status
+
+        if len(unresolved) > 0:
+            cndrStatuses = self._query_status_bulk(unresolved)
+            for j in unresolved:
+                assert j.jobID is not None
+                statuses[j.name] = j._status_from_condor(
+                    cndrStatuses.get(j.jobID, -999)
+                )
+
+        # now that all jobs are classified, queue resubmissions
+        for name, j in self.jobs.items():
+            j.lastStatus = statuses[name]
+            self._queue_resubmit(j, statuses[name], retryFailed)
+
+    def _check_finished(self, j: job, wasFinished: bool) -> None:
+        """Records runs of the job if it has just finished (see `_record_runs`)
+
+        Arguments:
+            j (job): job whose status was just evaluated
+            wasFinished (bool): whether the job was done or failed before
+        """
+        if not wasFinished and (j.done or j.failed):
+            self._record_runs(j)
+
+    def _record_runs(self, j: job) -> None:
+        """Records timing and resources of the latest run of a finished job
+        (of all items of an array) from its log file in the runtime
+        database, if enabled. Runtimes of completed jobs are also kept
+        for the speculative execution.
+
+        Arguments:
+            j (job): finished job
+        """
+        if j.jobID is None or (self.runtimeDB is None and self.speculativeCopies <= 0):
+            return
+        if isinstance(j, job_array):
+            jobIDs = [jid for i in range(j.size) if (jid := j.item_id(i)) is not None]
+        else:
+            jobIDs = [j.jobID]
+        for jobID in jobIDs:
+            logFile = j.config["log"].replace("$(JobId)", jobID)
+            try:
+                with open(logFile) as f:
+                    search = f.read()
+            except FileNotFoundError:
+                continue
+            events = parse_events(search)
+            if self.runtimeDB is not None:
+                self.runtimeDB.record(j.name, jobID, events, os.path.abspath(self.dir))
+            if j.done and events["started"] is not None and events["ended"] is not None:
+                self._siblings.add(j.name, events["ended"] - events["started"])
+
+    def _query_status_bulk(self, jobs: list[job]) -> Dict[str, int]:
+        """Returns condor `JobStatus` of all given jobs, using a single
+        query and a single history query (see `job.query_status_bulk`).
+
+        Arguments:
+            jobs (list[job]): jobs to query, all must have an ID
+
+        Returns:
+            Dict[str, int]: job ID to condor status, missing if unknown
+        """
+        return query_status_bulk(
+            self.schedd, (j.jobID for j in jobs if j.jobID is not None)
+        )
 
     def _count_jobs(self, counter: Counter) -> None:
         """Counts the number of jobs with different status.
@@ -556,35 +1142,52 @@ class manager:
         """
         # first check if job is not submitted, skipped or done
         if j.skipped:
-            c.skipped += 1
+            c.skipped += j.size
             return
         if not j.submitted:
-            c.waiting += 1
+            c.waiting += j.size
             return
         if j.done:
-            c.done += 1
+            c.done += j.size
             return
 
         #  resubmit job which failed due to condor problems
+        wasFailed = j.failed
         status = self._check_resubmit(j)
+        self._check_finished(j, wasFailed)
+
+        if isinstance(j, job_array):
+            # count each item of the array
+            for itemStatus, n in j.status_counts().items():
+                self._count_status(c, itemStatus, n)
+        else:
+            self._count_status(c, status)
+
+    def _count_status(self, c: Counter, status: FalconryStatus, n: int = 1) -> None:
+        """Adds `n` jobs with given status to the counter object.
 
+        Arguments:
+            c (counter): counter object to update
+            status (FalconryStatus): status of the jobs
+            n (int, optional): number of jobs. Defaults to 1.
+        """
         if (
             status == FalconryStatus.NOT_SUBMITTED
             or status == FalconryStatus.LOG_FILE_MISSING
         ):
-            c.notSub += 1
+            c.notSub += n
         elif status == FalconryStatus.IDLE:
-            c.idle += 1
+            c.idle += n
         elif status == FalconryStatus.RUNNING:
-            c.run += 1
+            c.run += n
         elif status == FalconryStatus.FAILED:
-            c.failed += 1
+            c.failed += n
         elif status == FalconryStatus.COMPLETE:
-            c.done += 1
+            c.done += n
         elif status == FalconryStatus.HELD:
-            c.held += 1
+            c.held += n
         elif status == FalconryStatus.REMOVED:
-            c.removed += 1
+            c.removed += n
 
     def _submit_jobs(self) -> None:
         """Submits all jobs in the submission queue."""
@@ -592,21 +1195,25 @@ class manager:
         if len(self.sub_queue) == 0:
             return
 
-        # First we need to group jobs with the same executable
-        jobs_with_exe: Dict[str, list[job]] = {}
+        import htcondor2 as htcondor
+
+        # First we need to group jobs with the same executable and log path.
+        # The log path is the same by default, unless sharded layout is used
+        jobs_with_exe: Dict[Tuple[str, str], list[job]] = {}
         for j in self.sub_queue:
-            exe = j.config["executable"]
-            if exe not in jobs_with_exe:
-                jobs_with_exe[exe] = []
-            # check that the log path is the same. This should be the case by default
-            elif j.config["log"] != jobs_with_exe[exe][0].config["log"]:
-                log.error("Jobs with same executable have different log paths")
-                raise Exception
-            jobs_with_exe[exe].append(j)
+            self._right_size(j)
+            # arrays are already a single cluster with their own template
+            if isinstance(j, job_array):
+                j.submit(force=True)
+                continue
+            key = (j.config["executable"], j.config["log"])
+            if key not in jobs_with_exe:
+                jobs_with_exe[key] = []
+            jobs_with_exe[key].append(j)
 
         ignore = ["executable", "log"]
         # Now we need to submit each group
-        for exe, jobs in jobs_with_exe.items():
+        for (exe, _), jobs in jobs_with_exe.items():
             #
             log.debug("Submitting %i jobs with executable %s", len(jobs), exe)
 
@@ -633,6 +1240,254 @@ class manager:
                 j.submit_done(f"{result.cluster()}.{it}")
         self.sub_queue = []
 
+    def _right_size(self, j: job) -> None:
+        """Sets requests of the job from its previous runs in the runtime
+        database (see `sizing.estimate_requests`), if `autoSize` is enabled.
+
+        Arguments:
+            j (job): job to be submitted
+        """
+        if not self.autoSize or self.runtimeDB is None:
+            return
+        runs = self.runtimeDB.runs(glob_escape(j.name), succeeded=False)
+        requests = estimate_requests(runs, j.config, self.sizeHeadroom)
+        if len(requests) > 0:
+            log.debug(f"Job {j.name}: requests from previous runs {requests}")
+            j.set_custom(requests)
+
+    def _handle_held(self) -> None:
+        """Applies the hold policy (see `holds.HoldPolicy`) to held jobs,
+        using a single query for the hold reasons of all held jobs
+        and a single action for all jobs to be released or removed.
+
+        Each job acted upon gets its `holdAttempts` increased (once per
+        cycle, also for arrays with many held items).
+        """
+        if self.holdPolicy is None:
+            return
+        held: Dict[str, job] = {}
+        for j in self.jobs.values():
+            for jobID in j.held_ids():
+                held[jobID] = j
+        if len(held) == 0:
+            return
+
+        import htcondor2 as htcondor
+
+        projection = ["ClusterId", "ProcId", "HoldReasonCode", "HoldReason"]
+        projection += ["EnteredCurrentStatus", "RequestMemory", "MemoryUsage"]
+        projection += ["RequestDisk", "DiskUsage", "MaxRuntime"]
+        actions: Dict[HoldAction, Dict[str, job]] = {a: {} for a in HoldAction}
+        now = time.time()
+        for ad in self.schedd.query(
+            constraint=id_constraint(held), projection=projection
+        ):
+            jobID = f"{ad['ClusterId']}.{ad['ProcId']}"
+            if jobID not in held:
+                continue
+            heldJob = held[jobID]
+            action = self.holdPolicy.decide(ad, heldJob.holdAttempts, now)
+            if action is HoldAction.BUMP and not self._bump(heldJob, jobID, ad):
+                # falls through to the next matching rule
+                action = self.holdPolicy.decide(
+                    ad, heldJob.holdAttempts, now, exclude=[HoldAction.BUMP]
+                )
+            if action is None:
+                continue
+            log.warning(
+                f"Job {heldJob.name} (id {jobID}) is held ({ad.get('HoldReason')}),"
+                f" {action.value} (attempt {heldJob.holdAttempts + 1})"
+            )
+            actions[action][jobID] = heldJob
+
+        acted = {j.name: j for jobs in actions.values() for j in jobs.values()}
+        for j in acted.values():
+            j.holdAttempts += 1
+
+        release = {**actions[HoldAction.RELEASE], **actions[HoldAction.BUMP]}
+        if len(release) > 0:
+            self.schedd.act(
+                htcondor.JobAction.Release, id_constraint(release)  # type: ignore
+            )
+        self._remove_held(actions[HoldAction.RESUBMIT], actions[HoldAction.GIVE_UP])
+
+    def _remove_held(self, resubmit: Dict[str, job], giveUp: Dict[str, job]) -> None:
+        """Removes held jobs with a single action, queues those
+        to be resubmitted and fails the others.
+
+        Arguments:
+            resubmit (Dict[str, job]): condor job IDs to resubmit and their jobs
+            giveUp (Dict[str, job]): condor job IDs to give up and their jobs
+        """
+        import htcondor2 as htcondor
+
+        if len(resubmit) + len(giveUp) == 0:
+            return
+        self.schedd.act(
+            htcondor.JobAction.Remove,  # type: ignore
+            id_constraint([*resubmit, *giveUp]),
+        )
+        for ids, failed in [(resubmit, False), (giveUp, True)]:
+            jobs = {j.name: j for j in ids.values()}
+            for j in jobs.values():
+                j.removed_held([i for i, x in ids.items() if x is j], failed)
+                if not failed:
+                    j.submit(force=True, doNotSubmit=True)
+                    self.sub_queue.append(j)
+
+    def _bump(self, j: job, jobID: str, ad: Dict[str, Any]) -> bool:
+        """Raises the request of a held job which it exceeded,
+        in the queue and in the job configuration (for resubmissions).
+
+        Arguments:
+            j (job): held job
+            jobID (str): ID of the held condor job
+            ad (Dict[str, Any]): queue ad of the held job
+
+        Returns:
+            bool: True if the request was raised
+        """
+        resource = exceeded_resource(
+            ad.get("HoldReasonCode") or 0, ad.get("HoldReason") or ""
+        )
+        if resource is None:
+            return False
+        request = bumped_request(resource, ad, headroom=self.sizeHeadroom)
+        if request is None:
+            log.warning(
+                f"Job {j.name} (id {jobID}): {resource} request unknown,"
+                " it cannot be raised"
+            )
+            return False
+        attribute, key = REQUESTS[resource]
+        updates = {attribute: config_key(j.config, key)}
+        # DESY uses RequestRuntime as well (see `job.set_time`)
+        if resource == "runtime" and "+RequestRuntime" in j.config:
+            updates["RequestRuntime"] = "+RequestRuntime"
+        for attribute, key in updates.items():
+            log.info(f"Job {j.name} (id {jobID}): setting {attribute} to {request}")
+            self.schedd.edit(id_constraint([jobID]), attribute, str(request))
+            j.config[key] = str(request)
+        return True
+
+    def _speculate(self) -> None:
+        """Resolves jobs running with a speculative copy and submits
+        copies of stragglers, up to `speculativeCopies` at the same time.
+        Start times of the running jobs are read with a single query."""
+        racing = [j for j in self.jobs.values() if len(j.racing) > 0]
+        for j in racing:
+            self._resolve_race(j)
+        slots = self.speculativeCopies - sum(len(j.racing) > 0 for j in racing)
+
+        candidates = {
+            j.jobID: j
+            for j in self.jobs_with_status(FalconryStatus.RUNNING)
+            if j.jobID is not None
+            and len(j.racing) == 0
+            and not isinstance(j, job_array)
+            and self._siblings.limit(j.name) is not None
+        }
+        if slots <= 0 or len(candidates) == 0:
+            return
+
+        now = time.time()
+        overruns = []
+        for ad in self.schedd.query(
+            constraint=id_constraint(candidates),
+            projection=["ClusterId", "ProcId", "JobCurrentStartDate"],
+        ):
+            jobID = f"{ad['ClusterId']}.{ad['ProcId']}"
+            if jobID not in candidates or ad.get("JobCurrentStartDate") is None:
+                continue
+            straggler = candidates[jobID]
+            limit = self._siblings.limit(straggler.name)
+            runtime = now - ad["JobCurrentStartDate"]
+            if limit is not None and runtime > limit:
+                overruns.append((runtime / max(limit, 1), straggler))
+
+        # the slowest first
+        overruns.sort(key=lambda x: x[0], reverse=True)
+        for _, j in overruns[:slots]:
+            assert j.jobID is not None
+            log.warning(
+                f"Job {j.name} (id {j.jobID}) runs longer than its siblings,"
+                " submitting a speculative copy"
+            )
+            j.racing.append(j.jobID)
+            j.submit(force=True, doNotSubmit=True)
+            self.sub_queue.append(j)
+
+    def _resolve_race(self, j: job) -> None:
+        """Keeps the copy of the job which finished first and removes
+        the others. If the current copy failed while another one is still
+        running, the other one becomes the current one.
+
+        Arguments:
+            j (job): job with speculative copies (see `job.racing`)
+        """
+        for other in list(j.racing):
+            try:
+                with open(j.config["log"].replace("$(JobId)", other)) as f:
+                    otherStatus, _ = parse_log(f.read())
+            except FileNotFoundError:
+                otherStatus = FalconryStatus.LOG_FILE_MISSING.value
+            if j.done:
+                log.info(f"Job {j.name}: copy {j.jobID} finished first")
+                j.racing.remove(other)
+                self._remove_ids([other])
+            elif otherStatus == FalconryStatus.COMPLETE.value:
+                log.info(f"Job {j.name}: copy {other} finished first")
+                if j.jobID is not None:
+                    self._remove_ids([j.jobID])
+                j.switch_to(other)
+                j.get_status()
+            elif otherStatus != 0:  # the other copy failed or was removed
+                j.racing.remove(other)
+            elif j.failed or j.lastStatus in [
+                FalconryStatus.REMOVED,
+                FalconryStatus.ABORTED_BY_USER,
+            ]:
+                log.info(f"Job {j.name}: copy {j.jobID} failed, keeping {other}")
+                j.switch_to(other)
+                j.get_status()
+
+    def _remove_ids(self, jobIDs: List[str]) -> None:
+        """Removes condor jobs with given IDs from the queue"""
+        import htcondor2 as htcondor
+
+        self.schedd.act(
+            htcondor.JobAction.Remove, id_constraint(jobIDs)  # type: ignore
+        )
+
+    def _pack_finished(self) -> None:
+        """Packs files of jobs in a final state (complete, failed or removed)
+        in the background, once there is at least `packLogs` of them.
+        Jobs queued for resubmission or racing a copy are not packed,
+        resubmitted jobs are packed again with the files of the new ID."""
+        if self.packLogs <= 0 or self.packer.busy:
+            return
+        queued = set(j.name for j in self.sub_queue)
+        finished = [
+            j
+            for j in self.jobs.values()
+            if j.lastStatus in _packedStatuses
+            and j.jobID is not None
+            and j.jobID not in self._packed
+            and j.name not in queued
+            and len(j.racing) == 0
+        ]
+        if len(finished) < self.packLogs:
+            return
+        log.debug("Packing files of %i finished jobs", len(finished))
+        files = [f for j in finished for f in j.all_files()]
+        ids = [j.jobID for j in finished if j.jobID is not None]
+
+        # only mark jobs as packed once the packing succeeded
+        def _done() -> None:
+            self._packed.update(ids)
+
+        self.packer.pack_async(files, _done)
+
     def _start_cli(self, sleep_time: int = 60) -> None:
         """Starts the manager, iteratively checking status of jobs.
 
@@ -654,12 +1509,13 @@ class manager:
                 break
 
             self._submit_jobs()
+            self._pack_finished()
 
             # save with timestamp every 30 events
             # most important for first event when first
             # batch of jobs is defined
             if event_counter % 30 == 0:
-                self._save()
+                self._save_async(quiet=False)
             event_counter += 1
 
             if not self._cli_interface(sleep_time):
@@ -696,35 +1552,41 @@ class manager:
             f"|-Checking status of jobs [{datetime.datetime.now()}]----------------|",
         )
 
-        cOld = copy.copy(c)
-        c.reset()
-        self._count_jobs(c)
-
-        # if no job is waiting nor running, finish the manager
-        if not (c.waiting + c.notSub + c.idle + c.run + c.held > 0):
-            self._print_summary(c)
-            return False
-
-        # only printout if something changed:
-        if c != cOld:
-            self._print_summary(c)
-
-            # Update current idle of jobs managed by manager.
-            # All new jobs submitted jobs in `check_dependence`
-            # will increase this number, that why we create different
-            # variable than `c.idle`
-            self.curJobIdle = c.idle
+        # statuses are evaluated only once within the check
+        with self.statusIndex.check_cycle():
+            cOld = copy.copy(c)
+            c.reset()
+            self._count_jobs(c)
+            if c.held > 0:
+                self._handle_held()
+            if self.speculativeCopies > 0:
+                self._speculate()
 
-            # checking dependencies and submitting ready jobs
-            self._check_dependence()
-            self._save(quiet=True)
-
-            # instead of sleeping wait for input
-            log.info(
-                "|-Enter 'h' to show all commands, e.g. to resubmit or show failed jobs|"
-            )
+            # if no job is waiting nor running, finish the manager
+            if not (c.waiting + c.notSub + c.idle + c.run + c.held > 0):
+                self._print_summary(c)
+                return False
+
+            # only printout if something changed:
+            if c != cOld:
+                self._print_summary(c)
+
+                # Update current idle of jobs managed by manager.
+                # All new jobs submitted jobs in `check_dependence`
+                # will increase this number, that why we create different
+                # variable than `c.idle`
+                self.curJobIdle = c.idle
+
+                # checking dependencies and submitting ready jobs
+                self._check_dependence()
+                self._save_async()
+
+                # instead of sleeping wait for input
+                log.info(
+                    "|-Enter 'h' to show all commands, e.g. to resubmit or show failed jobs|"
+                )
 
-        return True
+            return True
 
     def _cli_interface(self, sleep_time: int = 60) -> bool:  # noqa: ignore=C901
         """CLI interface for the manager.
@@ -732,6 +1594,7 @@ class manager:
         Possible commands:
             f: show failed jobs
             ff: show failed jobs and log paths
+            fs: group failed jobs by failure signature
             s: save manager state
             r: show running jobs
             rr: show running jobs and log paths
@@ -754,6 +1617,7 @@ class manager:
                 "f": "",
                 "x": "",
                 "ff": "",
+                "fs": "",
                 "retry all": "",
                 "r": "",
                 "rr": "",
@@ -774,6 +1638,9 @@ class manager:
             log.info(
                 "|-Enter 'f' to show failed jobs, 'ff' to also show log paths----------|"
             )
+            log.info(
+                "|-Enter 'fs' to group failed jobs by error signature------------------|"
+            )
             log.info(
                 "|-Enter 'r' to show running jobs, 'rr' to also show log paths---------|"
             )
@@ -783,6 +1650,8 @@ class manager:
             self._cli_interface(sleep_time)
         elif var == "ff":
             self.print_failed(True)
+        elif var == "fs":
+            self.print_failure_signatures()
         elif var == "r":
             self.print_running()
         elif var == "rr":
@@ -794,8 +1663,7 @@ class manager:
             log.info("MONITOR: EXITING")
             return False
         elif var == "retry all":
-            for j in self.jobs.values():
-                self._check_resubmit(j, True)
+            self._reconcile(retryFailed=True)
 
         return True
 
@@ -878,6 +1746,8 @@ class manager:
             gui (bool, optional): whether to use GUI. Defaults to False.
                 GUI is experimental!
         """
+        # dependencies may have changed since the jobs were added
+        self._criticalPath = None
         try:
             if gui:
                 self._start_gui(sleepTime)
@@ -898,3 +1768,6 @@ class manager:
             self._save()
             self.print_failed()
             sys.exit(2)
+        finally:
+            self._saver.flush()
+            self.packer.wait()
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger('falconry')
+
+
+class LogPacker:
+    """Packs files of finished jobs (logs, stdout, stderr) into per-batch
+    archive files `<n>.pack` with an index `<n>.idx` (path -> pack, offset
+    and size), to reduce the number of small files in the log directories.
+
+    Packing runs in a background thread, the original files are removed
+    only after both the pack and its index are written.
+
+    Arguments:
+        packDir (str): directory where the packs are stored
+    """
+
+    def __init__(self, packDir: str) -> None:
+        self.packDir = packDir
+        self.nPacks = 0
+        # original path -> (pack file, offset, size)
+        self.index: Dict[str, Tuple[str, int, int]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.load_index()
+
+    def load_index(self) -> None:
+        """Loads indices of all existing packs. Packs without an index
+        (packing failed, the original files were kept) are removed."""
+        if not os.path.isdir(self.packDir):
+            return
+        indices = set()
+        packs = set()
+        for entry in os.scandir(self.packDir):
+            stem, ext = os.path.splitext(entry.name)
+            if not stem.isdigit():
+                # index of a failed packing
+                if entry.name.endswith('.idx.tmp'):
+                    os.remove(entry.path)
+                continue
+            # next pack never overwrites an existing one
+            self.nPacks = max(self.nPacks, int(stem) + 1)
+            if ext == '.pack':
+                packs.add(entry.path)
+                continue
+            indices.add(os.path.join(self.packDir, f'{stem}.pack'))
+            with open(entry.path) as f:
+                index = json.load(f)
+            with self._lock:
+                for path, (pack, offset, size) in index.items():
+                    self.index[path] = (os.path.join(self.packDir, pack), offset, size)
+        for orphan in packs - indices:
+            log.debug(f'Removing pack without index {orphan}')
+            os.remove(orphan)
+
+    def is_packed(self, path: str) -> bool:
+        """Returns True if the file is packed"""
+        return path in self.index
+
+    def read(self, path: str) -> Optional[bytes]:
+        """Returns content of a packed file, `None` if the file is not packed.
+
+        Arguments:
+            path (str): original path of the file
+
+        Returns:
+            Optional[bytes]: content of the file
+        """
+        entry = self.index.get(path)
+        if entry is None:
+            return None
+        packFile, offset, size = entry
+        with open(packFile, 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    @property
+    def busy(self) -> bool:
+        """Returns True if packing is running in the background"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def pack(self, files: List[str]) -> None:
+        """Packs the files into a new pack and removes them.
+        Files which do not exist are ignored, symlinks to packed files
+        are removed and resolved to the packed target.
+
+        Arguments:
+            files (List[str]): paths of the files to pack
+        """
+        os.makedirs(self.packDir, exist_ok=True)
+        name = os.path.join(self.packDir, f'{self.nPacks:06d}')
+        self.nPacks += 1
+
+        # path -> (pack file, offset, size), pack file is relative to packDir
+        index: Dict[str, Tuple[str, int, int]] = {}
+        links: Dict[str, str] = {}
+        packFile = os.path.basename(f'{name}.pack')
+        with open(f'{name}.pack', 'wb') as fPack:
+            for path in files:
+                # symlinks point to the same entry as their target
+                if os.path.islink(path):
+                    links[path] = os.readlink(path)
+                    continue
+                try:
+                    with open(path, 'rb') as f:
+                        content = f.read()
+                except FileNotFoundError:
+                    continue
+                index[path] = (packFile, fPack.tell(), len(content))
+                fPack.write(content)
+            fPack.flush()
+            os.fsync(fPack.fileno())
+        for link, target in links.items():
+            if target in index:
+                index[link] = index[target]
+            elif target in self.index:  # packed before
+                packed, offset, size = self.index[target]
+                index[link] = (os.path.basename(packed), offset, size)
+
+        # write index atomically, the pack is only valid with its index
+        with open(f'{name}.idx.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(f'{name}.idx.tmp', f'{name}.idx')
+
+        with self._lock:
+            for path, (pack, offset, size) in index.items():
+                self.index[path] = (os.path.join(self.packDir, pack), offset, size)
+        for path in index:
+            os.remove(path)
+        log.debug(f'Packed {len(index)} files into {name}.pack')
+
+    def pack_async(
+        self, files: List[str], onDone: Optional[Callable[[], None]] = None
+    ) -> bool:
+        """Packs the files in a background thread.
+
+        Arguments:
+            files (List[str]): paths of the files to pack
+            onDone (Optional[Callable[[], None]], optional): called from the
+                thread once the files are packed successfully. Defaults to None.
+
+        Returns:
+            bool: False if previous packing is still running
+        """
+        if self.busy:
+            return False
+
+        def _run() -> None:
+            try:
+                self.pack(files)
+            except Exception as e:
+                # files stay where they are and will be packed next time
+                log.error(f'Failed to pack {len(files)} files: {e}')
+                return
+            if onDone is not None:
+                onDone()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+        return True
+
+    def wait(self) -> None:
+        """Waits for the background packing to finish"""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def clear(self) -> None:
+        """Forgets all packs of this packer (e.g. when the directory is deleted)"""
+        self.wait()
+        with self._lock:
+            self.index.clear()
+        self.nPacks = 0
@@ -1,11 +1,58 @@
 from .job import job
 from .schedd_wrapper import ScheddWrapper
+import functools
 import os
 import logging
+from typing import Dict
 
 log = logging.getLogger('falconry')
 
 
+@functools.lru_cache(maxsize=None)
+def _executable() -> str:
+    """Returns path to the `run_simple.sh` wrapper, checked only once"""
+    main_path = os.path.dirname(os.path.abspath(__file__))
+    executable = os.path.join(main_path, 'run_simple.sh')
+    if not os.path.isfile(executable):
+        log.error(f'Failed to find executable {executable}')
+        raise FileNotFoundError
+    return executable
+
+
+@functools.lru_cache(maxsize=None)
+def _condor_options(location: str, basedir: str, ncpu: int) -> Dict[str, str]:
+    """Returns condor options common to all quick jobs with the same
+    schedd, base directory and number of cpus. Computed only once,
+    the returned dictionary must not be modified.
+
+    Arguments:
+        location (str): address of the schedd
+        basedir (str): directory where the jobs are started from
+        ncpu (int): number of cpus
+
+    Returns:
+        Dict[str, str]: condor options
+    """
+    # and environenment
+    env = f'basedir={basedir};'
+
+    condor_options = {'environment': env, 'getenv': 'True'}
+    # Some cluster specific settings which might break submission on other clusters
+    if "cern.ch" in location:
+        condor_options["MY.SendCredential"] = "True"
+    elif "desy.de" in location:
+        condor_options["MY.SendCredential"] = "True"
+        condor_options["Requirements"] = '(OpSysAndVer == "RedHat9")'
+    if 'particle.cz' in location:
+        home = os.getenv("HOME")
+        if home is not None:
+            condor_options["x509userproxy"] = home + "/x509up_u{0}".format(os.geteuid())
+
+    if ncpu > 1:
+        condor_options['RequestCpus'] = str(ncpu)
+    return condor_options
+
+
 def quick_job(
     name: str,
     command: str,
@@ -13,14 +60,24 @@ def quick_job(
     logDir: str,
     time: int,
     ncpu: int = 1,
+    shards: int = 0,
+    makeDirs: bool = True,
 ) -> job:
     """Create job for given command.
 
+    Checks of the executable and cluster specific options are evaluated
+    only once, so this can be called for many commands.
+
     Arguments:
         name (str): name of the job
         command (str): command to run
         mgr (manager): HTCondor manager
         time (int): expected runtime
+        ncpu (int, optional): number of cpus. Defaults to 1.
+        shards (int, optional): levels of prefix directories of the
+            job directories, see `job.set_simple`. Defaults to 0.
+        makeDirs (bool, optional): create the job directories,
+            see `job.set_simple`. Defaults to True.
     Returns:
         job: created job
     """
@@ -28,42 +85,16 @@ def quick_job(
     j = job(name, schedd)
 
     # set the executable and the path to the log files
-    main_path = os.path.dirname(os.path.abspath(__file__))
-    executable = os.path.join(main_path, 'run_simple.sh')
-    if not os.path.isfile(executable):
-        log.error(f'Failed to find executable {executable}')
-        raise FileNotFoundError
-    j.set_simple(
-        executable,
-        logDir,
-    )
+    j.set_simple(_executable(), logDir, shards, makeDirs)
 
-    is_desy = "desy.de" in schedd.location
+    location = str(schedd.location)
 
     # expected runtime
-    j.set_time(time, useRequestRuntime=is_desy)
+    j.set_time(time, useRequestRuntime="desy.de" in location)
 
     # set the command
     j.set_arguments(f'{name} {command}')
 
-    # and environenment
-    basedir = os.path.abspath('.')
-    env = f'basedir={basedir};'
-
-    condor_options = {'environment': env, 'getenv': 'True'}
-    # Some cluster specific settings which might break submission on other clusters
-    if "cern.ch" in str(schedd.location):
-        condor_options["MY.SendCredential"] = "True"
-    elif is_desy:
-        condor_options["MY.SendCredential"] = "True"
-        condor_options["Requirements"] = '(OpSysAndVer == "RedHat9")'
-    if 'particle.cz' in str(schedd.location):
-        home = os.getenv("HOME")
-        if home is not None:
-            condor_options["x509userproxy"] = home + "/x509up_u{0}".format(os.geteuid())
-
-    if ncpu > 1:
-        condor_options['RequestCpus'] = str(ncpu)
-    j.set_custom(condor_options)
+    j.set_custom(_condor_options(location, os.path.abspath('.'), ncpu))
 
     return j
@@ -0,0 +1,289 @@
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils import event_time
+
+log = logging.getLogger('falconry')
+
+_eventPattern = re.compile(r'^([0-9]{3}) \([0-9.]+\) (\S+) (\S+) ')
+_separatorPattern = re.compile(r'^\.\.\.$', re.MULTILINE)
+_returnPattern = re.compile(r'Normal termination \(return value (-?[0-9]+)\)')
+
+# usage, request and allocation of a resource, usage can be missing
+Resource = Tuple[Optional[float], Optional[float], Optional[float]]
+
+
+def _resource(line: str) -> Optional[Tuple[str, Resource]]:
+    """Parses a line of the "Partitionable Resources" table,
+    e.g. `   Memory (MB)  :  1200  2048  2048`
+
+    Returns:
+        Optional[Tuple[str, Resource]]: name of the resource (first word)
+            and its usage, request and allocation
+    """
+    name, _, values = line.partition(":")
+    if values == "":
+        return None
+    numbers = []
+    for value in values.split():
+        try:
+            numbers.append(float(value))
+        except ValueError:  # e.g. assigned GPU names
+            break
+    if len(numbers) >= 3:
+        return name.split()[0], (numbers[0], numbers[1], numbers[2])
+    if len(numbers) == 2:
+        return name.split()[0], (None, numbers[0], numbers[1])
+    return None
+
+
+def _parse_termination(lines: List[str], events: Dict[str, Any]) -> None:
+    """Reads exit code and resources from the body of a termination event"""
+    events["resources"] = {}
+    inResources = False
+    for line in lines:
+        if "Partitionable Resources" in line:
+            inResources = True
+        elif inResources:
+            resource = _resource(line)
+            if resource is not None:
+                events["resources"][resource[0]] = resource[1]
+        else:
+            returnValue = _returnPattern.search(line)
+            if returnValue is not None:
+                events["exitCode"] = int(returnValue.group(1))
+
+
+def parse_events(search: str) -> Dict[str, Any]:
+    """Evaluates timing and resource usage from the events of a condor log
+    file of a single job (submission `000`, execution `001`
+    and termination `005`). The latest event of each kind is used,
+    e.g. the last start of a job which was evicted.
+
+    Arguments:
+        search (str): content of the log file
+
+    Returns:
+        Dict[str, Any]: `submitted`, `started` and `ended` unix timestamps,
+            `exitCode` and `resources` (e.g. `"Memory"` to usage,
+            request and allocation in MB), missing values are `None`
+    """
+    events: Dict[str, Any] = {
+        "submitted": None,
+        "started": None,
+        "ended": None,
+        "exitCode": None,
+        "resources": {},
+    }
+    keys = {"000": "submitted", "001": "started", "005": "ended"}
+    # events are separated by lines with `...`
+    for event in _separatorPattern.split(search):
+        lines = event.strip("\n").split("\n")
+        match = _eventPattern.match(lines[0])
+        if match is None or match.group(1) not in keys:
+            continue
+        try:
+            events[keys[match.group(1)]] = event_time(match.group(2), match.group(3))
+        except ValueError:
+            log.debug(f"Failed to parse time of event: {lines[0]}")
+        if match.group(1) == "005":
+            _parse_termination(lines[1:], events)
+    return events
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Returns the q-th percentile of the values, linearly interpolated
+
+    Arguments:
+        values (List[float]): values
+        q (float): percentile, between 0 and 100
+
+    Returns:
+        Optional[float]: percentile, `None` if there are no values
+    """
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class RuntimeDB:
+    """Persistent database of finished jobs (SQLite), keyed by the job name.
+
+    Records timing (submission, start, end), exit code and resource usage
+    of each run of a job. The database can be shared by many managers
+    (e.g. `~/.falconry/runtimes.db`), runs are distinguished by the
+    manager directory and the job ID, so recording a run again
+    only updates it.
+
+    .. code-block:: python
+
+        from falconry import RuntimeDB
+        db = RuntimeDB("~/.falconry/runtimes.db")
+        db.runtime_p95("ntuple_*")
+
+    Arguments:
+        path (str): path to the database file, created if it does not exist
+    """
+
+    _columns = [
+        "name",
+        "jobID",
+        "source",
+        "submitted",
+        "started",
+        "ended",
+        "exitCode",
+        "cpusUsage",
+        "cpusRequest",
+        "memoryUsage",
+        "memoryRequest",
+        "diskUsage",
+        "diskRequest",
+        "recorded",
+    ]
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.abspath(os.path.expanduser(path))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # waits for other managers writing at the same time
+        self._db = sqlite3.connect(self.path, timeout=60)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "name TEXT NOT NULL, jobID TEXT NOT NULL, source TEXT NOT NULL, "
+                "submitted INTEGER, started INTEGER, ended INTEGER, "
+                "exitCode INTEGER, cpusUsage REAL, cpusRequest REAL, "
+                "memoryUsage REAL, memoryRequest REAL, "
+                "diskUsage REAL, diskRequest REAL, recorded INTEGER, "
+                "PRIMARY KEY (source, jobID))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS runsName ON runs (name)")
+
+    def close(self) -> None:
+        """Closes the database"""
+        self._db.close()
+
+    def record(
+        self, name: str, jobID: str, events: Dict[str, Any], source: str = ""
+    ) -> None:
+        """Records a run of a job
+
+        Arguments:
+            name (str): name of the job
+            jobID (str): condor job ID of the run
+            events (Dict[str, Any]): timing and resources, see `parse_events`
+            source (str, optional): identification of the manager,
+                e.g. its directory. Defaults to "".
+        """
+        resources = events.get("resources", {})
+
+        def _value(resource: str, i: int) -> Optional[float]:
+            return resources[resource][i] if resource in resources else None
+
+        row = [
+            name,
+            jobID,
+            source,
+            events.get("submitted"),
+            events.get("started"),
+            events.get("ended"),
+            events.get("exitCode"),
+            _value("Cpus", 0),
+            _value("Cpus", 1),
+            _value("Memory", 0),
+            _value("Memory", 1),
+            _value("Disk", 0),
+            _value("Disk", 1),
+            int(time.time()),
+        ]
+        placeholders = ", ".join("?" * len(row))
+        with self._db:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(self._columns)}) "
+                f"VALUES ({placeholders})",
+                row,
+            )
+
+    def runs(self, pattern: str = "*", succeeded: bool = True) -> List[Dict[str, Any]]:
+        """Returns recorded runs of jobs matching the pattern,
+        oldest first.
+
+        Arguments:
+            pattern (str, optional): shell-style pattern of job names
+                (e.g. `ntuple_*`). Defaults to all jobs.
+            succeeded (bool, optional): only runs with exit code 0.
+                Defaults to True.
+
+        Returns:
+            List[Dict[str, Any]]: runs, see `RuntimeDB._columns`
+        """
+        query = f"SELECT {', '.join(self._columns)} FROM runs"
+        conditions = []
+        args: List[Any] = []
+        if pattern != "*":
+            # GLOB uses the shell syntax and is case sensitive
+            conditions.append("name GLOB ?")
+            args.append(pattern)
+        if succeeded:
+            conditions.append("exitCode = 0")
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY ended"
+        return [dict(zip(self._columns, row)) for row in self._db.execute(query, args)]
+
+    def runtimes(self, pattern: str = "*") -> List[float]:
+        """Returns runtimes (end - start) in seconds of the successful runs
+        of jobs matching the pattern (see `runs`).
+
+        Arguments:
+            pattern (str, optional): pattern of job names. Defaults to all jobs.
+
+        Returns:
+            List[float]: runtimes
+        """
+        return [
+            run["ended"] - run["started"]
+            for run in self.runs(pattern)
+            if run["ended"] is not None and run["started"] is not None
+        ]
+
+    def runtime_percentile(self, pattern: str, q: float) -> Optional[float]:
+        """Returns the q-th percentile of the runtimes of jobs
+        matching the pattern, `None` if no run was recorded.
+
+        Arguments:
+            pattern (str): pattern of job names (e.g. `ntuple_*`)
+            q (float): percentile, between 0 and 100
+
+        Returns:
+            Optional[float]: runtime in seconds
+        """
+        return percentile(self.runtimes(pattern), q)
+
+    def runtime_p50(self, pattern: str = "*") -> Optional[float]:
+        """Returns median runtime of jobs matching the pattern"""
+        return self.runtime_percentile(pattern, 50)
+
+    def runtime_p95(self, pattern: str = "*") -> Optional[float]:
+        """Returns 95th percentile of runtimes of jobs matching the pattern"""
+        return self.runtime_percentile(pattern, 95)
+
+    def queue_p50(self, pattern: str = "*") -> Optional[float]:
+        """Returns median time between submission and start of jobs
+        matching the pattern"""
+        return percentile(
+            [
+                run["started"] - run["submitted"]
+                for run in self.runs(pattern)
+                if run["started"] is not None and run["submitted"] is not None
+            ],
+            50,
+        )
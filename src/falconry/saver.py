@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+log = logging.getLogger('falconry')
+
+
+class BackgroundSaver:
+    """Writes snapshots of the manager state in a background thread,
+    so that the monitoring loop does not wait for serialisation and I/O.
+
+    Requests are coalesced, only the latest snapshot is written and
+    at most once per `interval` seconds (unless flushed).
+
+    Arguments:
+        write (Callable[[Dict[str, Any], bool], None]): writes the snapshot,
+            second argument is `quiet` (see `manager._save`)
+        interval (float, optional): minimal time between two writes
+            in seconds. Defaults to 5.
+    """
+
+    def __init__(
+        self, write: Callable[[Dict[str, Any], bool], None], interval: float = 5.0
+    ) -> None:
+        self.write = write
+        self.interval = interval
+        self._cond = threading.Condition()
+        # latest snapshot waiting to be written and its `quiet` flag
+        self._pending: Optional[Tuple[Dict[str, Any], bool]] = None
+        self._writing = False
+        self._flush = False
+        self._lastWrite = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def request(self, output: Dict[str, Any], quiet: bool = True) -> None:
+        """Schedules the snapshot to be written, replacing any snapshot
+        which was not written yet. If any of the replaced snapshots was
+        not quiet, the written one is not quiet either.
+
+        Arguments:
+            output (Dict[str, Any]): snapshot of the state, must not be
+                modified afterwards
+            quiet (bool, optional): see `manager._save`. Defaults to True.
+        """
+        with self._cond:
+            if self._pending is not None:
+                quiet = quiet and self._pending[1]
+            self._pending = (output, quiet)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Writes the pending snapshot immediately and waits until
+        all writing is finished."""
+        with self._cond:
+            self._flush = True
+            self._cond.notify_all()
+            while self._pending is not None or self._writing:
+                self._cond.wait()
+            self._flush = False
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    if not self._cond.wait(timeout=60):
+                        # nothing to do for a while, thread is started again
+                        # by the next request
+                        self._thread = None
+                        return
+                # debounce, wait for more changes unless flushed
+                while not self._flush:
+                    remaining = self._lastWrite + self.interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+                assert self._pending is not None
+                output, quiet = self._pending
+                self._pending = None
+                self._writing = True
+            try:
+                self.write(output, quiet)
+            except Exception as e:
+                log.error(f"Failed to save the state of the manager: {e}")
+            finally:
+                with self._cond:
+                    self._lastWrite = time.monotonic()
+                    self._writing = False
+                    self._cond.notify_all()
@@ -1,10 +1,12 @@
-import htcondor2 as htcondor
 import logging
 import functools
-from typing import Callable, Any
+from typing import Callable, Any, TYPE_CHECKING
 import time
 from .postpone_signal import postpone_signal
 
+if TYPE_CHECKING:
+    import htcondor2 as htcondor
+
 log = logging.getLogger('falconry')
 
 
@@ -14,6 +16,8 @@ def schedd_check(func: Callable[["ScheddWrapper"], Any]) -> Any:
     def wrapper(
         self: "ScheddWrapper", *args: Any, **kwargs: Any
     ) -> Callable[["ScheddWrapper"], Any]:
+        import htcondor2 as htcondor
+
         try:
             # Since htcondor 25 I see segfaults on SIGINT when calling
             # htcondor function and dont have the time to trace an report
@@ -34,6 +38,8 @@ def schedd_check(func: Callable[["ScheddWrapper"], Any]) -> Any:
 
 def kerberos_auth() -> None:
     """Add kerberos creds to the schedd"""
+    import htcondor2 as htcondor
+
     try:
         credd = htcondor.Credd()
         credd.add_user_cred(htcondor.CredTypes.Kerberos, None)
@@ -44,9 +50,15 @@ def kerberos_auth() -> None:
 
 
 class ScheddWrapper:
-    """Wrapper to allow reload of schedd"""
+    """Wrapper to allow reload of schedd.
+
+    The htcondor bindings are only imported once the wrapper is created,
+    so that importing falconry (e.g. for `--help` or `pmux`) stays fast.
+    """
 
     def __init__(self) -> None:
+        import htcondor2 as htcondor
+
         self.schedd = htcondor.Schedd()
 
     @property
@@ -69,5 +81,9 @@ class ScheddWrapper:
         return self.schedd.history(*args, **kwargs)
 
     @schedd_check
-    def submit(self, *args: Any, **kwargs: Any) -> htcondor.SubmitResult:
+    def submit(self, *args: Any, **kwargs: Any) -> "htcondor.SubmitResult":
         return self.schedd.submit(*args, **kwargs)
+
+    @schedd_check
+    def edit(self, *args: Any, **kwargs: Any) -> Any:
+        return self.schedd.edit(*args, **kwargs)
@@ -0,0 +1,168 @@
+import math
+from typing import Any, Dict, List, Optional
+
+from .runtimes import percentile
+
+# HoldReasonCode of jobs which exceeded their resources
+# (memory or disk limit enforced by the startd)
+HOLD_OUT_OF_RESOURCES = 34
+# `allowed_job_duration` and `allowed_execute_duration` exceeded, these
+# limits are not given by the requests of the job, so they cannot be raised
+HOLD_DURATION_EXCEEDED = (46, 47)
+# periodic hold by the job or the system policy, e.g. sites holding jobs
+# with MemoryUsage > RequestMemory, the reason tells what was exceeded
+HOLD_POLICY = (3, 26)
+
+# number of latest runs of a job used to estimate its requests
+HISTORY_RUNS = 20
+
+# queue attribute of each resource and the corresponding submit key
+REQUESTS = {
+    "memory": ("RequestMemory", "request_memory"),
+    "disk": ("RequestDisk", "request_disk"),
+    "runtime": ("MaxRuntime", "+MaxRuntime"),
+}
+
+
+def exceeded_resource(code: int, reason: str) -> Optional[str]:
+    """Returns the resource which the held job exceeded, if any
+
+    Arguments:
+        code (int): HoldReasonCode of the job
+        reason (str): HoldReason of the job
+
+    Returns:
+        Optional[str]: `"memory"`, `"disk"` or `"runtime"`,
+            `None` if the job was not held for exceeding its requests
+    """
+    reason = reason.lower()
+    if code != HOLD_OUT_OF_RESOURCES and code not in HOLD_POLICY:
+        return None
+    if "memory" in reason:
+        return "memory"
+    if "disk" in reason:
+        return "disk"
+    if any(word in reason for word in ["runtime", "wall", "time limit"]):
+        return "runtime"
+    return None
+
+
+def config_key(config: Dict[str, str], key: str) -> str:
+    """Returns key of the job configuration which sets the same submit
+    command as `key`, e.g. `RequestCpus` for `request_cpus`. Submit
+    commands are case insensitive and underscores are optional.
+
+    Arguments:
+        config (Dict[str, str]): configuration of the job
+        key (str): submit command
+
+    Returns:
+        str: key already in the configuration, `key` if there is none
+    """
+
+    def _normalized(k: str) -> str:
+        return k.lower().replace("_", "")
+
+    for existing in config:
+        if _normalized(existing) == _normalized(key):
+            return existing
+    return key
+
+
+def _round_up(value: float, step: int) -> int:
+    return max(step, math.ceil(value / step) * step)
+
+
+def bumped_request(
+    resource: str, ad: Dict[str, Any], factor: float = 1.5, headroom: float = 0.2
+) -> Optional[int]:
+    """Returns new request of a resource for a job which exceeded it:
+    the current request times `factor`, or the observed usage plus
+    headroom if larger.
+
+    Arguments:
+        resource (str): resource, see `exceeded_resource`
+        ad (Dict[str, Any]): queue ad of the job with the request
+            (`RequestMemory`, `RequestDisk` or `MaxRuntime`)
+            and the usage (`MemoryUsage`, `DiskUsage`)
+        factor (float, optional): factor for the request. Defaults to 1.5.
+        headroom (float, optional): fraction added to the usage.
+            Defaults to 0.2.
+
+    Returns:
+        Optional[int]: new request (MB, KB or seconds),
+            `None` if the current request is unknown
+    """
+    attribute = REQUESTS[resource][0]
+    try:
+        request = float(ad[attribute])
+    except (KeyError, TypeError, ValueError):
+        return None
+    usage = {"memory": "MemoryUsage", "disk": "DiskUsage"}.get(resource)
+    new = request * factor
+    if usage is not None and ad.get(usage) is not None:
+        new = max(new, float(ad[usage]) * (1 + headroom))
+    return _round_up(new, 60 if resource == "runtime" else 64)
+
+
+def estimate_requests(
+    runs: List[Dict[str, Any]], config: Dict[str, str], headroom: float = 0.2
+) -> Dict[str, str]:
+    """Returns submit requests of a job from its previous runs
+    (see `runtimes.RuntimeDB.runs`): the largest memory and disk usage
+    and 95th percentile of the runtime of successful runs, plus headroom.
+    Cpus are the largest usage rounded up, only if more than requested,
+    as io bound jobs use less than the number of their threads.
+    Existing keys of the configuration are kept (see `config_key`).
+
+    The runtime is only set if the job already has a time limit
+    (`+MaxRuntime` or `+RequestRuntime`, see `job.set_time`).
+
+    Arguments:
+        runs (List[Dict[str, Any]]): previous runs of the job, latest last
+        config (Dict[str, str]): configuration of the job
+        headroom (float, optional): fraction added to the usage.
+            Defaults to 0.2.
+
+    Returns:
+        Dict[str, str]: submit configuration to update,
+            empty if there are no runs with the usage
+    """
+    runs = runs[-HISTORY_RUNS:]
+    requests: Dict[str, str] = {}
+
+    def _values(key: str) -> List[float]:
+        return [run[key] for run in runs if run[key] is not None]
+
+    memory = _values("memoryUsage")
+    if len(memory) > 0:
+        key = config_key(config, "request_memory")
+        requests[key] = str(_round_up(max(memory) * (1 + headroom), 64))
+    disk = _values("diskUsage")
+    if len(disk) > 0:
+        key = config_key(config, "request_disk")
+        requests[key] = str(_round_up(max(disk) * (1 + headroom), 1024))
+    cpus = _values("cpusUsage")
+    if len(cpus) > 0:
+        key = config_key(config, "request_cpus")
+        # usage is slightly above the number of cores busy e.g. by io
+        used = math.ceil(max(cpus) - 0.05)
+        if used > int(config.get(key, 1)):
+            requests[key] = str(used)
+
+    runtime = percentile(
+        [
+            run["ended"] - run["started"]
+            for run in runs
+            if run["exitCode"] == 0
+            and run["ended"] is not None
+            and run["started"] is not None
+        ],
+        95,
+    )
+    if runtime is not None:
+        runtime = _round_up(runtime * (1 + headroom), 60)
+        for key in ["+MaxRuntime", "+RequestRuntime"]:
+            if key in config:
+                requests[key] = str(runtime)
+    return requests
@@ -0,0 +1,70 @@
+import re
+from typing import Dict, List, Optional
+
+from .runtimes import percentile
+
+# number at the end of the name, with the separator before it
+_trailingNumber = re.compile(r'[_\-.]*[0-9]+$')
+
+
+def sibling_group(name: str) -> str:
+    """Returns group of sibling jobs of the job, i.e. its name without
+    the trailing number (`ntuple_mc_042` -> `ntuple_mc`).
+
+    Arguments:
+        name (str): name of the job
+
+    Returns:
+        str: name of the group
+    """
+    return _trailingNumber.sub('', name)
+
+
+class SiblingRuntimes:
+    """Runtimes of the completed jobs, grouped by `sibling_group`,
+    to decide which running jobs are stragglers.
+
+    Arguments:
+        q (float, optional): percentile of the runtimes of the siblings
+            which a straggler exceeds. Defaults to 95.
+        minSiblings (int, optional): minimal number of completed siblings,
+            jobs with less are never stragglers. Defaults to 10.
+    """
+
+    def __init__(self, q: float = 95, minSiblings: int = 10) -> None:
+        self.q = q
+        self.minSiblings = minSiblings
+        self._runtimes: Dict[str, List[float]] = {}
+        # limit of each group, invalidated when a runtime is added
+        self._limits: Dict[str, Optional[float]] = {}
+
+    def add(self, name: str, runtime: float) -> None:
+        """Adds runtime of a completed job
+
+        Arguments:
+            name (str): name of the job
+            runtime (float): runtime in seconds
+        """
+        group = sibling_group(name)
+        self._runtimes.setdefault(group, []).append(runtime)
+        self._limits.pop(group, None)
+
+    def limit(self, name: str) -> Optional[float]:
+        """Returns runtime after which the job is a straggler,
+        `None` if there are not enough completed siblings
+
+        Arguments:
+            name (str): name of the job
+
+        Returns:
+            Optional[float]: runtime in seconds
+        """
+        group = sibling_group(name)
+        if group not in self._limits:
+            runtimes = self._runtimes.get(group, [])
+            self._limits[group] = (
+                percentile(runtimes, self.q)
+                if len(runtimes) >= self.minSiblings
+                else None
+            )
+        return self._limits[group]
@@ -1,4 +1,7 @@
+import time
+from contextlib import contextmanager
 from enum import Enum
+from typing import Dict, Iterator, List, Optional
 
 
 class FalconryStatus(Enum):
@@ -16,3 +19,79 @@ class FalconryStatus(Enum):
     ABNORMAL_TERMINATION = 11
     ABORTED_BY_USER = 12
     FAILED = 13
+
+
+class StatusIndex:
+    """Index of job names by their last status, so that jobs with given
+    status can be listed without checking all jobs.
+
+    Updated by the jobs whenever their `lastStatus` changes,
+    also keeps time when the job got into the status.
+    """
+
+    def __init__(self) -> None:
+        self._byStatus: Dict[FalconryStatus, Dict[str, float]] = {
+            status: {} for status in FalconryStatus
+        }
+        self._status: Dict[str, FalconryStatus] = {}
+        # check cycle of the manager, statuses evaluated within
+        # the current cycle are not evaluated again (see `job.get_status`),
+        # `None` outside of a check
+        self.cycle: Optional[int] = None
+        self._cycles = 0
+
+    @contextmanager
+    def check_cycle(self) -> Iterator[None]:
+        """Check cycle of the manager, each status is evaluated
+        only once within the block and again in the next one"""
+        self._cycles += 1
+        self.cycle = self._cycles
+        try:
+            yield
+        finally:
+            self.cycle = None
+
+    def update(self, name: str, status: FalconryStatus) -> None:
+        """Sets status of the job, does nothing if the status did not change
+
+        Arguments:
+            name (str): name of the job
+            status (FalconryStatus): new status
+        """
+        old = self._status.get(name)
+        if old is status:
+            return
+        if old is not None:
+            del self._byStatus[old][name]
+        self._status[name] = status
+        self._byStatus[status][name] = time.time()
+
+    def remove(self, name: str) -> None:
+        """Removes the job from the index
+
+        Arguments:
+            name (str): name of the job
+        """
+        old = self._status.pop(name, None)
+        if old is not None:
+            del self._byStatus[old][name]
+
+    def names(self, status: FalconryStatus, olderThan: float = 0) -> List[str]:
+        """Returns names of jobs with given status
+
+        Arguments:
+            status (FalconryStatus): status of the jobs
+            olderThan (float, optional): only jobs which are in the status
+                for at least this many seconds. Defaults to 0.
+
+        Returns:
+            List[str]: names of the jobs, ordered by time of the status change
+        """
+        if olderThan <= 0:
+            return list(self._byStatus[status])
+        limit = time.time() - olderThan
+        return [name for name, since in self._byStatus[status].items() if since <= limit]
+
+    def count(self, status: FalconryStatus) -> int:
+        """Returns number of jobs with given status"""
+        return len(self._byStatus[status])
@@ -1,9 +1,15 @@
-from typing import Union, List
+from typing import Union, List, Dict, Iterable, Optional, Tuple
 import os
+import re
+import zlib
 import subprocess
 import logging
 import shutil
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .pack import LogPacker
 
 log = logging.getLogger('falconry')
 
@@ -61,31 +67,209 @@ def clean_dir(dir_path: str, keep_files: set[str]) -> None:
             entry.unlink()
 
 
-# Source - https://stackoverflow.com/a/73195814
-# Posted by Jazz Weisman
-# Retrieved 2026-03-18, License - CC BY-SA 4.0
+def shard_prefix(name: str, levels: int) -> List[str]:
+    """Returns hashed prefix directories for given name, e.g. `['3f', 'a1']`
+    for two levels. Used to avoid too many entries in a single directory.
+
+    Arguments:
+        name (str): name to hash (e.g. job name)
+        levels (int): number of prefix directories, 0 for none, at most 4
+
+    Returns:
+        List[str]: list of prefix directories
+    """
+    if levels <= 0:
+        return []
+    # crc32 is enough to spread names and unlike md5 works on FIPS hosts
+    digest = f'{zlib.crc32(name.encode()):08x}'
+    return [digest[2 * i: 2 * i + 2] for i in range(min(levels, 4))]
+
 
+def event_time(day: str, clock: str) -> int:
+    """Returns unix timestamp of a HTCondor log event from its date and time.
 
-def tail_file(filename: str, lines: int = 10) -> str:
-    """Returns the nth before last line of a file (n=1 gives last line).
+    Both the ISO (`2024-03-18 12:34:56`) and the old (`03/18 12:34:56`)
+    date formats are supported. The latter has no year, current year is
+    assumed unless the date would be in the future (e.g. job submitted
+    on Dec 31 and read on Jan 1), then previous year is used.
+
+    Arguments:
+        day (str): date of the event
+        clock (str): time of the event, fractions of seconds are ignored
+
+    Returns:
+        int: unix timestamp
+
+    Raises:
+        ValueError: if the date or time cannot be parsed
+    """
+    date = f'{day} {clock.split(".")[0]}'
+    if '/' in day:
+        year = time.localtime().tm_year
+        fmt = '%Y/%m/%d %H:%M:%S'
+        timestamp = int(time.mktime(time.strptime(f'{year}/{date}', fmt)))
+        if timestamp > time.time() + 24 * 60 * 60:
+            timestamp = int(time.mktime(time.strptime(f'{year - 1}/{date}', fmt)))
+        return timestamp
+    return int(time.mktime(time.strptime(date, '%Y-%m-%d %H:%M:%S')))
+
+
+def read_submit_event(
+    logFile: str, maxLines: int = 20
+) -> Tuple[Optional[int], Optional[str]]:
+    """Returns the submission time and the notes (`submit_event_notes`,
+    falconry sets the job name there) from the `000` (submit) event
+    of a HTCondor job log, without asking the schedd.
+    See `event_time` for the supported date formats.
+
+    Arguments:
+        logFile (str): path to the log file
+        maxLines (int, optional): number of lines to search. Defaults to 20.
+
+    Returns:
+        Tuple[Optional[int], Optional[str]]: unix timestamp and notes,
+            `None` if not found
+    """
+    pattern = re.compile(r'^000 \([0-9.]+\) (\S+) (\S+) Job submitted')
+    try:
+        with open(logFile, 'r') as f:
+            for _ in range(maxLines):
+                line = f.readline()
+                if line == '':
+                    break
+                match = pattern.match(line)
+                if match is None:
+                    continue
+                timestamp = event_time(match.group(1), match.group(2))
+
+                # notes are on the following (indented) line of the event
+                notes = None
+                line = f.readline()
+                if line[:1].isspace() and line.strip() not in ('', '...'):
+                    notes = line.strip()
+                return timestamp, notes
+    except (OSError, ValueError) as e:
+        log.debug(f'Failed to read submit event from {logFile}: {e}')
+    return None, None
+
+
+def read_submit_time(logFile: str, maxLines: int = 20) -> Optional[int]:
+    """Returns the submission time from the `000` (submit) event
+    of a HTCondor job log, see `read_submit_event`.
+
+    Arguments:
+        logFile (str): path to the log file
+        maxLines (int, optional): number of lines to search. Defaults to 20.
+
+    Returns:
+        Optional[int]: unix timestamp, `None` if not found
+    """
+    return read_submit_event(logFile, maxLines)[0]
+
+
+def _last_lines(content: bytes, lines: int) -> str:
+    """Returns last `lines` lines of the content as a string"""
+    if lines <= 0:
+        return ''
+    # only newlines separate lines, as counted when reading the blocks,
+    # e.g. `\r` of progress bars does not
+    ends = content.endswith(b'\n')
+    parts = (content[:-1] if ends else content).split(b'\n')
+    tail = b'\n'.join(parts[-lines:]) + (b'\n' if ends else b'')
+    return tail.decode(errors='replace')
+
+
+def tail_file(
+    filename: str,
+    lines: int = 10,
+    packer: Optional[LogPacker] = None,
+    blockSize: int = 64 * 1024,
+) -> str:
+    """Returns the last `lines` lines of a file.
+
+    The file is read backwards in blocks of `blockSize` bytes,
+    so only few reads are needed even for large files on network storage.
 
     Arguments:
         filename (str): path to the file
         lines (int, optional): number of lines to return. Defaults to 10.
+        packer (Optional[LogPacker], optional): packer to read the file from
+            if it was already packed. Defaults to None.
+        blockSize (int, optional): size of the read blocks. Defaults to 64 kB.
 
     Returns:
-        str: last line of the file
+        str: last lines of the file
     """
-    num_newlines = 0
+    if packer is not None and not os.path.exists(filename):
+        content = packer.read(filename)
+        if content is not None:
+            return _last_lines(content, lines)
+
     with open(filename, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        data = b''
+        # one more newline than lines, the file can end with a newline
+        # and the first line in the block can be incomplete
+        while pos > 0 and data.count(b'\n') <= lines:
+            step = min(blockSize, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+        return _last_lines(data, lines)
+
+
+def tail_files(
+    filenames: List[str],
+    lines: int = 10,
+    packer: Optional[LogPacker] = None,
+    workers: int = 16,
+) -> Dict[str, str]:
+    """Returns the last lines of many files, read concurrently
+    (reading is dominated by the storage latency, not by python).
+
+    Files which cannot be read are returned as empty strings.
+
+    Arguments:
+        filenames (List[str]): paths to the files
+        lines (int, optional): number of lines to return. Defaults to 10.
+        packer (Optional[LogPacker], optional): packer to read the files from
+            if they were already packed. Defaults to None.
+        workers (int, optional): number of reading threads. Defaults to 16.
+
+    Returns:
+        Dict[str, str]: path to last lines of the file
+    """
+
+    def _tail(filename: str) -> str:
         try:
-            f.seek(-2, os.SEEK_END)
-            while num_newlines < lines:
-                f.seek(-2, os.SEEK_CUR)
-                if f.read(1) == b'\n':
-                    num_newlines += 1
-                if f.tell() == 0:
-                    break
-        except OSError:
-            f.seek(0)
-        return ''.join([line.decode() for line in f.readlines()])
+            return tail_file(filename, lines, packer)
+        except OSError as e:
+            log.warning(f'Failed to read {filename}: {e}')
+            return ''
+
+    if len(filenames) == 0:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(filenames))) as pool:
+        return dict(zip(filenames, pool.map(_tail, filenames)))
+
+
+def make_dirs(paths: Iterable[str]) -> None:
+    """Creates directories (and their parents) at once. Each parent
+    is created only once, so for many directories in the same parent
+    this is a single `mkdir` per directory.
+
+    Arguments:
+        paths (Iterable[str]): directories to create
+    """
+    existing: set[str] = set()
+    for path in sorted(set(paths)):
+        parent = os.path.dirname(path)
+        if parent not in existing:
+            os.makedirs(parent, exist_ok=True)
+            existing.add(parent)
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            pass
+        existing.add(path)
@@ -16,23 +16,48 @@ class MockSchedd:
         self.job_history = defaultdict(dict)
         self.job_id_counter = 1
         self.log_files = {}  # Simulate log files per job
+        self.query_calls = 0
+        self.history_calls = 0
+        self.location = "mock"
 
     def submit(self, job_description, itemdata=None):
         """Simulates the submission of a job."""
         if itemdata == [] or itemdata is None:
             itemdata = [None]
-        for i, _ in enumerate(itemdata):
+        for i, item in enumerate(itemdata):
             job_id = f"{self.job_id_counter}.{i}"
 
             # Replace $(JobId) in the log file path
             log_file_path = job_description.get("Log", "mock_condor_$(JobId).log")
             log_file_path = log_file_path.replace("$(JobId)", str(job_id))
 
-            # Create an initial log file
-            self._write_log_file(log_file_path, "Job is idle.")
+            # Create an initial log file with the submit event
+            notes = (item or {}).get("submit_event_notes") or job_description.get(
+                "submit_event_notes"
+            )
+            event = (
+                f"000 ({self.job_id_counter:03d}.{i:03d}.000) "
+                f"{time.strftime('%Y-%m-%d %H:%M:%S')} Job submitted from host: <mock>\n"
+            )
+            if notes:
+                event += f"    {notes}\n"
+            self._write_log_file(log_file_path, event + "...\nJob is idle.", new=True)
+
+            def _attribute(*keys):
+                for key in keys:
+                    value = (item or {}).get(key) or job_description.get(key)
+                    if value:
+                        return value
+                return None
 
             self.job_queue[job_id] = {
+                "ClusterId": self.job_id_counter,
+                "ProcId": i,
                 "JobDescription": job_description,
+                "Item": item or {},
+                "RequestMemory": int(_attribute("request_memory") or 2048),
+                "RequestDisk": int(_attribute("request_disk") or 1000),
+                "MaxRuntime": _attribute("MY.MaxRuntime", "+MaxRuntime"),
                 "JobStatus": MockHTCondor.job_status_map()["Idle"],
                 "QDate": int(time.time()),
             }
@@ -42,14 +67,23 @@ class MockSchedd:
     def get_constraint(self, constraint):
         if constraint is None:
             return lambda job_id, job_info: True
+        elif constraint.startswith("member("):
+            # member(strcat(ClusterId, ".", ProcId), {"1.0", "2.0"})
+            ids = set(
+                x.strip().strip('"')
+                for x in constraint.split("{")[1].split("}")[0].split(",")
+            )
+            return lambda job_id, job_info: job_id in ids
         else:
             if "==" in constraint and 'ClusterId' in constraint:
-                constraint = constraint.split("&&")[0].split("==")
+                # (ClusterId == 1) && (ProcId == 0), ProcId is optional
+                values = [
+                    part.split("==")[1].strip().replace(")", "")
+                    for part in constraint.split("&&")
+                ]
 
                 def cnstr(job_id, job_info):
-                    return job_id.split(".")[0] == constraint[1].strip().replace(
-                        ")", ""
-                    )
+                    return job_id.split(".")[: len(values)] == values
 
                 return cnstr
 
@@ -58,6 +92,7 @@ class MockSchedd:
         # interpret constraint
         # for now only ==
         # TODO: add more
+        self.query_calls += 1
         l_constraint = self.get_constraint(constraint)
 
         result = []
@@ -69,12 +104,33 @@ class MockSchedd:
                     result.append(job_info)
         return result
 
-    def edit(self, job_id, attribute, value):
-        """Simulates editing an attribute of a job."""
-        if job_id in self.job_queue:
+    def edit(self, job_spec, attribute, value):
+        """Simulates editing an attribute of a job (ID or constraint)."""
+        if job_spec in self.job_queue:
+            self.job_queue[job_spec][attribute] = value
+            return
+        l_constraint = self.get_constraint(job_spec)
+        edited = [
+            job_id
+            for job_id, job_info in self.job_queue.items()
+            if l_constraint(job_id, job_info)
+        ]
+        if len(edited) == 0:
+            raise ValueError(f"Job ID {job_spec} not found.")
+        for job_id in edited:
             self.job_queue[job_id][attribute] = value
-        else:
-            raise ValueError(f"Job ID {job_id} not found.")
+
+    def hold_job(self, job_id, reason, code, subcode=0):
+        """Simulates holding a job, e.g. by the memory limit."""
+        job_info = self.job_queue[job_id]
+        job_info["JobStatus"] = MockHTCondor.job_status_map()["Held"]
+        job_info["HoldReason"] = reason
+        job_info["HoldReasonCode"] = code
+        job_info["HoldReasonSubCode"] = subcode
+        job_info["EnteredCurrentStatus"] = int(time.time())
+        log_file_path = job_info["JobDescription"]["Log"]
+        log_file_path = log_file_path.replace("$(JobId)", str(job_id))
+        self._write_log_file(log_file_path, "Job was held.")
 
     def remove(self, job_id):
         """Simulates removing a job from the queue."""
@@ -94,6 +150,8 @@ class MockSchedd:
         for job_id, job_info in self.job_queue.items():
             if job_info["JobStatus"] == MockHTCondor.job_status_map()["Idle"]:
                 job_info["JobStatus"] = MockHTCondor.job_status_map()["Running"]
+                job_info["JobStartDate"] = int(time.time())
+                job_info["JobCurrentStartDate"] = job_info["JobStartDate"]
                 log_file_path = job_info["JobDescription"]["Log"]
                 log_file_path = log_file_path.replace("$(JobId)", str(job_id))
                 self._write_log_file(log_file_path, "Job is running.")
@@ -107,7 +165,7 @@ class MockSchedd:
                 log_file_path = job_info["JobDescription"]["Log"]
                 log_file_path = log_file_path.replace("$(JobId)", str(job_id))
                 self._write_log_file(
-                    log_file_path, "Job terminated\nNormal termination (return value 0)"
+                    log_file_path, self._termination_events(job_id, job_info, 0)
                 )
                 self.job_history[job_id] = job_info
                 to_delete.append(job_id)
@@ -124,13 +182,57 @@ class MockSchedd:
                 log_file_path = log_file_path.replace("$(JobId)", str(job_id))
                 self._write_log_file(
                     log_file_path,
-                    f"Job terminated\nNormal termination (return value {fail_code})",
+                    self._termination_events(job_id, job_info, fail_code),
                 )
                 self.job_history[job_id] = job_info
                 del self.job_queue[job_id]
         else:
             raise ValueError(f"Job ID {job_id} not found.")
 
+    def set_usage(self, job_id, cpus=1, memory=100, disk=10):
+        """Sets resources used by a job, written in its termination event
+        (memory in MB, disk in KB)."""
+        self.job_queue[job_id]["Usage"] = {
+            "Cpus": cpus,
+            "Memory": memory,
+            "Disk": disk,
+        }
+
+    def _termination_events(self, job_id, job_info, return_value):
+        """Returns log of a terminated job: submit, execute and terminate
+        events with the partitionable resources table."""
+
+        def _request(key, default):
+            value = job_info["Item"].get(key) or job_info["JobDescription"].get(key)
+            return value or default
+
+        usage = job_info.get("Usage", {"Cpus": 1, "Memory": 100, "Disk": 10})
+        requests = {
+            "Cpus": _request("request_cpus", 1),
+            "Memory": _request("request_memory", 2048),
+            "Disk": _request("request_disk", 1000),
+        }
+        cluster, proc = job_id.split(".")
+        header = f"({int(cluster):03d}.{int(proc):03d}.000)"
+
+        def _time(timestamp):
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+        start = job_info.get("JobStartDate", job_info["QDate"])
+        return (
+            f"000 {header} {_time(job_info['QDate'])} Job submitted from host: <mock>\n"
+            "...\n"
+            f"001 {header} {_time(start)} Job executing on host: <mock>\n"
+            "...\n"
+            f"005 {header} {_time(time.time())} Job terminated.\n"
+            f"\t(1) Normal termination (return value {return_value})\n"
+            "\tPartitionable Resources :    Usage  Request Allocated\n"
+            f"\t   Cpus                 : {usage['Cpus']:>8} {requests['Cpus']:>8} {requests['Cpus']:>8}\n"
+            f"\t   Disk (KB)            : {usage['Disk']:>8} {requests['Disk']:>8} {requests['Disk']:>8}\n"
+            f"\t   Memory (MB)          : {usage['Memory']:>8} {requests['Memory']:>8} {requests['Memory']:>8}\n"
+            "...\n"
+        )
+
     def act(self, action, constraint):
         """Simulates performing an action on jobs based on a constraint."""
         l_constraint = self.get_constraint(constraint)
@@ -146,8 +248,9 @@ class MockSchedd:
                     self.remove(job_id)
                 # Add more actions as needed
 
-    def history(self, constraint=None, projection=None):
+    def history(self, constraint=None, projection=None, match=-1):
         """Simulates retrieving the history of completed jobs."""
+        self.history_calls += 1
         result = []
         l_constraint = self.get_constraint(constraint)
         for job_id, job_info in self.job_history.items():
@@ -159,12 +262,17 @@ class MockSchedd:
                         )
                     else:
                         result.append(job_info)
+            if match != -1 and len(result) >= match:
+                break
         return result
 
-    def _write_log_file(self, log_file_path, content):
-        """Writes content to the specified log file."""
+    def _write_log_file(self, log_file_path, content, new=False):
+        """Appends content to the specified log file as a separate event,
+        like condor does. The file is created anew at submission."""
+        if not content.endswith("...\n"):
+            content += "\n...\n"
         if log_file_path:
-            with open(log_file_path, "w") as log_file:
+            with open(log_file_path, "w" if new else "a") as log_file:
                 log_file.write(content)
 
 
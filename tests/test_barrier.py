@@ -0,0 +1,81 @@
+# Test barrier.py using the htcondor_mock library
+from MockHTCondor import MockHTCondor
+from falconry import barrier, job, manager, Counter, FalconryStatus
+from falconry.__main__ import process_commands
+
+
+def test_barrier(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+
+    first = []
+    for name in ["a", "b"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+        first.append(j)
+    b = barrier("stage1", schedd)  # type: ignore
+    b.add_job_dependency(*first)
+    mgr.add_job(b)
+    after = job("after", schedd)  # type: ignore
+    after.set_simple("my_script.sh", str(tmp_path / "log"))
+    after.add_job_dependency(b)
+    mgr.add_job(after)
+
+    c = Counter()
+    assert mgr._single_check(c) is True
+    # barrier is not counted as a job
+    assert c.waiting == 3
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.complete_jobs()
+    assert mgr._single_check(c) is True
+    assert b.done
+    assert b.jobIDs == []
+    assert [j.name for j in mgr.sub_queue] == ["after"]
+    mgr.save(quiet=True)
+
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr2.load()
+    assert isinstance(mgr2.jobs["stage1"], barrier)
+    assert mgr2.jobs["stage1"].get_status() == FalconryStatus.COMPLETE
+    assert mgr2.jobs["after"].dependencies == [mgr2.jobs["stage1"]]
+
+
+def test_barrier_failed_dependency(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    j = job("a", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(j)
+    b = barrier("stage1", schedd)  # type: ignore
+    b.add_job_dependency(j)
+    mgr.add_job(b)
+    after = job("after", schedd)  # type: ignore
+    after.set_simple("my_script.sh", str(tmp_path / "log"))
+    after.add_job_dependency(b)
+    mgr.add_job(after)
+
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.fail_job(j.jobID, 1)
+    mgr._single_check(c)
+    assert b.skipped
+    assert not b.done
+    mgr._single_check(c)
+    assert after.skipped
+
+
+def test_cli_blocks(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    process_commands("[a1] echo 1;[a2] echo 2;;[b1] echo 3;[b2] echo 4;;[c] echo 5", mgr, 60)
+
+    # N+M dependencies through the barriers of the blocks
+    assert mgr.jobs["<block 0>"].dependencies == [mgr.jobs["a1"], mgr.jobs["a2"]]
+    assert mgr.jobs["b1"].dependencies == [mgr.jobs["<block 0>"]]
+    assert mgr.jobs["b2"].dependencies == [mgr.jobs["<block 0>"]]
+    assert mgr.jobs["c"].dependencies == [mgr.jobs["<block 1>"]]
+    assert mgr.jobs["a1"].dependencies == []
@@ -0,0 +1,46 @@
+from MockHTCondor import MockHTCondor
+
+from falconry import job, manager
+
+
+def test_manager_critical_path(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd, maxJobIdle=0)  # type: ignore
+    jobs = {}
+    for name in ["x", "y", "a", "b", "c"]:
+        jobs[name] = job(name, schedd)  # type: ignore
+        jobs[name].set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(jobs[name])
+    jobs["b"].add_job_dependency(jobs["a"])
+    jobs["c"].add_job_dependency(jobs["b"])
+
+    # without runtimes, the longest chain is started first
+    assert mgr.critical_path() == {"x": 1, "y": 1, "a": 3, "b": 2, "c": 1}
+    mgr._check_dependence()
+    assert [j.name for j in mgr.sub_queue] == ["a"]
+    assert "priority" not in jobs["a"].config
+
+    # expected runtimes take precedence over the number of jobs
+    for name in ["a", "b", "c"]:
+        jobs[name].config["+MaxRuntime"] = "100"
+    jobs["x"].config["+MaxRuntime"] = "1000"
+    mgr = manager(
+        str(tmp_path), schedd=schedd, maxJobIdle=0, criticalPathPriority=True
+    )  # type: ignore
+    for j in jobs.values():
+        j.submitted = False
+        mgr.add_job(j)
+    mgr._check_dependence()
+    assert [j.name for j in mgr.sub_queue] == ["x"]
+    assert jobs["x"].config["priority"] == "100"
+
+    # all runtimes can be zero
+    mgr = manager(
+        str(tmp_path), schedd=schedd, maxJobIdle=0, criticalPathPriority=True
+    )  # type: ignore
+    for j in jobs.values():
+        j.submitted = False
+        j.config["+MaxRuntime"] = "0"
+        mgr.add_job(j)
+    mgr._check_dependence()
+    assert jobs[mgr.sub_queue[0].name].config["priority"] == "0"
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from falconry import FalconryStatus
+from falconry.failures import normalise, signature, cluster_failures
+
+
+class TestNormalise:
+    def test_tokens(self):
+        text = "Error in /data/user/file_123.root on wn123.cern.ch pid 4567 at 0x7ffe"
+        assert normalise(text) == "Error in <path> on <host> pid <n> at <hex>"
+
+    def test_same_error_same_text(self):
+        assert normalise("Killed job 12 on 10.0.0.1") == normalise(
+            "Killed job 345 on 10.0.0.27"
+        )
+
+
+class TestSignature:
+    def test_last_line(self):
+        tail = "Traceback:\n  line 3\nValueError: bad value 42\n\n"
+        assert signature(1, tail) == "exit 1: ValueError: bad value <n>"
+
+    def test_empty(self):
+        assert signature(None, "") == "unknown: <empty>"
+
+    def test_status(self):
+        assert signature(None, "", FalconryStatus.REMOVED) == "removed: <empty>"
+        # e.g. given up by the hold policy
+        assert signature(None, "x", FalconryStatus.FAILED) == "failed: x"
+        assert signature(2, "x", FalconryStatus.FAILED) == "exit 2: x"
+
+
+def test_cluster_failures(tmp_path):
+    jobs = []
+    for i, error in enumerate(["No such file /a/b/1", "No such file /c/2", "Segfault"]):
+        err = tmp_path / f"{i}.err"
+        err.write_text(f"some output {i}\n{error}\n")
+        jobs.append(
+            SimpleNamespace(
+                name=f"job{i}",
+                errFile=str(err),
+                exitCode=1,
+                lastStatus=FalconryStatus.FAILED,
+            )
+        )
+
+    groups = cluster_failures(jobs)  # type: ignore
+    assert list(groups.keys()) == ["exit 1: No such file <path>", "exit 1: Segfault"]
+    assert [j.name for j in groups["exit 1: No such file <path>"]] == ["job0", "job1"]
@@ -0,0 +1,139 @@
+from MockHTCondor import MockHTCondor
+
+from falconry import job, job_array, manager, Counter, FalconryStatus
+from falconry.holds import HoldAction, HoldPolicy, HoldRule
+
+_MEMORY = "Job has gone over memory limit of 2048 megabytes."
+
+
+def _ad(code, reason, since=0):
+    return {
+        "HoldReasonCode": code,
+        "HoldReason": reason,
+        "EnteredCurrentStatus": since,
+    }
+
+
+def test_hold_rule():
+    rule = HoldRule(HoldAction.RELEASE, codes=[13], reason="transfer", maxAttempts=2)
+    assert rule.matches(13, "Transfer input files failed", 0)
+    assert not rule.matches(13, "Transfer input files failed", 2)
+    assert not rule.matches(12, "Transfer output files failed", 0)
+    assert not rule.matches(13, "Something else", 0)
+    # bump only applies to jobs which exceeded a request
+    assert HoldRule(HoldAction.BUMP).matches(34, _MEMORY, 0)
+    assert not HoldRule(HoldAction.BUMP).matches(13, "Transfer failed", 0)
+
+
+def test_default_policy():
+    policy = HoldPolicy()
+    assert policy.decide(_ad(34, _MEMORY), 0, 1000) is HoldAction.BUMP
+    # bumped three times already, gives up
+    assert policy.decide(_ad(34, _MEMORY), 3, 1000) is HoldAction.GIVE_UP
+    # transient problems are released with backoff, doubled each attempt
+    assert policy.decide(_ad(13, "Transfer failed", 900), 0, 1000) is None
+    assert policy.decide(_ad(13, "Transfer failed", 600), 0, 1000) is (
+        HoldAction.RELEASE
+    )
+    assert policy.decide(_ad(13, "Transfer failed", 600), 1, 1000) is None
+    assert policy.decide(_ad(3, "Policy"), 0, 1000) is HoldAction.GIVE_UP
+    # held by the user
+    assert policy.decide(_ad(1, "via condor_hold"), 0, 1000) is None
+
+
+def _manager(tmp_path, schedd, policy):
+    mgr = manager(str(tmp_path / "mgr"), schedd=schedd, holdPolicy=policy)  # type: ignore
+    jobs = {}
+    for name in ["a", "b", "c"]:
+        jobs[name] = job(name, schedd)  # type: ignore
+        jobs[name].set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(jobs[name])
+    return mgr, jobs
+
+
+def test_manager_hold_policy(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    policy = HoldPolicy(
+        [
+            HoldRule(HoldAction.RELEASE, codes=[13]),
+            HoldRule(HoldAction.RESUBMIT, reason="cvmfs", maxAttempts=1),
+            HoldRule(HoldAction.GIVE_UP, maxAttempts=-1),
+        ]
+    )
+    mgr, jobs = _manager(tmp_path, schedd, policy)
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.hold_job("1.0", "Transfer input files failed", 13)
+    schedd.hold_job("1.1", "cvmfs not available", 26)
+    schedd.hold_job("1.2", "Unknown problem", 26)
+    queries = schedd.query_calls
+    mgr._single_check(c)
+    assert c.held == 3
+
+    # status of each job and a single query for the hold reasons of all jobs
+    assert schedd.query_calls - queries == len(jobs) + 1
+    assert schedd.job_queue["1.0"]["JobStatus"] == FalconryStatus.IDLE.value
+    assert "1.1" not in schedd.job_queue
+    assert "1.2" not in schedd.job_queue
+    assert [j.name for j in mgr.sub_queue] == ["b"]
+    assert [j.holdAttempts for j in jobs.values()] == [1, 1, 1]
+
+    mgr._submit_jobs()
+    assert jobs["b"].jobIDs == ["1.1", "2.0"]
+    mgr._single_check(c)
+    assert jobs["c"].get_status() == FalconryStatus.FAILED
+    assert c.failed == 1
+
+    # attempts and giving up are kept in the save file
+    mgr.save(quiet=True)
+    mgr2 = manager(str(tmp_path / "mgr"), schedd=schedd)  # type: ignore
+    mgr2.load()
+    assert mgr2.jobs["b"].holdAttempts == 1
+    assert mgr2.jobs["c"].get_status() == FalconryStatus.FAILED
+
+    # second hold of the same job, resubmit rule does not match anymore
+    schedd.run_jobs()
+    schedd.hold_job("2.0", "cvmfs not available", 26)
+    mgr._single_check(c)
+    assert jobs["b"].gaveUp
+
+
+def test_manager_hold_policy_array(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    policy = HoldPolicy([HoldRule(HoldAction.RESUBMIT)])
+    mgr = manager(str(tmp_path / "mgr"), schedd=schedd, holdPolicy=policy)  # type: ignore
+    arr = job_array("arr", schedd, [{"x": "1"}, {"x": "2"}])  # type: ignore
+    arr.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(arr)
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.hold_job("1.1", "cvmfs not available", 26)
+    mgr._single_check(c)
+    assert c.held == 1
+    assert mgr.sub_queue == [arr]
+    mgr._submit_jobs()
+    # only the held item is submitted again
+    assert arr.item_id(0) == "1.0"
+    assert arr.item_id(1) == "2.0"
+
+
+def test_manager_hold_policy_bump_failed(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr, jobs = _manager(tmp_path, schedd, HoldPolicy())
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    # request is unknown, so the next rule is applied instead of the bump
+    schedd.job_queue["1.0"]["RequestMemory"] = None
+    schedd.hold_job("1.0", _MEMORY, 34)
+    assert HoldPolicy().decide(_ad(34, _MEMORY), 0, 0, exclude=[HoldAction.BUMP]) is (
+        HoldAction.GIVE_UP
+    )
+    mgr._single_check(c)
+    assert jobs["a"].gaveUp
+    assert "1.0" not in schedd.job_queue
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+
+"""Guards the startup budget of `import falconry` (used by `falconry --help` and `pmux`)"""
+
+# Generous budget in microseconds, the import itself takes well below 0.1 s
+IMPORT_BUDGET_US = 500_000
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+
+
+@pytest.mark.parametrize("module", ["htcondor2", "ijson"])
+def test_heavy_modules_not_imported(module):
+    result = _run(f"import sys, falconry, pmux; print({module!r} in sys.modules)")
+    assert result.stdout.strip() == "False"
+
+
+def test_cli_config_is_light():
+    result = _run("import sys; from falconry import config; config(); print('htcondor2' in sys.modules)")
+    assert result.stdout.strip() == "False"
+
+
+def test_import_time_budget():
+    result = _run("import falconry", "-X", "importtime")
+    # last line of the report is the top level package, cumulative time is the second column
+    for line in result.stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == "falconry":
+            assert int(fields[1]) < IMPORT_BUDGET_US
+            return
+    pytest.fail("falconry not found in the import time report")
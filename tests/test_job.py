@@ -1,6 +1,8 @@
 # Test job.py using the htcondor_mock library
 from MockHTCondor import MockHTCondor
-from falconry import job, manager, Counter, FalconryStatus
+from falconry import job, manager, Counter, FalconryStatus, tail_file
+from falconry.job import read_log_state
+import os
 import pytest
 
 
@@ -69,10 +71,276 @@ def test_manager():
     schedd.complete_jobs()
     assert mgr._single_check(c) is False
     assert j.get_status() == FalconryStatus.COMPLETE
+    assert mgr.jobs_with_status(FalconryStatus.COMPLETE) == [j]
+    assert mgr.jobs_with_status(FalconryStatus.IDLE, FalconryStatus.RUNNING) == []
     mgr.save(quiet=True)
     mgr.load(retryFailed=False)
 
 
+def test_manager_reconcile(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+
+    for name in ["done", "failed", "running", "idle"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+    mgr._check_dependence()
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.fail_job(mgr.jobs["failed"].jobID, 1)
+    schedd.complete_jobs()
+    j = job("new", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(j)
+    mgr.jobs["idle"].submit(force=True)
+    mgr.save(quiet=True)
+
+    queryCalls = schedd.query_calls
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr2.load(retryFailed=True)
+    # only jobs without final state in the log are resolved from condor
+    assert schedd.query_calls == queryCalls + 1
+    assert mgr2.jobs["done"].lastStatus == FalconryStatus.COMPLETE
+    assert mgr2.jobs["failed"].lastStatus == FalconryStatus.FAILED
+    assert mgr2.jobs["idle"].lastStatus == FalconryStatus.IDLE
+    assert mgr2.jobs["new"].lastStatus == FalconryStatus.NOT_SUBMITTED
+    assert [j.name for j in mgr2.sub_queue] == ["failed"]
+
+
+def test_manager_find_ids(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+
+    j = job("test", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(j)
+    other = job("other", schedd)  # type: ignore
+    other.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(other)
+
+    # nothing to find
+    mgr.find_ids()
+    assert j.jobIDs == []
+
+    # simulate submission by a different client,
+    # without symlinks the job directory does not contain anything
+    job.logSymlinks = False
+    try:
+        for _ in range(10):
+            j.submit(force=True)
+    finally:
+        job.logSymlinks = True
+    assert os.listdir(j.jobDir) == []
+    j.jobIDs = []
+    j.jobID = None
+
+    mgr.find_ids()
+    assert j.jobIDs == [f"{i}.0" for i in range(1, 11)]
+    assert j.jobID == "10.0"
+    assert other.jobIDs == []
+
+
+def test_job_log_symlink(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    j = job("test", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path))
+    j.submit()
+    link = tmp_path / "test" / "1.0.log"
+    assert link.is_symlink()
+    assert j.logFile == str(tmp_path / "logs" / "1.0.log")
+
+    # loading only computes the paths
+    link.unlink()
+    j2 = job("test", schedd)  # type: ignore
+    j2.load(j.save())
+    assert not link.exists()
+    assert j2.get_status() == FalconryStatus.IDLE
+
+    job.logSymlinks = False
+    try:
+        j.submit(force=True)
+    finally:
+        job.logSymlinks = True
+    assert not (tmp_path / "test" / "2.0.log").exists()
+    assert j.get_status() == FalconryStatus.IDLE
+
+    (tmp_path / "logs" / "2.0.log").unlink()
+    assert j.get_status() == FalconryStatus.LOG_FILE_MISSING
+
+
+def test_job_sharded_layout(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    for name in ["a", "b"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"), shards=2)
+        mgr.add_job(j)
+
+    j = mgr.jobs["a"]
+    assert j.jobDir is not None
+    prefix = os.path.relpath(j.jobDir, tmp_path / "log").split(os.sep)
+    assert len(prefix) == 3 and prefix[-1] == "a"
+    assert os.path.dirname(j.config["log"]) == str(tmp_path / "log" / "logs" / prefix[0][0])
+    assert os.path.isdir(j.jobDir)
+
+    # jobs with different log directories are submitted separately
+    mgr._check_dependence()
+    mgr._submit_jobs()
+    assert j.get_status() == FalconryStatus.IDLE
+    assert mgr.jobs["b"].get_status() == FalconryStatus.IDLE
+
+    j2 = job("a", schedd)  # type: ignore
+    j2.load(j.save())
+    assert j2.shards == 2
+    assert j2.jobDir == j.jobDir
+    assert j2.logFile == j.logFile
+
+
+def test_manager_pack_logs(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd, packLogs=3)  # type: ignore
+    for name in ["a", "b", "failed"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+    mgr._check_dependence()
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.fail_job(mgr.jobs["failed"].jobID, 1)
+    schedd.complete_jobs()
+    mgr._single_check(Counter())
+
+    # failed jobs are packed as well
+    mgr._pack_finished()
+    mgr.packer.wait()
+    for name in ["a", "failed"]:
+        j = mgr.jobs[name]
+        assert not os.path.exists(j.logFile)
+        assert mgr.packer.is_packed(j.logFile)
+        assert "Normal termination" in tail_file(j.logFile, packer=mgr.packer)
+
+    mgr.save(quiet=True)
+    mgr2 = manager(str(tmp_path), schedd=schedd, packLogs=3)  # type: ignore
+    mgr2.load(retryFailed=True)
+    assert mgr2._packed == {"1.0", "1.1", "1.2"}
+    assert mgr2.jobs["a"].get_status() == FalconryStatus.COMPLETE
+    # status of the failed job is known without its log, it is retried
+    assert mgr2.jobs["failed"].lastStatus == FalconryStatus.FAILED
+    assert [j.name for j in mgr2.sub_queue] == ["failed"]
+
+
+def test_manager_failure_signatures(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    for name in ["a", "b", "c"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+    mgr._check_dependence()
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    for name, code in [("a", 2), ("b", 2), ("c", 3)]:
+        j = mgr.jobs[name]
+        with open(j.errFile, "w") as f:
+            f.write(f"Error: file /data/{name}.root missing\n")
+        schedd.fail_job(j.jobID, code)
+    mgr._single_check(Counter())
+
+    groups = mgr.failure_signatures()
+    assert [len(jobs) for jobs in groups.values()] == [2, 1]
+    sig = next(iter(groups))
+    assert sig.startswith("exit 2:")
+    assert mgr.retry_signature(sig) == 2
+    assert sorted(j.name for j in mgr.sub_queue) == ["a", "b"]
+
+
+def test_manager_add_jobs(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+
+    def _jobs(names):
+        for name in names:
+            j = job(name, schedd)  # type: ignore
+            j.set_simple("my_script.sh", str(tmp_path / "log"))
+            yield j
+
+    assert mgr.add_jobs(_jobs(["a", "b", "c"])) == 3
+    assert list(mgr.jobs) == ["a", "b", "c"]
+
+    # nothing is added if any name is invalid
+    for names in [["d", "Message"], ["d", "d"], ["d", "a"]]:
+        with pytest.raises(SystemExit):
+            mgr.add_jobs(_jobs(names))
+        assert "d" not in mgr.jobs
+    assert mgr.add_jobs(_jobs(["a", "d"]), update=True) == 2
+    assert len(mgr.jobs) == 4
+    # updated job is indexed as the new one
+    assert mgr.statusIndex.names(FalconryStatus.UNKNOWN) == ["b", "c", "a", "d"]
+
+
+def test_read_log_state(tmp_path):
+    logFile = str(tmp_path / "1.0.log")
+    assert read_log_state(logFile) is None
+    with open(logFile, "w") as f:
+        f.write("000 (001.000.000) 2024-01-01 10:00:00 Job submitted\n...\n")
+    state = read_log_state(logFile)
+    assert state is not None
+    assert (state["status"], state["event"]) == (0, "000")
+    assert state["offset"] == os.path.getsize(logFile)
+    # unchanged file is not read again
+    assert read_log_state(logFile, state) is state
+
+    # incomplete event is not parsed, it is read again with the rest of it
+    with open(logFile, "a") as f:
+        f.write(
+            "001 (001.000.000) 2024-01-01 10:01:00 Job executing\n...\n"
+            "005 (001.000.000) 2024-01-01 10:02:00 Job terminated.\n"
+        )
+    state2 = read_log_state(logFile, state)
+    assert state2 is not None
+    assert (state2["status"], state2["event"]) == (0, "001")
+    with open(logFile, "a") as f:
+        f.write("\t(1) Normal termination (return value 2)\n...\n")
+    state3 = read_log_state(logFile, state2)
+    assert state3 is not None
+    assert (state3["status"], state3["event"]) == (-2, "005")
+    assert state3["offset"] == os.path.getsize(logFile)
+
+
+def test_manager_log_state(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    for name in ["failed", "running"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+    mgr._check_dependence()
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.fail_job(mgr.jobs["failed"].jobID, 3)
+    mgr._single_check(Counter())
+    mgr.save(quiet=True)
+
+    # log with the same fingerprint is trusted without reading it
+    failedLog = mgr.jobs["failed"].logFile
+    stat = os.stat(failedLog)
+    with open(failedLog, "r+") as f:
+        f.write("x" * stat.st_size)
+    os.utime(failedLog, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    # changed log is read from the end of the last parsed event
+    schedd.complete_jobs()
+
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr2.load()
+    assert mgr2.jobs["failed"].get_status() == FalconryStatus.FAILED
+    assert mgr2.jobs["failed"].exitCode == 3
+    assert mgr2.jobs["running"].get_status() == FalconryStatus.COMPLETE
+    assert mgr2.jobs["running"].logState["offset"] > (
+        mgr.jobs["running"].logState["offset"]
+    )
+
+
 if __name__ == "__main__":
     test_job()
     test_manager()
@@ -0,0 +1,57 @@
+# Test job_array.py using the htcondor_mock library
+from MockHTCondor import MockHTCondor
+from falconry import job, job_array, manager, Counter, FalconryStatus
+
+
+def test_job_array(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+
+    arr = job_array("scan", schedd, ({"x": str(i)} for i in range(3)))  # type: ignore
+    arr.set_simple("my_script.sh", str(tmp_path / "log"))
+    arr.set_arguments("$(x)")
+    assert arr.size == 3
+    after = job("after", schedd)  # type: ignore
+    after.set_simple("my_script.sh", str(tmp_path / "log"))
+    after.add_job_dependency(arr)
+    mgr.add_job(arr)
+    mgr.add_job(after)
+
+    c = Counter()
+    assert mgr._single_check(c) is True
+    assert c.waiting == 4
+    mgr._submit_jobs()
+    # single cluster with one proc per item
+    assert arr.jobIDs == ["1.0"]
+    assert sorted(schedd.job_queue) == ["1.0", "1.1", "1.2"]
+    assert [arr.item_id(i) for i in range(3)] == ["1.0", "1.1", "1.2"]
+
+    schedd.run_jobs()
+    schedd.fail_job("1.1", 2)
+    schedd.complete_jobs()
+    assert mgr._single_check(c) is True
+    assert (c.done, c.failed) == (2, 1)
+    assert arr.lastStatus == FalconryStatus.FAILED
+    assert arr.status_counts() == {
+        FalconryStatus.COMPLETE: 2,
+        FalconryStatus.FAILED: 1,
+    }
+    mgr.save(quiet=True)
+
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr2.load(retryFailed=True)
+    arr2 = mgr2.jobs["scan"]
+    assert isinstance(arr2, job_array)
+    assert arr2.items == [{"x": "0"}, {"x": "1"}, {"x": "2"}]
+    assert [j.name for j in mgr2.sub_queue] == ["scan"]
+
+    # only the failed item is resubmitted
+    mgr2._submit_jobs()
+    assert arr2.jobIDs == ["1.0", "2.0"]
+    assert [arr2.item_id(i) for i in range(3)] == ["1.0", "2.0", "1.2"]
+    schedd.run_jobs()
+    schedd.complete_jobs()
+    assert mgr2._single_check(c) is True
+    assert arr2.done
+    assert c.done == 3
+    assert [j.name for j in mgr2.sub_queue] == ["after"]
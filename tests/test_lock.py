@@ -1,12 +1,44 @@
+import errno
+import os
+import socket
+import subprocess
+import sys
+
 import pytest
 import tempfile
 from pathlib import Path
 
+from MockHTCondor import MockHTCondor
+
+from falconry import manager
 from falconry.lock import LockFile, LockFileException, lock
 
 
 """Based on code generated by Lumo AI"""
 
+# Holds the lock in another process until stdin is closed
+_HOLDER = """
+import fcntl, os, sys
+fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT)
+fcntl.flock(fd, fcntl.LOCK_EX)
+os.write(fd, b"4242 otherhost")
+print("locked", flush=True)
+sys.stdin.read()
+"""
+
+
+def _locked_by_other(path):
+    """Returns True if another process cannot lock the file"""
+    code = (
+        "import fcntl, os, sys\n"
+        "fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT)\n"
+        "try:\n"
+        "    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+        "except OSError:\n"
+        "    sys.exit(1)\n"
+    )
+    return subprocess.run([sys.executable, "-c", code, str(path)]).returncode == 1
+
 
 class TestLockFile:
     @pytest.fixture
@@ -18,17 +50,44 @@ class TestLockFile:
         lock_file = LockFile(str(temp_lock_path))
         with lock_file:
             assert temp_lock_path.exists()
-        assert not temp_lock_path.exists()
-
-    def test_raises_if_exists(self, temp_lock_path):
-        temp_lock_path.touch()
-        with pytest.raises(LockFileException):
-            LockFile(str(temp_lock_path))
+            assert _locked_by_other(temp_lock_path)
+            assert lock_file.holder() == f"{os.getpid()} {socket.gethostname()}"
+        assert not _locked_by_other(temp_lock_path)
+        assert lock_file.holder() is None
+
+    def test_raises_if_locked(self, temp_lock_path):
+        holder = subprocess.Popen(
+            [sys.executable, "-c", _HOLDER, str(temp_lock_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert holder.stdout.readline().strip() == "locked"
+            lock_file = LockFile(str(temp_lock_path))
+            with pytest.raises(LockFileException):
+                lock_file.acquire()
+            assert lock_file.holder() == "4242 otherhost"
+        finally:
+            holder.communicate("")
+        # released when the holder ends, the file is left behind
+        with LockFile(str(temp_lock_path)):
+            assert _locked_by_other(temp_lock_path)
 
-    def test_context_manager_cleanup(self, temp_lock_path):
+    def test_stale_lock(self, temp_lock_path):
+        temp_lock_path.write_text("4242 otherhost\n")
         with LockFile(str(temp_lock_path)):
-            assert temp_lock_path.exists()
-        assert not temp_lock_path.exists()
+            assert temp_lock_path.read_text().split()[0] == str(os.getpid())
+
+    def test_reentrant(self, temp_lock_path):
+        first = LockFile(str(temp_lock_path))
+        second = LockFile(str(temp_lock_path))
+        first.acquire()
+        second.acquire()
+        first.release()
+        assert _locked_by_other(temp_lock_path)
+        second.release()
+        assert not _locked_by_other(temp_lock_path)
 
     def test_exception_during_context(self, temp_lock_path):
         try:
@@ -37,8 +96,29 @@ class TestLockFile:
                 raise ValueError("Test error")
         except ValueError:
             pass
-        # Lock should still be cleaned up
-        assert not temp_lock_path.exists()
+        # Lock should still be released
+        assert not _locked_by_other(temp_lock_path)
+
+    def test_without_flock(self, temp_lock_path, monkeypatch):
+        def _flock(fd, op):
+            raise OSError(errno.ENOLCK, "No locks available")
+
+        monkeypatch.setattr("fcntl.flock", _flock)
+        with LockFile(str(temp_lock_path)):
+            assert temp_lock_path.read_text().split()[0] == str(os.getpid())
+        assert temp_lock_path.read_text() == ""
+
+        # holder on another host cannot be checked
+        temp_lock_path.write_text("4242 otherhost\n")
+        with pytest.raises(LockFileException):
+            LockFile(str(temp_lock_path)).acquire()
+
+        # holder on this host which is not running anymore is stale
+        dead = subprocess.Popen([sys.executable, "-c", ""])
+        dead.wait()
+        temp_lock_path.write_text(f"{dead.pid} {socket.gethostname()}\n")
+        with LockFile(str(temp_lock_path)):
+            assert temp_lock_path.read_text().split()[0] == str(os.getpid())
 
 
 class TestLockDecorator:
@@ -52,27 +132,25 @@ class TestLockDecorator:
             def __init__(self):
                 self.lockFile = str(temp_lock_path)
 
-            def _check_lock(self):
-                pass
-
             @lock
             def locked_method(self):
-                assert temp_lock_path.exists()
+                assert _locked_by_other(temp_lock_path)
                 return "success"
 
         obj = TestClass()
         result = obj.locked_method()
         assert result == "success"
-        assert not temp_lock_path.exists()
+        # lock is kept for further calls
+        assert obj._fileLock.locked
+        assert obj.locked_method() == "success"
+        obj._fileLock.release()
+        assert not _locked_by_other(temp_lock_path)
 
     def test_decorator_with_exception(self, temp_lock_path):
         class TestClass:
             def __init__(self):
                 self.lockFile = str(temp_lock_path)
 
-            def _check_lock(self):
-                pass
-
             @lock
             def failing_method(self):
                 assert temp_lock_path.exists()
@@ -81,5 +159,20 @@ class TestLockDecorator:
         obj = TestClass()
         with pytest.raises(RuntimeError):
             obj.failing_method()
-        # Lock should still be cleaned up
-        assert not temp_lock_path.exists()
+        obj._fileLock.release()
+
+
+def test_manager_lock(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    # held for the lifetime of the manager, shared within the process
+    assert mgr._fileLock.locked
+    assert mgr._fileLock.holder().split()[0] == str(os.getpid())
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr.close()
+    assert mgr2._fileLock.holder() is not None
+    mgr2.close()
+    assert mgr2._fileLock.holder() is None
+    # acquired again when needed
+    mgr.save(quiet=True)
+    assert mgr._fileLock.locked
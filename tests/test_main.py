@@ -0,0 +1,30 @@
+# Test the falconry executable using the htcondor_mock library
+import os
+
+from MockHTCondor import MockHTCondor
+from falconry import manager
+from falconry.__main__ import get_name, parse_job, process_commands
+
+
+def test_get_name():
+    assert get_name('python --x ./a/b.py "$HOME" (x)') == "python_x_a_b_py_HOME_x"
+    assert parse_job("[name] echo 1") == ("name", "echo 1")
+    assert parse_job("echo 1") == ("echo_1", "echo 1")
+
+
+def test_process_commands_file(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path / "mgr"), schedd=schedd)  # type: ignore
+    commands = tmp_path / "commands.txt"
+    commands.write_text(
+        "# comment\n"
+        + "".join(f"echo {i}\n" for i in range(50))
+        + "\n\n"
+        + "[last] echo done\n"
+    )
+    process_commands(str(commands), mgr, 60, shards=1)
+
+    assert len(mgr.jobs) == 52  # including the barrier
+    assert mgr.jobs["last"].dependencies == [mgr.jobs["<block 0>"]]
+    for j in mgr.jobs.values():
+        assert all(os.path.isdir(d) for d in j.dirs())
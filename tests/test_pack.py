@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from falconry.pack import LogPacker
+from falconry.utils import tail_file
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.0.err"
+        path.write_text("\n".join(f"job{i} line{n}" for n in range(20)))
+        paths.append(str(path))
+    link = tmp_path / "0.0.log"
+    os.symlink(paths[0], link)
+    return paths + [str(link)]
+
+
+class TestLogPacker:
+    def test_pack(self, tmp_path, files):
+        packer = LogPacker(str(tmp_path / "packs"))
+        packer.pack(files)
+        for path in files:
+            assert not os.path.lexists(path)
+            assert packer.is_packed(path)
+        assert packer.read(files[1]) == "\n".join(
+            f"job1 line{n}" for n in range(20)
+        ).encode()
+        # symlink resolves to its target
+        assert packer.read(files[3]) == packer.read(files[0])
+        assert packer.read(str(tmp_path / "missing")) is None
+
+    def test_tail_packed(self, tmp_path, files):
+        packer = LogPacker(str(tmp_path / "packs"))
+        packer.pack(files)
+        lines = tail_file(files[2], 3, packer).strip().split("\n")
+        assert lines == ["job2 line17", "job2 line18", "job2 line19"]
+
+    def test_tail_packed_short_file(self, tmp_path):
+        path = tmp_path / "1.0.log"
+        path.write_text("line1\nline2\n")
+        packer = LogPacker(str(tmp_path / "packs"))
+        packer.pack([str(path)])
+        assert tail_file(str(path), 10, packer) == "line1\nline2\n"
+
+    def test_reload_index(self, tmp_path, files):
+        packer = LogPacker(str(tmp_path / "packs"))
+        packer.pack(files[:2])
+        packer.pack(files[2:])
+
+        packer = LogPacker(str(tmp_path / "packs"))
+        assert packer.nPacks == 2
+        assert all(packer.is_packed(path) for path in files)
+
+        packer.clear()
+        assert not any(packer.is_packed(path) for path in files)
+
+    def test_async(self, tmp_path, files):
+        packer = LogPacker(str(tmp_path / "packs"))
+        done = []
+        assert packer.pack_async(files, lambda: done.append(True))
+        packer.wait()
+        assert not packer.busy
+        assert done == [True]
+        assert all(packer.is_packed(path) for path in files)
+
+    def test_async_failure(self, tmp_path, files):
+        # pack directory cannot be created
+        (tmp_path / "packs").write_text("")
+        packer = LogPacker(str(tmp_path / "packs"))
+        done = []
+        assert packer.pack_async(files, lambda: done.append(True))
+        packer.wait()
+        assert done == []
+        assert all(os.path.lexists(path) for path in files)
+
+    def test_failed_pack_not_overwritten(self, tmp_path, files):
+        packDir = tmp_path / "packs"
+        packer = LogPacker(str(packDir))
+        packer.pack(files[:1])
+        # pack without index, e.g. disk quota exceeded while packing
+        (packDir / "000001.pack").write_bytes(b"partial")
+        (packDir / "000001.idx.tmp").write_text("{")
+        packer.nPacks = 2
+        packer.pack(files[1:2])
+
+        packer = LogPacker(str(packDir))
+        assert packer.nPacks == 3
+        assert sorted(os.listdir(packDir)) == [
+            "000000.idx",
+            "000000.pack",
+            "000002.idx",
+            "000002.pack",
+        ]
+        packer.pack(files[2:3])
+        assert packer.read(files[1]) == "\n".join(
+            f"job1 line{n}" for n in range(20)
+        ).encode()
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from MockHTCondor import MockHTCondor
+
+from falconry import job, manager, Counter
+from falconry.runtimes import RuntimeDB, parse_events, percentile
+
+_LOG = """000 (123.000.000) 2024-03-18 12:00:00 Job submitted from host: <1.2.3.4>
+    my_job
+...
+001 (123.000.000) 2024-03-18 12:05:00 Job executing on host: <5.6.7.8>
+...
+006 (123.000.000) 2024-03-18 12:10:00 Image size of job updated: 1234
+\t1200  -  MemoryUsage of job (MB)
+...
+005 (123.000.000) 2024-03-18 13:05:00 Job terminated.
+\t(1) Normal termination (return value 2)
+\t\tUsr 0 00:50:00, Sys 0 00:00:10  -  Run Remote Usage
+\tPartitionable Resources :    Usage  Request Allocated
+\t   Cpus                 :     0.98        1         1
+\t   Disk (KB)            :       36     1000    832631
+\t   Gpus                 :                 1         1     GPU-1a2b
+\t   Memory (MB)          :     1200     2048      2048
+...
+"""
+
+
+def _timestamp(date):
+    return int(time.mktime(time.strptime(date, "%Y-%m-%d %H:%M:%S")))
+
+
+def test_parse_events():
+    events = parse_events(_LOG)
+    assert events["submitted"] == _timestamp("2024-03-18 12:00:00")
+    assert events["started"] == _timestamp("2024-03-18 12:05:00")
+    assert events["ended"] == _timestamp("2024-03-18 13:05:00")
+    assert events["exitCode"] == 2
+    assert events["resources"] == {
+        "Cpus": (0.98, 1, 1),
+        "Disk": (36, 1000, 832631),
+        "Gpus": (None, 1, 1),
+        "Memory": (1200, 2048, 2048),
+    }
+
+
+def test_parse_events_running():
+    events = parse_events(_LOG.split("006")[0])
+    assert events["started"] is not None
+    assert events["ended"] is None
+    assert events["exitCode"] is None
+    assert events["resources"] == {}
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([0, 10], 95) == pytest.approx(9.5)
+
+
+def test_runtime_db(tmp_path):
+    db = RuntimeDB(str(tmp_path / "db" / "runtimes.db"))
+    events = parse_events(_LOG)
+    for i, runtime in enumerate([100, 200, 300, 400]):
+        events = dict(events, started=0, ended=runtime, exitCode=0)
+        db.record(f"ntuple_{i}", f"{i}.0", events, "mgr")
+    db.record("ntuple_9", "9.0", dict(events, exitCode=1), "mgr")
+    db.record("other", "10.0", events, "mgr")
+    # recording the same run again only updates it
+    db.record("other", "10.0", events, "mgr")
+
+    assert len(db.runs()) == 5
+    assert len(db.runs(succeeded=False)) == 6
+    assert db.runtimes("ntuple_*") == [100, 200, 300, 400]
+    assert db.runtime_p50("ntuple_*") == 250
+    assert db.runtime_p95("ntuple_*") == pytest.approx(385)
+    assert db.runtime_p50("missing_*") is None
+    assert db.runs("other")[0]["memoryUsage"] == 1200
+    db.close()
+
+    # shared by all managers, persistent
+    db = RuntimeDB(str(tmp_path / "db" / "runtimes.db"))
+    assert db.runtime_p50("ntuple_*") == 250
+    db.close()
+
+
+def test_manager_records_runs(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    dbPath = str(tmp_path / "runtimes.db")
+    mgr = manager(str(tmp_path / "mgr"), schedd=schedd, runtimeDB=dbPath)  # type: ignore
+    for name in ["a", "b"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.set_usage("1.0", memory=1500)
+    schedd.fail_job("1.1", 3)
+    schedd.complete_jobs()
+    mgr._single_check(c)
+
+    assert mgr.runtimeDB is not None
+    runs = mgr.runtimeDB.runs(succeeded=False)
+    assert [(run["name"], run["exitCode"]) for run in runs] == [("a", 0), ("b", 3)]
+    assert runs[0]["memoryUsage"] == 1500
+    assert runs[0]["memoryRequest"] == 2048
+    assert runs[0]["started"] >= runs[0]["submitted"]
+    mgr.close()
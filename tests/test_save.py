@@ -0,0 +1,96 @@
+import os
+
+import pytest
+from MockHTCondor import MockHTCondor
+
+from falconry import job, manager
+
+
+def test_manager_save_async(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    j = job("test", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(j)
+    mgr._save_async()
+    # snapshot is not affected by later changes
+    j.submit()
+    mgr._saver.flush()
+    assert os.path.exists(mgr.saveFileName)
+
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr2.load()
+    assert mgr2.jobs["test"].jobIDs == []
+
+
+def test_manager_snapshots(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd, keepSaveFiles=2)  # type: ignore
+    old = [f"{mgr.saveFileName}.2020010{i}_0000_00" for i in range(1, 4)]
+    for fl in old:
+        with open(fl, "w") as f:
+            f.write("{}")
+
+    mgr.save()
+    latest = f"{mgr.saveFileName}.latest"
+    snapshots = mgr._snapshots(mgr.saveFileName)
+    assert len(snapshots) == 2
+    assert snapshots[0] == old[-1]
+    assert not any(os.path.exists(fl) for fl in old[:-1])
+    # snapshots are hardlinks of the save file, not copies
+    ino = os.stat(latest).st_ino
+    assert os.stat(snapshots[-1]).st_ino == ino
+    assert os.stat(f"{mgr.saveFileName}.first").st_ino == ino
+
+    # new state is written to a new file, snapshot is kept
+    j = job("newjob", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(j)
+    mgr.save(quiet=True)
+    assert os.stat(latest).st_ino != ino
+    with open(snapshots[-1]) as f:
+        assert "newjob" not in f.read()
+    with open(mgr.saveFileName) as f:
+        assert "newjob" in f.read()
+
+
+@pytest.mark.parametrize("compressSave", [False, True])
+def test_manager_save_format(tmp_path, compressSave):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd, compressSave=compressSave)  # type: ignore
+    for name in ["a", "b"]:
+        j = job(name, schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+    mgr.jobs["b"].add_job_dependency(mgr.jobs["a"])
+    mgr.jobs["a"].submit()
+    mgr.save()
+    mgr._save_async()
+    mgr._saver.flush()
+
+    with open(mgr.saveFileName, "rb") as f:
+        assert (f.read(2) == b"\x1f\x8b") == compressSave
+
+    # format is detected on load
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr2.load()
+    assert list(mgr2.jobs) == ["a", "b"]
+    assert mgr2.jobs["a"].jobIDs == ["1.0"]
+    assert mgr2.jobs["b"].dependencies == [mgr2.jobs["a"]]
+    assert len(mgr2.mgrMsg) == 2
+
+
+def test_manager_load_without_ijson_c_backend(tmp_path, monkeypatch):
+    import ijson
+
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    j = job("a", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    mgr.add_job(j)
+    mgr.save(quiet=True)
+
+    monkeypatch.setattr(ijson, "backend", "python")
+    mgr2 = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    mgr2.load()
+    assert list(mgr2.jobs) == ["a"]
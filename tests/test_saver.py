@@ -0,0 +1,48 @@
+import threading
+import time
+
+from falconry.saver import BackgroundSaver
+
+
+def test_coalesce():
+    written = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def _write(output, quiet):
+        started.set()
+        release.wait()
+        written.append((output["n"], quiet))
+
+    saver = BackgroundSaver(_write, interval=0)
+    saver.request({"n": 0})
+    started.wait()
+    # written while the first one is still being written, only the last is kept
+    saver.request({"n": 1}, quiet=False)
+    saver.request({"n": 2})
+    release.set()
+    saver.flush()
+    assert written == [(0, True), (2, False)]
+
+
+def test_debounce_and_flush():
+    written = []
+    saver = BackgroundSaver(lambda output, quiet: written.append(output), interval=60)
+    saver.request({"n": 0})
+    saver.flush()
+    saver.request({"n": 1})
+    time.sleep(0.1)
+    # waiting for the interval
+    assert written == [{"n": 0}]
+    saver.flush()
+    assert written == [{"n": 0}, {"n": 1}]
+
+
+def test_write_error():
+    def _write(output, quiet):
+        raise OSError("disk full")
+
+    saver = BackgroundSaver(_write, interval=0)
+    saver.request({})
+    saver.flush()
+    assert not saver._writing
@@ -0,0 +1,141 @@
+from MockHTCondor import MockHTCondor
+
+from falconry import job, manager, Counter, FalconryStatus
+from falconry.sizing import (
+    bumped_request,
+    config_key,
+    estimate_requests,
+    exceeded_resource,
+)
+
+
+def test_exceeded_resource():
+    reason = "Job has gone over memory limit of 2048 megabytes."
+    assert exceeded_resource(34, reason) == "memory"
+    assert exceeded_resource(26, "SYSTEM_PERIODIC_HOLD: memory usage too high") == (
+        "memory"
+    )
+    assert exceeded_resource(34, "Disk usage exceeded request_disk") == "disk"
+    # allowed job duration is not given by the requests
+    assert exceeded_resource(46, "The job exceeded allowed job duration") is None
+    assert exceeded_resource(3, "Job exceeded MaxRuntime") == "runtime"
+    assert exceeded_resource(13, "Transfer of output failed") is None
+    assert exceeded_resource(26, "SYSTEM_PERIODIC_HOLD") is None
+
+
+def test_bumped_request():
+    ad = {"RequestMemory": 2048, "MemoryUsage": 4000, "MaxRuntime": 3600}
+    assert bumped_request("memory", ad) == 4800
+    assert bumped_request("memory", dict(ad, MemoryUsage=None)) == 3072
+    assert bumped_request("runtime", ad) == 5400
+    assert bumped_request("disk", ad) is None
+
+
+def test_config_key():
+    assert config_key({"RequestCpus": "4"}, "request_cpus") == "RequestCpus"
+    assert config_key({"request_memory": "100"}, "request_memory") == (
+        "request_memory"
+    )
+    assert config_key({}, "request_disk") == "request_disk"
+
+
+def _run(memory, runtime, exitCode=0, cpus=0.98):
+    return {
+        "memoryUsage": memory,
+        "diskUsage": 100,
+        "cpusUsage": cpus,
+        "started": 0,
+        "ended": runtime,
+        "exitCode": exitCode,
+    }
+
+
+def test_estimate_requests():
+    runs = [_run(1000, 600), _run(1500, 1200), _run(500, 10, exitCode=1)]
+    assert estimate_requests(runs, {"+MaxRuntime": "10800"}) == {
+        "request_memory": "1856",
+        "request_disk": "1024",
+        "+MaxRuntime": "1440",
+    }
+    # cpus are only raised, with the key already used by the job
+    assert "RequestCpus" not in estimate_requests(runs, {"RequestCpus": "4"})
+    runs.append(_run(1000, 600, cpus=5.6))
+    requests = estimate_requests(runs, {"RequestCpus": "4"})
+    assert requests["RequestCpus"] == "6"
+    assert "request_cpus" not in requests
+    # time limit is only adjusted if set
+    assert "+MaxRuntime" not in estimate_requests(runs, {})
+    assert estimate_requests([], {"+MaxRuntime": "10800"}) == {}
+
+
+def _manager(tmp_path, schedd, mgrDir="mgr"):
+    mgr = manager(
+        str(tmp_path / mgrDir),
+        schedd=schedd,
+        runtimeDB=str(tmp_path / "runtimes.db"),
+        autoSize=True,
+    )  # type: ignore
+    j = job("a", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    j.set_time(10800)
+    mgr.add_job(j)
+    return mgr, j
+
+
+def test_manager_auto_size(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr, j = _manager(tmp_path, schedd)
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    # nothing known about the job yet
+    assert "request_memory" not in j.config
+
+    # held for memory is bumped and released
+    schedd.run_jobs()
+    schedd.job_queue["1.0"]["MemoryUsage"] = 3000
+    schedd.hold_job("1.0", "Job has gone over memory limit of 2048 megabytes.", 34)
+    mgr._single_check(c)
+    assert c.held == 1
+    assert schedd.job_queue["1.0"]["RequestMemory"] == "3648"
+    assert schedd.job_queue["1.0"]["JobStatus"] == FalconryStatus.IDLE.value
+    assert j.config["request_memory"] == "3648"
+
+    # other holds are left alone
+    schedd.hold_job("1.0", "Transfer of output failed", 13)
+    mgr._single_check(c)
+    assert schedd.job_queue["1.0"]["JobStatus"] == FalconryStatus.HELD.value
+
+    schedd.job_queue["1.0"]["JobStatus"] = FalconryStatus.IDLE.value
+    schedd.run_jobs()
+    schedd.set_usage("1.0", memory=3000)
+    schedd.complete_jobs()
+    mgr._single_check(c)
+    mgr.close()
+
+    # another manager learns the requests from the previous run
+    mgr, j = _manager(tmp_path, schedd, "mgr2")
+    mgr._single_check(Counter())
+    mgr._submit_jobs()
+    assert j.config["request_memory"] == "3648"
+    assert j.config["+MaxRuntime"] == "60"
+    mgr.close()
+
+
+def test_manager_bump_runtime(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path / "mgr"), schedd=schedd, autoSize=True)  # type: ignore
+    j = job("a", schedd)  # type: ignore
+    j.set_simple("my_script.sh", str(tmp_path / "log"))
+    j.set_time(3600, useRequestRuntime=True)
+    mgr.add_job(j)
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    schedd.hold_job("1.0", "Job exceeded MaxRuntime", 26)
+    mgr._single_check(c)
+    # both time limits are raised
+    assert schedd.job_queue["1.0"]["MaxRuntime"] == "5400"
+    assert schedd.job_queue["1.0"]["RequestRuntime"] == "5400"
+    assert j.config["+MaxRuntime"] == j.config["+RequestRuntime"] == "5400"
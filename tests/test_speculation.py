@@ -0,0 +1,93 @@
+import time
+
+from MockHTCondor import MockHTCondor
+
+from falconry import job, manager, Counter, FalconryStatus
+from falconry.speculation import SiblingRuntimes, sibling_group
+
+
+def test_sibling_group():
+    assert sibling_group("ntuple_mc_042") == "ntuple_mc"
+    assert sibling_group("ntuple-7") == "ntuple"
+    assert sibling_group("merge") == "merge"
+
+
+def test_sibling_runtimes():
+    siblings = SiblingRuntimes(q=50, minSiblings=3)
+    siblings.add("a_1", 10)
+    siblings.add("a_2", 20)
+    assert siblings.limit("a_3") is None
+    siblings.add("a_3", 30)
+    assert siblings.limit("a_4") == 20
+    assert siblings.limit("b_1") is None
+
+
+def _manager(tmp_path, schedd):
+    mgr = manager(
+        str(tmp_path / "mgr"), schedd=schedd, speculativeCopies=1
+    )  # type: ignore
+    jobs = []
+    for i in range(12):
+        j = job(f"s_{i}", schedd)  # type: ignore
+        j.set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(j)
+        jobs.append(j)
+    c = Counter()
+    mgr._single_check(c)
+    mgr._submit_jobs()
+    schedd.run_jobs()
+    # two jobs are stuck on a slow node, the rest finishes
+    for j in jobs[10:]:
+        schedd.job_queue[j.jobID]["JobCurrentStartDate"] = int(time.time()) - 1000
+        schedd.job_queue[j.jobID]["JobStatus"] = FalconryStatus.IDLE.value
+    schedd.complete_jobs()
+    for j in jobs[10:]:
+        schedd.job_queue[j.jobID]["JobStatus"] = FalconryStatus.RUNNING.value
+    mgr._single_check(c)
+    mgr._single_check(c)
+    return mgr, jobs
+
+
+def test_speculative_copy_wins(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr, jobs = _manager(tmp_path, schedd)
+    # at most one copy at the same time
+    assert len(mgr.sub_queue) == 1
+    straggler = mgr.sub_queue[0]
+    original = straggler.jobID
+    mgr._submit_jobs()
+    assert straggler.racing == [original]
+    assert straggler.jobIDs == [original, "2.0"]
+
+    # the copy finishes first, the original is removed
+    schedd.run_jobs()
+    schedd.job_queue[original]["JobStatus"] = FalconryStatus.IDLE.value
+    schedd.complete_jobs()
+    mgr._single_check(Counter())
+    assert straggler.racing == []
+    assert straggler.jobID == "2.0"
+    assert straggler.done
+    assert original not in schedd.job_queue
+
+
+def test_speculative_original_wins(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr, jobs = _manager(tmp_path, schedd)
+    straggler = mgr.sub_queue[0]
+    original = straggler.jobID
+    mgr._submit_jobs()
+
+    # racing copies are kept in the save file
+    mgr.save(quiet=True)
+    mgr2 = manager(str(tmp_path / "mgr"), schedd=schedd)  # type: ignore
+    mgr2.load()
+    assert mgr2.jobs[straggler.name].racing == [original]
+
+    # the original finishes first, the copy is removed
+    schedd.complete_jobs()
+    mgr._single_check(Counter())
+    assert straggler.racing == []
+    assert straggler.jobIDs == ["2.0", original]
+    assert straggler.jobID == original
+    assert straggler.get_status() == FalconryStatus.COMPLETE
+    assert "2.0" not in schedd.job_queue
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+from MockHTCondor import MockHTCondor
+
+from falconry import job, manager, Counter
+from falconry.status import FalconryStatus, StatusIndex
+
+
+class TestStatusIndex:
+    def test_update(self):
+        index = StatusIndex()
+        index.update("a", FalconryStatus.IDLE)
+        index.update("b", FalconryStatus.IDLE)
+        index.update("a", FalconryStatus.RUNNING)
+        assert index.names(FalconryStatus.IDLE) == ["b"]
+        assert index.names(FalconryStatus.RUNNING) == ["a"]
+        assert index.count(FalconryStatus.IDLE) == 1
+
+    def test_remove(self):
+        index = StatusIndex()
+        index.update("a", FalconryStatus.IDLE)
+        index.remove("a")
+        index.remove("missing")
+        assert index.names(FalconryStatus.IDLE) == []
+
+    def test_older_than(self):
+        index = StatusIndex()
+        with patch("time.time", return_value=1000.0):
+            index.update("old", FalconryStatus.IDLE)
+        with patch("time.time", return_value=5000.0):
+            index.update("new", FalconryStatus.IDLE)
+            # same status does not reset the time
+            index.update("old", FalconryStatus.IDLE)
+            assert index.names(FalconryStatus.IDLE, olderThan=3600) == ["old"]
+
+
+def test_manager_status_cycle(tmp_path):
+    schedd = MockHTCondor.Schedd()
+    mgr = manager(str(tmp_path), schedd=schedd)  # type: ignore
+    jobs = {}
+    for name in ["a", "b"]:
+        jobs[name] = job(name, schedd)  # type: ignore
+        jobs[name].set_simple("my_script.sh", str(tmp_path / "log"))
+        mgr.add_job(jobs[name])
+    jobs["b"].add_job_dependency(jobs["a"])
+    jobs["a"].submit()
+    schedd.run_jobs()
+
+    # status of the running job is asked only once per cycle,
+    # even though the dependent job checks it again
+    c = Counter()
+    queryCalls = schedd.query_calls
+    mgr._single_check(c)
+    assert c.run == 1
+    assert schedd.query_calls == queryCalls + 1
+
+    # outside of a check the status is always evaluated
+    schedd.hold_job("1.0", "Job was held", 1)
+    assert jobs["a"].get_status() == FalconryStatus.HELD
+    schedd.job_queue["1.0"]["JobStatus"] = FalconryStatus.RUNNING.value
+    assert jobs["a"].get_status() == FalconryStatus.RUNNING
+
+    # next cycle evaluates the status again
+    schedd.complete_jobs()
+    mgr._single_check(c)
+    assert c.done == 1
+    assert [j.name for j in mgr.sub_queue] == ["b"]
+
+    # and so does submitting the job
+    mgr._submit_jobs()
+    assert jobs["b"].get_status() == FalconryStatus.IDLE
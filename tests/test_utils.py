@@ -1,9 +1,19 @@
 import pytest
 import tempfile
 import os
+import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
-from falconry.utils import run_command_local, prepend, clean_dir, tail_file
+from falconry.utils import (
+    run_command_local,
+    prepend,
+    clean_dir,
+    tail_file,
+    tail_files,
+    read_submit_time,
+    read_submit_event,
+    make_dirs,
+)
 
 
 """Based on code generated by Lumo AI"""
@@ -114,6 +124,26 @@ class TestTailFile:
         finally:
             os.unlink(fname)
 
+    def test_small_blocks(self, temp_file):
+        result = tail_file(temp_file, lines=5, blockSize=3)
+        assert result.split('\n') == [f'line{i}' for i in range(95, 100)]
+
+    def test_trailing_newline(self, tmp_path):
+        fname = tmp_path / 'f.txt'
+        fname.write_text('a\nb\nc\n')
+        assert tail_file(str(fname), lines=2) == 'b\nc\n'
+
+    def test_carriage_return(self, tmp_path):
+        fname = tmp_path / 'f.err'
+        fname.write_bytes(b'Error: a\nError: b\n 10%\r 50%\r100%\n')
+        assert tail_file(str(fname), lines=3) == 'Error: a\nError: b\n 10%\r 50%\r100%\n'
+
+    def test_tail_files(self, temp_file, tmp_path):
+        missing = str(tmp_path / 'missing.txt')
+        result = tail_files([temp_file, missing], lines=2)
+        assert result[temp_file] == 'line98\nline99'
+        assert result[missing] == ''
+
     def test_fewer_lines_than_requested(self):
         with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
             f.write('line1\nline2')
@@ -124,3 +154,59 @@ class TestTailFile:
             assert 'line2' in result
         finally:
             os.unlink(fname)
+
+
+class TestReadSubmitTime:
+    def _write(self, tmp_path, content):
+        fname = tmp_path / "1.0.log"
+        fname.write_text(content)
+        return str(fname)
+
+    def test_iso_format(self, tmp_path):
+        fname = self._write(
+            tmp_path,
+            "000 (001.000.000) 2024-03-18 12:34:56 Job submitted from host: <1.2.3.4>\n...\n",
+        )
+        expected = time.mktime((2024, 3, 18, 12, 34, 56, 0, 0, -1))
+        assert read_submit_time(fname) == int(expected)
+
+    def test_old_format(self, tmp_path):
+        fname = self._write(
+            tmp_path,
+            "000 (001.000.000) 03/18 12:34:56 Job submitted from host: <1.2.3.4>\n",
+        )
+        year = time.localtime().tm_year
+        expected = time.mktime((year, 3, 18, 12, 34, 56, 0, 0, -1))
+        assert read_submit_time(fname) == int(expected)
+
+    def test_old_format_year_rollover(self, tmp_path):
+        # date in the future means job was submitted previous year
+        future = time.localtime(time.time() + 7 * 24 * 60 * 60)
+        fname = self._write(
+            tmp_path,
+            f"000 (001.000.000) {time.strftime('%m/%d %H:%M:%S', future)} Job submitted from host: <1.2.3.4>\n",
+        )
+        assert read_submit_time(fname) < time.time()
+
+    def test_notes(self, tmp_path):
+        fname = self._write(
+            tmp_path,
+            "000 (001.000.000) 2024-03-18 12:34:56 Job submitted from host: <1.2.3.4>\n"
+            "    my_job\n...\n",
+        )
+        assert read_submit_event(fname)[1] == "my_job"
+
+    def test_no_submit_event(self, tmp_path):
+        fname = self._write(tmp_path, "Job is idle.")
+        assert read_submit_time(fname) is None
+
+    def test_missing_file(self, tmp_path):
+        assert read_submit_time(str(tmp_path / "missing.log")) is None
+
+
+def test_make_dirs(tmp_path):
+    paths = [str(tmp_path / "a" / "b" / str(i)) for i in range(5)]
+    make_dirs(paths + [str(tmp_path / "a")] + paths[:2])
+    assert all(os.path.isdir(p) for p in paths)
+    # existing directories are fine
+    make_dirs(paths)
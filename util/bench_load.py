@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Compares ways of loading a large save file (see `manager.load`).
+
+Usage: python util/bench_load.py [number of jobs]
+
+Needs the mock of HTCondor from the tests (run from the repository root).
+"""
+import gc
+import gzip
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List
+
+import ijson
+
+sys.path.insert(0, "tests")
+from MockHTCondor import MockHTCondor  # noqa: E402
+from falconry import job, manager  # noqa: E402
+
+
+def _timeit(name: str, func: Callable[[], Any]) -> None:
+    start = time.perf_counter()
+    func()
+    print(f"{name:<40} {time.perf_counter() - start:8.2f} s")
+
+
+def _parse(lines: List[str]) -> List[Any]:
+    return [json.loads(line) for line in lines]
+
+
+def main() -> None:
+    nJobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    logging.getLogger("falconry").setLevel(logging.WARNING)
+    schedd = MockHTCondor.Schedd()
+    tmpDir = tempfile.mkdtemp()
+
+    mgr = manager(tmpDir, schedd=schedd)  # type: ignore
+    jobs = [job(f"job_{i}", schedd) for i in range(nJobs)]  # type: ignore
+    for j in jobs:
+        j.set_simple("/long/path/to/the/executable/run.sh", tmpDir, makeDirs=False)
+    mgr.add_jobs(jobs)
+    mgr.save(quiet=True, prefix="plain_")
+    mgr.compressSave = True
+    mgr.save(quiet=True)
+    plain = os.path.join(tmpDir, "plain_data.json")
+    compressed = os.path.join(tmpDir, "data.json")
+    print(f"{nJobs} jobs, {os.path.getsize(plain) / 1e6:.1f} MB json, "
+          f"{os.path.getsize(compressed) / 1e6:.1f} MB compressed")
+
+    def _count(items: Any) -> int:
+        return sum(1 for _ in items)
+
+    with open(plain, "rb") as f:
+        _timeit(f"parse json, ijson {ijson.backend}",
+                lambda: _count(ijson.kvitems(f, "")))
+    with open(plain, "rb") as f:
+        _timeit("parse json, ijson python",
+                lambda: _count(ijson.get_backend("python").kvitems(f, "")))
+    with open(plain, "rb") as f:
+        _timeit("parse json, json.load", lambda: json.load(f))
+    with gzip.open(compressed, "rt") as f:
+        lines = f.readlines()
+    _timeit("parse json lines, json.loads", lambda: _parse(lines))
+    chunks = [lines[i:i + 5000] for i in range(0, len(lines), 5000)]
+    with ProcessPoolExecutor(4) as pool:
+        list(pool.map(_parse, chunks[:4]))  # start the workers
+        _timeit("parse json lines, 4 processes",
+                lambda: [x for chunk in pool.map(_parse, chunks) for x in chunk])
+
+    for name, gcEnabled in [("manager.load, gc enabled", True), ("manager.load", False)]:
+        loaded = manager(tmpDir, schedd=schedd)  # type: ignore
+        loaded.saveFileName = plain
+        if not gcEnabled:
+            _timeit(name, loaded.load)
+            continue
+        # load disables gc itself, patch it to compare
+        disable = gc.disable
+        gc.disable = lambda: None  # type: ignore
+        try:
+            _timeit(name, loaded.load)
+        finally:
+            gc.disable = disable  # type: ignore
+
+
+if __name__ == "__main__":
+    main()